@@ -0,0 +1,65 @@
+-- ========================================
+-- Aggregate views and composite indexes
+-- ========================================
+-- Run this in Supabase SQL Editor, or apply it with:
+--     python scripts/migrate.py
+-- Safe to run more than once.
+--
+-- The dashboard reads these views instead of downloading every vote,
+-- city-day and availability row and tallying them in JavaScript, so each
+-- refresh returns one row per attraction, city or user.
+
+-- ========================================
+-- COMPOSITE INDEXES
+-- ========================================
+-- (attraction_id, vote) lets attraction_vote_totals run as an index-only scan.
+CREATE INDEX IF NOT EXISTS idx_attraction_votes_attraction_vote ON attraction_votes(attraction_id, vote);
+
+-- (city_id, days) does the same for city_day_totals.
+CREATE INDEX IF NOT EXISTS idx_user_city_days_city_days ON user_city_days(city_id, days);
+
+-- Per-user counts in user_progress use the (user_id, city_id) and
+-- (user_id, attraction_id) indexes that the UNIQUE constraints on
+-- user_city_days and attraction_votes already create, so the old
+-- single-column user_id indexes are redundant.
+DROP INDEX IF EXISTS idx_user_city_days_user_id;
+DROP INDEX IF EXISTS idx_attraction_votes_user_id;
+
+-- ========================================
+-- VIEWS
+-- ========================================
+-- security_invoker makes the views respect the caller's row level security.
+
+-- Per-attraction vote tally
+CREATE OR REPLACE VIEW attraction_vote_totals WITH (security_invoker = true) AS
+SELECT
+    attraction_id,
+    SUM(vote)::INTEGER AS score,
+    COUNT(*) FILTER (WHERE vote > 0)::INTEGER AS upvotes,
+    COUNT(*) FILTER (WHERE vote < 0)::INTEGER AS downvotes
+FROM attraction_votes
+GROUP BY attraction_id;
+
+-- Per-city planned days and number of interested travelers
+CREATE OR REPLACE VIEW city_day_totals WITH (security_invoker = true) AS
+SELECT
+    city_id,
+    SUM(days)::INTEGER AS total_days,
+    COUNT(*)::INTEGER AS user_count
+FROM user_city_days
+GROUP BY city_id;
+
+-- Per-user planning progress (one row per user)
+CREATE OR REPLACE VIEW user_progress WITH (security_invoker = true) AS
+SELECT
+    u.id AS user_id,
+    (a.user_id IS NOT NULL) AS availability,
+    (a.preferred_start IS NOT NULL) AS preferred,
+    (SELECT COUNT(*) FROM user_city_days d WHERE d.user_id = u.id)::INTEGER AS cities,
+    (SELECT COUNT(*) FROM attraction_votes v WHERE v.user_id = u.id)::INTEGER AS votes
+FROM users u
+LEFT JOIN availability a ON a.user_id = u.id;
+
+COMMENT ON VIEW attraction_vote_totals IS 'Score, upvotes and downvotes per attraction';
+COMMENT ON VIEW city_day_totals IS 'Total planned days and traveler count per city';
+COMMENT ON VIEW user_progress IS 'Whether each user has set dates, and how many cities and votes they have';
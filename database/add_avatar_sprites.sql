@@ -0,0 +1,27 @@
+-- ========================================
+-- Avatar sprite sheets
+-- ========================================
+-- Run this in Supabase SQL Editor after add_avatar_variants.sql, or apply it with:
+--     python scripts/migrate.py
+-- Safe to run more than once.
+--
+-- scripts/upload_avatars.py packs each user's avatar_options into one WebP
+-- sprite sheet (avatar picker) and everyone's selected avatar into one team
+-- atlas (roster, dashboard, nav), so each view loads one image instead of one
+-- per avatar. Offsets are in pixels of the sheet; the front end turns them
+-- into background-size / background-position percentages.
+--
+-- avatar_sprite (frames in the same order as avatar_options):
+--   { "url": "https://.../sprites/julian.<hash>.webp", "width": 1152, "height": 768,
+--     "tile": 384, "frames": [{ "x": 0, "y": 0 }, { "x": 384, "y": 0 }, ...] }
+--
+-- avatar_atlas (this user's tile in the team atlas; only valid while
+-- avatar_url still equals "source"):
+--   { "url": "https://.../sprites/team.<hash>.webp", "width": 432, "height": 432,
+--     "tile": 144, "x": 144, "y": 0, "source": "https://.../julian_Julian1.png" }
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_sprite JSONB;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_atlas JSONB;
+
+COMMENT ON COLUMN users.avatar_sprite IS 'Sprite sheet of avatar_options with per-option pixel offsets';
+COMMENT ON COLUMN users.avatar_atlas IS 'Tile of the selected avatar in the team atlas, valid while avatar_url = source';
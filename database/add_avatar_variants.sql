@@ -0,0 +1,18 @@
+-- ========================================
+-- Add avatar_variants column to users table
+-- ========================================
+-- Run this in Supabase SQL Editor after add_avatar_options.sql.
+-- Stores small WebP/AVIF derivatives for each entry in avatar_options so the
+-- avatar picker can use srcset instead of downloading 1024px PNGs.
+--
+-- Shape (one element per avatar option, same order as avatar_options):
+-- [
+--   { "webp": { "96": "https://...", "192": "https://...", "384": "https://..." },
+--     "avif": { "96": "https://...", "192": "https://...", "384": "https://..." } },
+--   ...
+-- ]
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_variants JSONB;
+
+-- Comment for documentation
+COMMENT ON COLUMN users.avatar_variants IS 'Responsive WebP/AVIF derivative URLs per avatar option, keyed by format then width';
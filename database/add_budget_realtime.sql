@@ -0,0 +1,22 @@
+-- ========================================
+-- Realtime for user_budgets
+-- ========================================
+-- Run this in Supabase SQL Editor, or apply it with:
+--     python scripts/migrate.py
+-- Safe to run more than once.
+--
+-- The dashboard subscribes to user_budgets so that saving a budget marks
+-- its published snapshot stale and the Budget overview is re-read live.
+-- Realtime only sends changes for tables in the supabase_realtime
+-- publication, and add_budget_table.sql never added this one.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_publication_tables
+        WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'user_budgets'
+    ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE user_budgets;
+    END IF;
+END;
+$$;
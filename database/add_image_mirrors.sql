@@ -0,0 +1,22 @@
+-- ========================================
+-- Mirrored catalog images
+-- ========================================
+-- Run this in Supabase SQL Editor, or apply it with:
+--     python scripts/migrate.py
+-- Safe to run more than once.
+--
+-- scripts/mirror_images.py copies each city/attraction image from its
+-- third-party host into the "images" storage bucket as resized WebP files.
+-- image_url then points at the card-sized copy, image_variants holds every
+-- size, and image_source_url keeps the original URL so the mirror can
+-- revalidate it (and the catalog loader can compare against it).
+
+ALTER TABLE cities ADD COLUMN IF NOT EXISTS image_source_url TEXT;
+ALTER TABLE cities ADD COLUMN IF NOT EXISTS image_variants JSONB;
+ALTER TABLE attractions ADD COLUMN IF NOT EXISTS image_source_url TEXT;
+ALTER TABLE attractions ADD COLUMN IF NOT EXISTS image_variants JSONB;
+
+COMMENT ON COLUMN cities.image_source_url IS 'Original third-party image URL, when image_url points at a mirrored copy';
+COMMENT ON COLUMN cities.image_variants IS 'Mirrored WebP image URLs keyed by size name (card, expanded)';
+COMMENT ON COLUMN attractions.image_source_url IS 'Original third-party image URL, when image_url points at a mirrored copy';
+COMMENT ON COLUMN attractions.image_variants IS 'Mirrored WebP image URLs keyed by size name (card, expanded)';
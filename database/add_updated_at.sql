@@ -0,0 +1,35 @@
+-- ========================================
+-- updated_at on every planner table
+-- ========================================
+-- Run this in Supabase SQL Editor, or apply it with:
+--     python scripts/migrate.py
+-- Safe to run more than once.
+--
+-- scripts/backup_db.py exports only the rows changed since its last run by
+-- reading updated_at. A trigger sets it from the database clock on every
+-- insert and update, so it is reliable even when the app sends its own
+-- (browser clock) value or forgets to send one.
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['users', 'availability', 'cities', 'attractions',
+                             'attraction_votes', 'user_city_days', 'user_budgets']
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS set_updated_at ON %I', t);
+        EXECUTE format('CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION set_updated_at()', t);
+        -- Keyset index for "rows changed since" reads
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (updated_at, id)', 'idx_' || t || '_updated_at', t);
+    END LOOP;
+END;
+$$;
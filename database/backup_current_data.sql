@@ -1,6 +1,8 @@
 -- ========================================
 -- JAPAN 2026 - BACKUP CURRENT DATA
 -- Run this FIRST before running the seed script
+-- This only lists what is there. For a real backup you can restore, run:
+--     python scripts/backup_db.py
 -- ========================================
 
 -- First, let's see what data exists:
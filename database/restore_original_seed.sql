@@ -1,6 +1,8 @@
 -- ========================================
 -- JAPAN 2026 - RESTORE ORIGINAL SEED DATA
 -- Run this to revert back to the original 8 cities and 16 attractions
+-- ⚠️  Also wipes every vote and city-day allocation. To keep them, use:
+--     python scripts/load_catalog.py database/catalog/original.json
 -- ========================================
 
 -- Clear everything first
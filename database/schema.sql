@@ -15,7 +15,8 @@ CREATE TABLE IF NOT EXISTS users (
     avatar_url TEXT,
     initials TEXT,
     color TEXT DEFAULT '#ff5c8d',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Insert the team members
@@ -54,8 +55,11 @@ CREATE TABLE IF NOT EXISTS cities (
     japanese_name TEXT,
     description TEXT,
     image_url TEXT,
+    image_source_url TEXT,   -- original URL when image_url is a mirrored copy
+    image_variants JSONB,    -- mirrored WebP URLs by size: {"card": ..., "expanded": ...}
     highlights TEXT[],
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Insert seed cities
@@ -79,6 +83,7 @@ CREATE TABLE IF NOT EXISTS user_city_days (
     city_id UUID REFERENCES cities(id) ON DELETE CASCADE,
     days INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(user_id, city_id)
 );
 
@@ -108,8 +113,11 @@ CREATE TABLE IF NOT EXISTS attractions (
     description TEXT,
     time_estimate TEXT,  -- e.g. "2-4 hrs", "Overnight"
     image_url TEXT,
+    image_source_url TEXT,
+    image_variants JSONB,
     created_by UUID REFERENCES users(id) ON DELETE SET NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Insert seed attractions
@@ -250,6 +258,7 @@ CREATE TABLE IF NOT EXISTS attraction_votes (
     attraction_id UUID REFERENCES attractions(id) ON DELETE CASCADE,
     vote INTEGER NOT NULL CHECK (vote IN (-1, 1)),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(user_id, attraction_id)
 );
 
@@ -293,13 +302,75 @@ ALTER PUBLICATION supabase_realtime ADD TABLE user_city_days;
 ALTER PUBLICATION supabase_realtime ADD TABLE attraction_votes;
 ALTER PUBLICATION supabase_realtime ADD TABLE attractions;
 ALTER PUBLICATION supabase_realtime ADD TABLE cities;
+ALTER PUBLICATION supabase_realtime ADD TABLE user_budgets;
 
 -- ========================================
 -- INDEXES FOR PERFORMANCE
 -- ========================================
+-- Lookups by user_id on user_city_days and attraction_votes use the
+-- (user_id, city_id) / (user_id, attraction_id) UNIQUE constraint indexes.
 CREATE INDEX IF NOT EXISTS idx_availability_user_id ON availability(user_id);
-CREATE INDEX IF NOT EXISTS idx_user_city_days_user_id ON user_city_days(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_city_days_city_id ON user_city_days(city_id);
+CREATE INDEX IF NOT EXISTS idx_user_city_days_city_days ON user_city_days(city_id, days);
 CREATE INDEX IF NOT EXISTS idx_attractions_city_id ON attractions(city_id);
 CREATE INDEX IF NOT EXISTS idx_attraction_votes_attraction_id ON attraction_votes(attraction_id);
-CREATE INDEX IF NOT EXISTS idx_attraction_votes_user_id ON attraction_votes(user_id);
+CREATE INDEX IF NOT EXISTS idx_attraction_votes_attraction_vote ON attraction_votes(attraction_id, vote);
+
+-- ========================================
+-- UPDATED_AT TRIGGERS
+-- ========================================
+-- Set updated_at from the database clock on every write, for incremental
+-- backups (scripts/backup_db.py; see database/add_updated_at.sql for existing databases)
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['users', 'availability', 'cities', 'attractions',
+                             'attraction_votes', 'user_city_days', 'user_budgets']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS set_updated_at ON %I', t);
+        EXECUTE format('CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION set_updated_at()', t);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (updated_at, id)', 'idx_' || t || '_updated_at', t);
+    END LOOP;
+END;
+$$;
+
+-- ========================================
+-- AGGREGATE VIEWS
+-- ========================================
+-- The dashboard reads these instead of downloading raw vote, city-day and
+-- availability rows (see database/add_aggregate_views.sql for existing databases)
+CREATE OR REPLACE VIEW attraction_vote_totals WITH (security_invoker = true) AS
+SELECT
+    attraction_id,
+    SUM(vote)::INTEGER AS score,
+    COUNT(*) FILTER (WHERE vote > 0)::INTEGER AS upvotes,
+    COUNT(*) FILTER (WHERE vote < 0)::INTEGER AS downvotes
+FROM attraction_votes
+GROUP BY attraction_id;
+
+CREATE OR REPLACE VIEW city_day_totals WITH (security_invoker = true) AS
+SELECT
+    city_id,
+    SUM(days)::INTEGER AS total_days,
+    COUNT(*)::INTEGER AS user_count
+FROM user_city_days
+GROUP BY city_id;
+
+CREATE OR REPLACE VIEW user_progress WITH (security_invoker = true) AS
+SELECT
+    u.id AS user_id,
+    (a.user_id IS NOT NULL) AS availability,
+    (a.preferred_start IS NOT NULL) AS preferred,
+    (SELECT COUNT(*) FROM user_city_days d WHERE d.user_id = u.id)::INTEGER AS cities,
+    (SELECT COUNT(*) FROM attraction_votes v WHERE v.user_id = u.id)::INTEGER AS votes
+FROM users u
+LEFT JOIN availability a ON a.user_id = u.id;
@@ -1,6 +1,9 @@
 -- ========================================
 -- JAPAN 2026 - Seed 40 Activities Data
 -- ⚠️  WARNING: This script DELETES existing attractions and cities!
+-- It also wipes every vote and city-day allocation. To refresh the catalog
+-- and keep them, use the loader instead (same data, database/catalog/activities.json):
+--     python scripts/load_catalog.py
 -- ========================================
 
 -- ========================================
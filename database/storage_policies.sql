@@ -28,6 +28,48 @@ CREATE POLICY "Service Delete"
 ON storage.objects FOR DELETE
 USING (bucket_id = 'profile-pictures');
 
+-- ========================================
+-- Dashboard snapshot bucket
+-- ========================================
+-- scripts/build_dashboard_snapshot.py publishes a precomputed dashboard
+-- document here; the site reads it with one public GET.
+-- Create the bucket in Supabase Dashboard > Storage
+-- Name: dashboard
+-- Public: Yes
+
+CREATE POLICY "Public Dashboard Snapshot"
+ON storage.objects FOR SELECT
+USING (bucket_id = 'dashboard');
+
+CREATE POLICY "Service Dashboard Upload"
+ON storage.objects FOR INSERT
+WITH CHECK (bucket_id = 'dashboard');
+
+CREATE POLICY "Service Dashboard Update"
+ON storage.objects FOR UPDATE
+USING (bucket_id = 'dashboard');
+
+-- ========================================
+-- Mirrored catalog images bucket
+-- ========================================
+-- scripts/mirror_images.py stores resized WebP copies of the city and
+-- attraction images here, under content-addressed names.
+-- Create the bucket in Supabase Dashboard > Storage
+-- Name: images
+-- Public: Yes
+
+CREATE POLICY "Public Catalog Images"
+ON storage.objects FOR SELECT
+USING (bucket_id = 'images');
+
+CREATE POLICY "Service Catalog Images Upload"
+ON storage.objects FOR INSERT
+WITH CHECK (bucket_id = 'images');
+
+CREATE POLICY "Service Catalog Images Update"
+ON storage.objects FOR UPDATE
+USING (bucket_id = 'images');
+
 -- ========================================
 -- ALTERNATIVE: Disable RLS on storage bucket
 -- ========================================
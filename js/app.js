@@ -229,7 +229,7 @@ function renderUserSelection() {
             <div class="user-card" data-user-id="${user.id}">
                 <div class="user-avatar" style="${bgStyle}">
                     ${hasAvatar 
-                        ? `<img src="${user.avatar_url}" alt="${user.name}">`
+                        ? renderUserAvatar(user)
                         : user.initials || user.name.charAt(0)
                     }
                 </div>
@@ -301,7 +301,7 @@ function updateNavUser() {
     
     if (navUserAvatar) {
         if (currentUser.avatar_url) {
-            navUserAvatar.innerHTML = `<img src="${currentUser.avatar_url}" alt="${currentUser.name}">`;
+            navUserAvatar.innerHTML = renderUserAvatar(currentUser);
             navUserAvatar.style.background = 'transparent';
         } else {
             navUserAvatar.innerHTML = currentUser.initials || currentUser.name.charAt(0);
@@ -392,7 +392,7 @@ function showSection(sectionId) {
     // Refresh section data if needed
     switch(sectionId) {
         case 'dashboard':
-            if (typeof refreshDashboard === 'function') refreshDashboard();
+            if (typeof loadDashboard === 'function') loadDashboard();
             break;
         case 'availability':
             if (typeof refreshAvailability === 'function') refreshAvailability();
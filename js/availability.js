@@ -167,10 +167,39 @@ async function updateCalendarView() {
         { year: 2026, month: 7, name: 'August 2026' }
     ];
     
-    calendarView.innerHTML = months.map(m => generateMonthCalendar(m, availability)).join('');
+    const dayIndex = buildDayIndex(availability);
+    calendarView.innerHTML = months.map(m => generateMonthCalendar(m, dayIndex)).join('');
 }
 
-function generateMonthCalendar(monthData, availability) {
+// Walk each person's date ranges once, so every calendar cell is a lookup
+// instead of a scan over all availability rows
+function buildDayIndex(availability) {
+    const index = {};
+    const entryFor = dateStr => index[dateStr] || (index[dateStr] = { available: [], preferred: [] });
+    
+    const addRange = (start, end, name, key) => {
+        if (!start || !end) return;
+        const from = start > TRIP_CONFIG.minDate ? start : TRIP_CONFIG.minDate;
+        const to = end < TRIP_CONFIG.maxDate ? end : TRIP_CONFIG.maxDate;
+        const current = new Date(from);
+        const last = new Date(to);
+        while (current <= last) {
+            entryFor(current.toISOString().split('T')[0])[key].push(name);
+            current.setUTCDate(current.getUTCDate() + 1);
+        }
+    };
+    
+    availability.forEach(avail => {
+        const user = getUserFromId(avail.user_id);
+        const userName = user ? user.name : 'Unknown';
+        addRange(avail.preferred_start, avail.preferred_end, userName, 'preferred');
+        addRange(avail.available_start, avail.available_end, userName, 'available');
+    });
+    
+    return index;
+}
+
+function generateMonthCalendar(monthData, dayIndex) {
     const { year, month, name } = monthData;
     const firstDay = new Date(year, month, 1);
     const lastDay = new Date(year, month + 1, 0);
@@ -195,7 +224,7 @@ function generateMonthCalendar(monthData, availability) {
     // Days of the month
     for (let day = 1; day <= lastDay.getDate(); day++) {
         const dateStr = `${year}-${String(month + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
-        const { className, users: dayUsers } = getDayInfo(dateStr, availability);
+        const { className, users: dayUsers } = getDayInfo(dateStr, dayIndex);
         
         html += `
             <div class="calendar-day ${className}" title="${dayUsers.join(', ')}">
@@ -217,26 +246,10 @@ function generateMonthCalendar(monthData, availability) {
     return html;
 }
 
-function getDayInfo(dateStr, availability) {
-    let availableUsers = [];
-    let preferredUsers = [];
-    
-    availability.forEach(avail => {
-        const user = getUserFromId(avail.user_id);
-        const userName = user ? user.name : 'Unknown';
-        
-        if (avail.preferred_start && avail.preferred_end) {
-            if (dateStr >= avail.preferred_start && dateStr <= avail.preferred_end) {
-                preferredUsers.push(userName);
-            }
-        }
-        
-        if (avail.available_start && avail.available_end) {
-            if (dateStr >= avail.available_start && dateStr <= avail.available_end) {
-                availableUsers.push(userName);
-            }
-        }
-    });
+function getDayInfo(dateStr, dayIndex) {
+    const entry = dayIndex[dateStr] || { available: [], preferred: [] };
+    const availableUsers = entry.available;
+    const preferredUsers = entry.preferred;
     
     // Determine class based on overlap
     let className = '';
@@ -8,6 +8,11 @@ const AVATAR_STYLE_NAMES = ['Ukiyo-e', 'Sakura Anime', 'Sumi-e Ink', 'Shrine Spi
 let selectedAvatarUrl = null;
 let avatarPickerCallback = null;
 let currentUserAvatarOptions = [];
+let currentUserAvatarVariants = [];
+let currentUserAvatarSprite = null;
+
+// Rendered width of a picker tile, used to pick the right derivative
+const AVATAR_OPTION_SIZES = '(max-width: 600px) 30vw, 200px';
 
 // ========================================
 // SHOW AVATAR PICKER
@@ -20,6 +25,11 @@ function showAvatarPicker(userName, callback) {
     // Get user-specific avatar options if available
     const user = users.find(u => u.name === userName);
     currentUserAvatarOptions = user?.avatar_options || [];
+    currentUserAvatarVariants = user?.avatar_variants || [];
+    // The sprite sheet only applies while its frames line up with the options
+    currentUserAvatarSprite = user?.avatar_sprite?.frames?.length === currentUserAvatarOptions.length
+        ? user.avatar_sprite
+        : null;
     const hasCustomAvatars = currentUserAvatarOptions.length > 0;
 
     // Build avatar options HTML
@@ -32,7 +42,9 @@ function showAvatarPicker(userName, callback) {
                 <div class="avatar-picker-grid">
                     ${currentUserAvatarOptions.map((url, index) => `
                         <div class="avatar-option custom-avatar" data-avatar-url="${url}" data-index="${index}">
-                            <img src="${url}" alt="${AVATAR_STYLE_NAMES[index] || 'Avatar ' + (index + 1)}">
+                            ${currentUserAvatarSprite
+                                ? renderSpriteTile(currentUserAvatarSprite, currentUserAvatarSprite.frames[index], AVATAR_STYLE_NAMES[index] || 'Avatar ' + (index + 1))
+                                : renderAvatarImage(url, currentUserAvatarVariants[index], AVATAR_STYLE_NAMES[index] || 'Avatar ' + (index + 1))}
                         </div>
                     `).join('')}
                 </div>
@@ -91,6 +103,52 @@ function showAvatarPicker(userName, callback) {
     setupAvatarPickerEvents();
 }
 
+// Build a <picture> with AVIF/WebP srcsets when derivatives exist, falling back to the original
+function renderAvatarImage(url, variants, alt) {
+    if (!variants) {
+        return `<img src="${url}" alt="${alt}">`;
+    }
+
+    const sources = ['avif', 'webp']
+        .filter(format => variants[format])
+        .map(format => {
+            const srcset = Object.entries(variants[format])
+                .map(([width, variantUrl]) => `${variantUrl} ${width}w`)
+                .join(', ');
+            return `<source type="image/${format}" srcset="${srcset}" sizes="${AVATAR_OPTION_SIZES}">`;
+        })
+        .join('');
+
+    return `<picture>${sources}<img src="${url}" alt="${alt}" loading="lazy" decoding="async"></picture>`;
+}
+
+// One tile of a sprite sheet. Offsets become percentages so the tile scales to any box size.
+function renderSpriteTile(sheet, frame, alt) {
+    const columns = sheet.width / sheet.tile;
+    const rows = sheet.height / sheet.tile;
+    const x = columns > 1 ? (frame.x / (sheet.width - sheet.tile)) * 100 : 0;
+    const y = rows > 1 ? (frame.y / (sheet.height - sheet.tile)) * 100 : 0;
+    const style = `background-image: url('${sheet.url}'); background-size: ${columns * 100}% ${rows * 100}%; background-position: ${x}% ${y}%;`;
+    return `<div class="avatar-sprite" role="img" aria-label="${alt}" style="${style}"></div>`;
+}
+
+// A user's selected avatar for the roster, dashboard and nav: their tile in the
+// team atlas, else the matching tile of their own sheet, else the plain image
+function renderUserAvatar(user) {
+    const atlas = user.avatar_atlas;
+    if (atlas && atlas.source === user.avatar_url) {
+        return renderSpriteTile(atlas, atlas, user.name);
+    }
+
+    const index = (user.avatar_options || []).indexOf(user.avatar_url);
+    const sprite = user.avatar_sprite;
+    if (index >= 0 && sprite?.frames?.length === user.avatar_options.length) {
+        return renderSpriteTile(sprite, sprite.frames[index], user.name);
+    }
+
+    return `<img src="${user.avatar_url}" alt="${user.name}" style="width: 100%; height: 100%; object-fit: cover; border-radius: 50%;">`;
+}
+
 function setupAvatarPickerEvents() {
     const avatarOptions = document.querySelectorAll('.avatar-option');
     const gridView = document.getElementById('avatarGridView');
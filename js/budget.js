@@ -62,6 +62,10 @@ const TIER_NAMES = {
 let userBudgetData = null;
 let tripDays = 14;
 
+// Every plan priced for every trip length, per member and for the group (scripts/budget_scenarios.py)
+const BUDGET_ARTIFACT_VERSION = 1;
+let budgetScenarios = null;
+
 // ========================================
 // INITIALIZATION
 // ========================================
@@ -78,6 +82,17 @@ function initBudget() {
         saveBtn.addEventListener('click', handleSaveBudget);
     }
     
+    // Group scenario what-ifs: answered from the published table, no queries
+    document.getElementById('scenarioDays')?.addEventListener('input', () => {
+        setScenarioCapRange(true);
+        renderBudgetScenarios();
+    });
+    document.getElementById('scenarioCap')?.addEventListener('input', renderBudgetScenarios);
+    document.getElementById('scenarioCurrency')?.addEventListener('change', () => {
+        setScenarioCapRange(false);
+        renderBudgetScenarios();
+    });
+    
     refreshBudget();
 }
 
@@ -99,6 +114,7 @@ async function refreshBudget() {
     
     // Calculate and display totals
     calculateBudget();
+    loadBudgetScenarios();
 }
 
 // ========================================
@@ -131,6 +147,7 @@ function applyBudgetSelections(budget) {
 function handleTierChange(e) {
     // Just recalculate on change - don't save until user clicks save
     calculateBudget();
+    renderBudgetScenarios();
 }
 
 async function handleSaveBudget() {
@@ -246,3 +263,128 @@ function animateBudgetTotal(target) {
     }, duration / steps);
 }
 
+// ========================================
+// GROUP SCENARIOS
+// ========================================
+
+async function loadBudgetScenarios() {
+    const card = document.getElementById('budgetScenarios');
+    budgetScenarios = await getBudgetArtifact(BUDGET_ARTIFACT_VERSION);
+    if (!card) return;
+    
+    card.classList.toggle('hidden', !budgetScenarios);
+    if (!budgetScenarios) return;
+    
+    const currency = document.getElementById('scenarioCurrency');
+    const selected = currency.value;
+    currency.innerHTML = Object.keys(budgetScenarios.rates)
+        .map(code => `<option value="${code}">${code}</option>`)
+        .join('');
+    currency.value = selected in budgetScenarios.rates ? selected : budgetScenarios.currency;
+    
+    const lengths = budgetScenarios.lengths;
+    const days = document.getElementById('scenarioDays');
+    days.min = lengths[0];
+    days.max = lengths[lengths.length - 1];
+    days.value = Math.min(Math.max(tripDays, lengths[0]), lengths[lengths.length - 1]);
+    
+    setScenarioCapRange(false);
+    renderBudgetScenarios();
+}
+
+function scenarioDayIndex() {
+    return parseInt(document.getElementById('scenarioDays').value) - budgetScenarios.lengths[0];
+}
+
+function scenarioRate() {
+    return budgetScenarios.rates[document.getElementById('scenarioCurrency').value] || 1;
+}
+
+function formatScenarioAmount(usd) {
+    const code = document.getElementById('scenarioCurrency').value;
+    const amount = formatCurrency(usd * scenarioRate());
+    return code === 'USD' ? `$${amount}` : `${amount} ${code}`;
+}
+
+// Row of a tier selection in the published plan table (the first category varies slowest)
+function scenarioPlanIndex(tiers) {
+    return budgetScenarios.categories.reduce((index, category) => {
+        const options = budgetScenarios.tiers[category];
+        return index * options.length + Math.max(options.indexOf(tiers[category]), 0);
+    }, 0);
+}
+
+// Spans the cheapest to the priciest plan for the chosen length, in the chosen currency.
+// Keeps the cap where it was, or starts it at the current selection's total.
+function setScenarioCapRange(keepValue) {
+    const cap = document.getElementById('scenarioCap');
+    const d = scenarioDayIndex();
+    const rate = scenarioRate();
+    const totals = budgetScenarios.totals.map(row => row[d]);
+    const previous = parseFloat(cap.value);
+    
+    cap.min = Math.floor(Math.min(...totals) * rate);
+    cap.max = Math.ceil(Math.max(...totals) * rate);
+    cap.step = 1;
+    cap.value = keepValue
+        ? previous
+        : Math.ceil(budgetScenarios.totals[scenarioPlanIndex(getSelectedTiers())][d] * rate);
+}
+
+// The plan costing at most capUsd that is the fewest tier changes away from
+// `current`, the most expensive of those; -1 if nothing fits
+function bestPlanWithin(current, capUsd, dayIndex) {
+    const { plans, totals } = budgetScenarios;
+    let best = -1;
+    let bestSteps = Infinity;
+    
+    plans.forEach((plan, i) => {
+        const total = totals[i][dayIndex];
+        if (total > capUsd + 1e-6) return;
+        const steps = plan.reduce((sum, tier, k) => sum + Math.abs(tier - plans[current][k]), 0);
+        if (steps < bestSteps || (steps === bestSteps && total > totals[best][dayIndex])) {
+            best = i;
+            bestSteps = steps;
+        }
+    });
+    return best;
+}
+
+function renderBudgetScenarios() {
+    if (!budgetScenarios) return;
+    
+    const { categories, tiers, plans, totals, group } = budgetScenarios;
+    const d = scenarioDayIndex();
+    const days = budgetScenarios.lengths[d];
+    const rate = scenarioRate();
+    
+    document.getElementById('scenarioDaysValue').textContent = days;
+    document.getElementById('scenarioSummary').innerHTML = `
+        ${group.size} travelers for ${days} days: <strong>${formatScenarioAmount(group.total[d])}</strong> together,
+        ${formatScenarioAmount(group.p10[d])}–${formatScenarioAmount(group.p90[d])} per person
+        (median ${formatScenarioAmount(group.p50[d])}). ${group.saved} of ${group.size} have saved a budget.
+    `;
+    
+    const capUsd = parseFloat(document.getElementById('scenarioCap').value) / rate;
+    document.getElementById('scenarioCapValue').textContent = formatScenarioAmount(capUsd);
+    
+    const current = scenarioPlanIndex(getSelectedTiers());
+    const best = bestPlanWithin(current, capUsd, d);
+    const result = document.getElementById('scenarioResult');
+    
+    if (best < 0) {
+        const cheapest = Math.min(...totals.map(row => row[d]));
+        result.innerHTML = `Nothing fits under your cap for ${days} days. The cheapest plan is <strong>${formatScenarioAmount(cheapest)}</strong>.`;
+    } else if (best === current) {
+        result.innerHTML = `Your selection fits: <strong>${formatScenarioAmount(totals[current][d])}</strong> for ${days} days.`;
+    } else {
+        const changes = categories
+            .map((category, k) => ({ category, from: plans[current][k], to: plans[best][k] }))
+            .filter(change => change.from !== change.to)
+            .map(({ category, from, to }) => {
+                const name = index => TIER_NAMES[category]?.[tiers[category][index]]?.name || tiers[category][index];
+                return `${category.charAt(0).toUpperCase() + category.slice(1)} ${name(from)} → ${name(to)}`;
+            });
+        result.innerHTML = `Closest plan within your cap: ${changes.join(', ')}, <strong>${formatScenarioAmount(totals[best][d])}</strong> for ${days} days.`;
+    }
+}
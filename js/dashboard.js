@@ -11,62 +11,113 @@ const timelineContainer = document.getElementById('timelineContainer');
 const topDestinations = document.getElementById('topDestinations');
 const topAttractions = document.getElementById('topAttractions');
 const teamStatus = document.getElementById('teamStatus');
+const suggestedRoute = document.getElementById('suggestedRoute');
+
+// Precomputed snapshot published by scripts/build_dashboard_snapshot.py
+const DASHBOARD_SNAPSHOT_VERSION = 1;
+const DASHBOARD_SNAPSHOT_MAX_AGE_MS = 30 * 60 * 1000;
+const AVAILABILITY_ARTIFACT_VERSION = 1;
+const ROUTE_ARTIFACT_VERSION = 1;
+
+// Set once a realtime change arrives; from then on the snapshot is out of date
+let dashboardSnapshotStale = false;
 
 // ========================================
 // INITIALIZATION
 // ========================================
 
 function initDashboard() {
-    refreshDashboard();
+    loadDashboard();
     
     // Set up real-time subscriptions if Supabase is connected
     if (isSupabaseConnected) {
-        subscribeToChanges('availability', refreshDashboard);
-        subscribeToChanges('user_city_days', refreshDashboard);
-        subscribeToChanges('attraction_votes', refreshDashboard);
+        subscribeToChanges('availability', onDashboardDataChanged);
+        subscribeToChanges('user_city_days', onDashboardDataChanged);
+        subscribeToChanges('attraction_votes', onDashboardDataChanged);
+        subscribeToChanges('user_budgets', onDashboardDataChanged);
+    }
+}
+
+function onDashboardDataChanged() {
+    dashboardSnapshotStale = true;
+    refreshDashboard();
+}
+
+// Render from the published snapshot (one GET) when it is fresh,
+// otherwise fall back to live queries
+async function loadDashboard() {
+    loadBestTrip();
+    loadSuggestedRoute();
+    
+    if (!dashboardSnapshotStale) {
+        const snapshot = await getDashboardSnapshot(DASHBOARD_SNAPSHOT_VERSION);
+        const age = snapshot ? Date.now() - new Date(snapshot.generated_at).getTime() : Infinity;
+        if (snapshot && age <= DASHBOARD_SNAPSHOT_MAX_AGE_MS) {
+            renderDashboard(snapshot);
+            return;
+        }
     }
+    await refreshDashboard();
 }
 
+// Live path: votes, city days and progress come pre-aggregated from the database views
 async function refreshDashboard() {
-    await Promise.all([
-        updateStats(),
-        updateTimeline(),
-        updateTopDestinations(),
-        updateTopAttractions(),
-        updateTeamStatus(),
-        updateBudgetOverview()
+    const [availability, cities, cityTotals, attractions, voteTotals, progress, budgets] = await Promise.all([
+        getAvailability(),
+        getCities(),
+        getCityDayTotals(),
+        getAttractions(),
+        getAttractionVoteTotals(),
+        getUserProgress(),
+        getAllUserBudgets()
     ]);
+    
+    renderDashboard(buildDashboardData(availability, cities, cityTotals, attractions, voteTotals, progress, budgets));
+}
+
+// Same shape as the snapshot document built by scripts/build_dashboard_snapshot.py
+function buildDashboardData(availability, cities, cityTotals, attractions, voteTotals, progress, budgets) {
+    return {
+        stats: {
+            travelers_ready: availability.filter(a => a.preferred_start && a.preferred_end).length,
+            destinations: cities.length,
+            attractions: attractions.length
+        },
+        best_dates: computeBestDates(availability),
+        timeline: computeTimeline(availability),
+        top_destinations: computeTopDestinations(cities, cityTotals),
+        top_attractions: computeTopAttractions(attractions, voteTotals),
+        team: Object.fromEntries(progress.map(p => [p.user_id, p])),
+        budget_tiers: computeBudgetTiers(budgets)
+    };
+}
+
+function renderDashboard(data) {
+    renderStats(data.stats);
+    renderBestDates(data.best_dates);
+    renderTimeline(data.timeline);
+    renderTopDestinations(data.top_destinations);
+    renderTopAttractions(data.top_attractions);
+    renderTeamStatus(data.team);
+    renderBudgetOverview(data.budget_tiers);
 }
 
 // ========================================
 // STATS
 // ========================================
 
-async function updateStats() {
-    const availability = await getAvailability();
-    const cities = await getCities();
-    const attractions = await getAttractions();
-    
-    // Count users with availability set
-    const readyTravelers = availability.filter(a => a.preferred_start && a.preferred_end).length;
-    
-    statTravelers.textContent = readyTravelers;
-    statDestinations.textContent = cities.length;
-    statAttractions.textContent = attractions.length;
-    
-    // Calculate best overlap dates
-    updateBestDates(availability);
+function renderStats(stats) {
+    statTravelers.textContent = stats.travelers_ready;
+    statDestinations.textContent = stats.destinations;
+    statAttractions.textContent = stats.attractions;
 }
 
-function updateBestDates(availability) {
+function computeBestDates(availability) {
     const preferredDates = availability.filter(a => a.preferred_start && a.preferred_end);
+    const best = { count: preferredDates.length, start: null, end: null, days: 0 };
     
     if (preferredDates.length < 2) {
-        bestDates.innerHTML = `
-            <p class="best-dates-label">Best Overlap Dates</p>
-            <p class="best-dates-value">Need more travelers to set dates</p>
-        `;
-        return;
+        return best;
     }
     
     // Find overlapping preferred dates
@@ -86,10 +137,49 @@ function updateBestDates(availability) {
     });
     
     if (overlapStart && overlapEnd && overlapStart <= overlapEnd) {
-        const days = getDaysBetween(overlapStart, overlapEnd);
+        best.start = overlapStart.toISOString().split('T')[0];
+        best.end = overlapEnd.toISOString().split('T')[0];
+        best.days = getDaysBetween(overlapStart, overlapEnd);
+    }
+    return best;
+}
+
+// Best window for the default trip length, from scripts/availability_matrix.py
+let bestTrip = null;
+
+async function loadBestTrip() {
+    const artifact = await getAvailabilityArtifact(AVAILABILITY_ARTIFACT_VERSION);
+    if (!artifact) return;
+    
+    const trip = artifact.best_trips.find(t => t.length === TRIP_CONFIG.defaultTripLength);
+    bestTrip = trip ? { ...trip, travelers: artifact.users } : null;
+    renderBestTrip();
+}
+
+function renderBestTrip() {
+    const existing = bestDates.querySelector('.best-trip-value');
+    if (existing) existing.remove();
+    if (!bestTrip || bestTrip.full_available === 0) return;
+    
+    bestDates.insertAdjacentHTML('beforeend', `
+        <p class="best-dates-label best-trip-value">Best ${bestTrip.length}-day trip: ${formatDateRange(new Date(bestTrip.start), new Date(bestTrip.end))} (${bestTrip.full_available} of ${bestTrip.travelers} free)</p>
+    `);
+}
+
+function renderBestDates(best) {
+    if (best.count < 2) {
+        bestDates.innerHTML = `
+            <p class="best-dates-label">Best Overlap Dates</p>
+            <p class="best-dates-value">Need more travelers to set dates</p>
+        `;
+        renderBestTrip();
+        return;
+    }
+    
+    if (best.start && best.end) {
         bestDates.innerHTML = `
-            <p class="best-dates-label">Best Overlap (${preferredDates.length} people)</p>
-            <p class="best-dates-value">${formatDateRange(overlapStart, overlapEnd)} (${days} days)</p>
+            <p class="best-dates-label">Best Overlap (${best.count} people)</p>
+            <p class="best-dates-value">${formatDateRange(new Date(best.start), new Date(best.end))} (${best.days} days)</p>
         `;
     } else {
         bestDates.innerHTML = `
@@ -97,18 +187,21 @@ function updateBestDates(availability) {
             <p class="best-dates-value">No overlapping dates found</p>
         `;
     }
+    renderBestTrip();
 }
 
 // ========================================
 // TIMELINE
 // ========================================
 
-async function updateTimeline() {
-    const availability = await getAvailability();
-    
-    // Generate timeline for July and August 2026
-    const startDate = new Date('2026-07-01');
-    const endDate = new Date('2026-08-31');
+// Timeline window and per-day codes (shared with the snapshot builder)
+const TIMELINE_START = TRIP_CONFIG.minDate;
+const TIMELINE_END = TRIP_CONFIG.maxDate;
+const TIMELINE_DAY_CLASSES = { p: ' preferred', a: ' available' };
+
+function getTimelineDays(start, end) {
+    const startDate = new Date(start);
+    const endDate = new Date(end);
     const days = [];
     
     let currentDate = new Date(startDate);
@@ -116,6 +209,33 @@ async function updateTimeline() {
         days.push(new Date(currentDate));
         currentDate.setDate(currentDate.getDate() + 1);
     }
+    return days;
+}
+
+// One string per user with a code per day: 'p' preferred, 'a' available, '.' neither
+function computeTimeline(availability) {
+    const days = getTimelineDays(TIMELINE_START, TIMELINE_END).map(day => day.toISOString().split('T')[0]);
+    const rows = {};
+    
+    availability.forEach(userAvail => {
+        const availStart = userAvail.available_start;
+        const availEnd = userAvail.available_end;
+        const prefStart = userAvail.preferred_start;
+        const prefEnd = userAvail.preferred_end;
+        
+        rows[userAvail.user_id] = days.map(dayStr => {
+            if (prefStart && prefEnd && dayStr >= prefStart && dayStr <= prefEnd) return 'p';
+            if (availStart && availEnd && dayStr >= availStart && dayStr <= availEnd) return 'a';
+            return '.';
+        }).join('');
+    });
+    
+    return { start: TIMELINE_START, end: TIMELINE_END, rows };
+}
+
+function renderTimeline(timeline) {
+    // Generate timeline for July and August 2026
+    const days = getTimelineDays(timeline.start, timeline.end);
     
     // Build timeline header with spacer for user column
     let headerHTML = '<div class="timeline-header">';
@@ -131,14 +251,14 @@ async function updateTimeline() {
     let rowsHTML = '';
     
     users.forEach(user => {
-        const userAvail = availability.find(a => a.user_id === user.id);
+        const codes = timeline.rows[user.id] || '';
         
         const hasAvatar = user.avatar_url && user.avatar_url.length > 0;
         const avatarStyle = hasAvatar 
             ? 'background: transparent;' 
             : `background: linear-gradient(135deg, ${user.color || '#ff5c8d'}, ${adjustColor(user.color || '#ff5c8d', -30)});`;
         const avatarContent = hasAvatar 
-            ? `<img src="${user.avatar_url}" alt="${user.name}" style="width: 100%; height: 100%; object-fit: cover; border-radius: 50%;">` 
+            ? renderUserAvatar(user)
             : (user.initials || user.name.charAt(0));
         
         rowsHTML += `
@@ -150,22 +270,8 @@ async function updateTimeline() {
                 <div class="timeline-bars">
         `;
         
-        days.forEach(day => {
-            let cellClass = 'timeline-cell';
-            
-            if (userAvail) {
-                const dayStr = day.toISOString().split('T')[0];
-                const availStart = userAvail.available_start;
-                const availEnd = userAvail.available_end;
-                const prefStart = userAvail.preferred_start;
-                const prefEnd = userAvail.preferred_end;
-                
-                if (prefStart && prefEnd && dayStr >= prefStart && dayStr <= prefEnd) {
-                    cellClass += ' preferred';
-                } else if (availStart && availEnd && dayStr >= availStart && dayStr <= availEnd) {
-                    cellClass += ' available';
-                }
-            }
+        days.forEach((day, index) => {
+            const cellClass = 'timeline-cell' + (TIMELINE_DAY_CLASSES[codes[index]] || '');
             
             rowsHTML += `<div class="${cellClass}"></div>`;
         });
@@ -183,33 +289,25 @@ async function updateTimeline() {
 // TOP DESTINATIONS
 // ========================================
 
-async function updateTopDestinations() {
-    const cities = await getCities();
-    const allCityDays = await getAllUserCityDays();
-    
-    // Aggregate days per city
-    const cityStats = {};
-    cities.forEach(city => {
-        cityStats[city.id] = {
-            ...city,
-            totalDays: 0,
-            userCount: 0
-        };
-    });
-    
-    allCityDays.forEach(ucd => {
-        if (cityStats[ucd.city_id]) {
-            cityStats[ucd.city_id].totalDays += ucd.days;
-            cityStats[ucd.city_id].userCount++;
-        }
-    });
+// cityTotals: one { city_id, total_days, user_count } row per city (getCityDayTotals)
+function computeTopDestinations(cities, cityTotals) {
+    const totalsByCity = Object.fromEntries(cityTotals.map(t => [t.city_id, t]));
+    const cityStats = cities.map(city => ({
+        id: city.id,
+        name: city.name,
+        image_url: city.image_url,
+        total_days: totalsByCity[city.id] ? totalsByCity[city.id].total_days : 0,
+        user_count: totalsByCity[city.id] ? totalsByCity[city.id].user_count : 0
+    }));
     
     // Sort by total days
-    const sortedCities = Object.values(cityStats)
-        .filter(c => c.totalDays > 0)
-        .sort((a, b) => b.totalDays - a.totalDays)
+    return cityStats
+        .filter(c => c.total_days > 0)
+        .sort((a, b) => b.total_days - a.total_days)
         .slice(0, 5);
-    
+}
+
+function renderTopDestinations(sortedCities) {
     if (sortedCities.length === 0) {
         topDestinations.innerHTML = `
             <p class="text-muted text-center">No destinations selected yet.<br>Go to Destinations to start planning!</p>
@@ -218,14 +316,14 @@ async function updateTopDestinations() {
     }
     
     topDestinations.innerHTML = sortedCities.map((city, index) => {
-        const avgDays = city.userCount > 0 ? (city.totalDays / city.userCount).toFixed(1) : 0;
+        const avgDays = city.user_count > 0 ? (city.total_days / city.user_count).toFixed(1) : 0;
         return `
             <div class="top-item">
                 <div class="top-item-rank">${index + 1}</div>
                 <img class="top-item-image" src="${city.image_url}" alt="${city.name}" onerror="this.src=DEFAULT_DESTINATION_IMAGE">
                 <div class="top-item-info">
                     <div class="top-item-name">${city.name}</div>
-                    <div class="top-item-meta">${city.userCount} people interested</div>
+                    <div class="top-item-meta">${city.user_count} people interested</div>
                 </div>
                 <div class="top-item-votes">${avgDays} days</div>
             </div>
@@ -237,38 +335,29 @@ async function updateTopDestinations() {
 // TOP ATTRACTIONS
 // ========================================
 
-async function updateTopAttractions() {
-    const attractions = await getAttractions();
-    const votes = await getVotes();
-    
-    // Aggregate votes per attraction
-    const attractionStats = {};
-    attractions.forEach(attr => {
-        attractionStats[attr.id] = {
-            ...attr,
-            score: 0,
-            upvotes: 0,
-            downvotes: 0
+// voteTotals: one { attraction_id, score, upvotes, downvotes } row per attraction (getAttractionVoteTotals)
+function computeTopAttractions(attractions, voteTotals) {
+    const totalsByAttraction = Object.fromEntries(voteTotals.map(t => [t.attraction_id, t]));
+    const attractionStats = attractions.map(attr => {
+        const totals = totalsByAttraction[attr.id] || { score: 0, upvotes: 0, downvotes: 0 };
+        return {
+            id: attr.id,
+            name: attr.name,
+            image_url: attr.image_url,
+            score: totals.score,
+            upvotes: totals.upvotes,
+            downvotes: totals.downvotes
         };
     });
     
-    votes.forEach(vote => {
-        if (attractionStats[vote.attraction_id]) {
-            attractionStats[vote.attraction_id].score += vote.vote;
-            if (vote.vote > 0) {
-                attractionStats[vote.attraction_id].upvotes++;
-            } else {
-                attractionStats[vote.attraction_id].downvotes++;
-            }
-        }
-    });
-    
     // Sort by score
-    const sortedAttractions = Object.values(attractionStats)
+    return attractionStats
         .filter(a => a.score !== 0 || a.upvotes > 0 || a.downvotes > 0)
         .sort((a, b) => b.score - a.score)
         .slice(0, 5);
-    
+}
+
+function renderTopAttractions(sortedAttractions) {
     if (sortedAttractions.length === 0) {
         topAttractions.innerHTML = `
             <p class="text-muted text-center">No votes yet.<br>Go to Activities to vote!</p>
@@ -290,34 +379,74 @@ async function updateTopAttractions() {
 }
 
 // ========================================
-// TEAM STATUS
+// SUGGESTED ROUTE
 // ========================================
 
-async function updateTeamStatus() {
-    const availability = await getAvailability();
-    const allCityDays = await getAllUserCityDays();
-    const votes = await getVotes();
+// City order and schedule from scripts/route_planner.py; the card stays empty until it is published
+async function loadSuggestedRoute() {
+    const route = await getRouteArtifact(ROUTE_ARTIFACT_VERSION);
+    renderSuggestedRoute(route);
+}
+
+function formatTravelTime(minutes) {
+    const hours = Math.floor(minutes / 60);
+    return hours ? `${hours}h ${String(minutes % 60).padStart(2, '0')}m` : `${minutes}m`;
+}
+
+function renderSuggestedRoute(route) {
+    if (!suggestedRoute) return;
+    
+    if (!route || route.stops.length === 0) {
+        suggestedRoute.innerHTML = `
+            <p class="text-muted text-center">No route planned yet.<br>Pick days in the cities you want to visit to get one!</p>
+        `;
+        return;
+    }
     
+    suggestedRoute.innerHTML = `
+        <p class="route-summary">${route.trip_length} days · ${route.start} to ${route.end} · ${formatTravelTime(route.travel_minutes)} of travel</p>
+        ${route.stops.map((stop, index) => {
+            const activities = route.days
+                .filter(day => day.day >= stop.first_day && day.day <= stop.last_day)
+                .flatMap(day => day.attractions.map(a => a.name));
+            const days = stop.days > 1 ? `Days ${stop.first_day}–${stop.last_day}` : `Day ${stop.first_day}`;
+            return `
+                <div class="top-item">
+                    <div class="top-item-rank">${index + 1}</div>
+                    <div class="top-item-info">
+                        <div class="top-item-name">${stop.city}</div>
+                        <div class="top-item-meta">${days}${activities.length ? ` · ${activities.join(', ')}` : ''}</div>
+                    </div>
+                    <div class="top-item-votes">${stop.arrive ? formatTravelTime(stop.arrive.minutes) : ''}</div>
+                </div>
+            `;
+        }).join('')}
+    `;
+}
+
+// ========================================
+// TEAM STATUS
+// ========================================
+
+function renderTeamStatus(team) {
     teamStatus.innerHTML = users.map(user => {
-        const userAvail = availability.find(a => a.user_id === user.id);
-        const userCities = allCityDays.filter(d => d.user_id === user.id);
-        const userVotes = votes.filter(v => v.user_id === user.id);
+        const progress = team[user.id];
         
         let statusText = 'Not started';
         let statusClass = '';
         
-        if (userAvail && userAvail.preferred_start) {
-            if (userCities.length > 0 && userVotes.length > 0) {
+        if (progress && progress.preferred) {
+            if (progress.cities > 0 && progress.votes > 0) {
                 statusText = 'All set! ✓';
                 statusClass = 'ready';
-            } else if (userCities.length > 0) {
+            } else if (progress.cities > 0) {
                 statusText = 'Needs to vote';
                 statusClass = '';
             } else {
                 statusText = 'Needs destinations';
                 statusClass = '';
             }
-        } else if (userAvail) {
+        } else if (progress && progress.availability) {
             statusText = 'Setting dates...';
             statusClass = '';
         }
@@ -327,7 +456,7 @@ async function updateTeamStatus() {
             ? 'background: transparent;' 
             : `background: linear-gradient(135deg, ${user.color || '#ff5c8d'}, ${adjustColor(user.color || '#ff5c8d', -30)});`;
         const avatarContent = hasAvatar 
-            ? `<img src="${user.avatar_url}" alt="${user.name}" style="width: 100%; height: 100%; object-fit: cover; border-radius: 50%;">` 
+            ? renderUserAvatar(user)
             : (user.initials || user.name.charAt(0));
         
         return `
@@ -346,14 +475,34 @@ async function updateTeamStatus() {
 // BUDGET OVERVIEW
 // ========================================
 
-async function updateBudgetOverview() {
+// Count each tier selection per budget category
+function computeBudgetTiers(allBudgets) {
+    const counts = {
+        flight: {},
+        hotels: {},
+        food: {},
+        activities: {},
+        shopping: {}
+    };
+    
+    allBudgets.forEach(budget => {
+        Object.keys(counts).forEach(category => {
+            const tier = budget[`${category}_tier`];
+            if (tier) {
+                counts[category][tier] = (counts[category][tier] || 0) + 1;
+            }
+        });
+    });
+    
+    return { responders: allBudgets.length, counts };
+}
+
+function renderBudgetOverview(budgetTiers) {
     const budgetSummary = document.getElementById('budgetTiersSummary');
     if (!budgetSummary) return;
     
-    // Get all user budgets
-    const allBudgets = await getAllUserBudgets();
     const totalUsers = users.length;
-    const usersWithBudget = allBudgets.length;
+    const usersWithBudget = budgetTiers.responders;
     
     // Tier names for display
     const tierLabels = {
@@ -383,41 +532,6 @@ async function updateBudgetOverview() {
         }
     };
     
-    // Count each tier selection
-    const counts = {
-        flight: {},
-        hotels: {},
-        food: {},
-        activities: {},
-        shopping: {}
-    };
-    
-    // Initialize counts
-    Object.keys(tierLabels).forEach(category => {
-        Object.keys(tierLabels[category]).forEach(tier => {
-            counts[category][tier] = 0;
-        });
-    });
-    
-    // Tally up selections
-    allBudgets.forEach(budget => {
-        if (budget.flight_tier && counts.flight[budget.flight_tier] !== undefined) {
-            counts.flight[budget.flight_tier]++;
-        }
-        if (budget.hotels_tier && counts.hotels[budget.hotels_tier] !== undefined) {
-            counts.hotels[budget.hotels_tier]++;
-        }
-        if (budget.food_tier && counts.food[budget.food_tier] !== undefined) {
-            counts.food[budget.food_tier]++;
-        }
-        if (budget.activities_tier && counts.activities[budget.activities_tier] !== undefined) {
-            counts.activities[budget.activities_tier]++;
-        }
-        if (budget.shopping_tier && counts.shopping[budget.shopping_tier] !== undefined) {
-            counts.shopping[budget.shopping_tier]++;
-        }
-    });
-    
     if (usersWithBudget === 0) {
         budgetSummary.innerHTML = `
             <p class="text-muted text-center">No one has set their budget yet.<br>Be the first!</p>
@@ -437,7 +551,7 @@ async function updateBudgetOverview() {
     budgetSummary.innerHTML = `
         <div class="budget-responders">${usersWithBudget} of ${totalUsers} have set budgets</div>
         ${categories.map(cat => {
-            const tierCounts = counts[cat.key];
+            const tierCounts = budgetTiers.counts[cat.key] || {};
             const tiers = Object.keys(tierLabels[cat.key]);
             
             return `
@@ -448,7 +562,7 @@ async function updateBudgetOverview() {
                     </div>
                     <div class="budget-tier-counts">
                         ${tiers.map(tier => {
-                            const count = tierCounts[tier];
+                            const count = tierCounts[tier] || 0;
                             const label = tierLabels[cat.key][tier];
                             return `
                                 <div class="tier-count-item ${count > 0 ? 'has-votes' : ''}">
@@ -162,13 +162,14 @@ async function handleDestinationClick(e) {
     const allAttractions = await getAttractions();
     const cityAttractions = allAttractions.filter(a => a.city_id === cityId);
     
-    // Get votes for attractions
-    const allVotes = await getVotes();
+    // Get vote totals for attractions (one row per attraction)
+    const voteTotals = await getAttractionVoteTotals();
+    const totalsByAttraction = Object.fromEntries(voteTotals.map(t => [t.attraction_id, t]));
     
-    showExpandedDestination(city, cityAttractions, allVotes, card);
+    showExpandedDestination(city, cityAttractions, totalsByAttraction, card);
 }
 
-function showExpandedDestination(city, attractions, votes, originalCard) {
+function showExpandedDestination(city, attractions, totalsByAttraction, originalCard) {
     // Create overlay
     const overlay = document.createElement('div');
     overlay.className = 'destination-overlay';
@@ -183,7 +184,7 @@ function showExpandedDestination(city, attractions, votes, originalCard) {
             
             <div class="expanded-header">
                 <div class="expanded-image-wrapper">
-                    <img class="expanded-image" src="${city.image_url}" alt="${city.name}"
+                    <img class="expanded-image" src="${city.image_variants?.expanded || city.image_url}" alt="${city.name}"
                          onerror="this.src=DEFAULT_DESTINATION_IMAGE">
                     <div class="expanded-image-overlay">
                         <h2 class="expanded-name">${city.name}</h2>
@@ -214,9 +215,9 @@ function showExpandedDestination(city, attractions, votes, originalCard) {
                     ${attractions.length > 0 ? `
                         <div class="expanded-attractions-grid">
                             ${attractions.map(attr => {
-                                const attrVotes = votes.filter(v => v.attraction_id === attr.id);
-                                const upvotes = attrVotes.filter(v => v.vote > 0).length;
-                                const downvotes = attrVotes.filter(v => v.vote < 0).length;
+                                const totals = totalsByAttraction[attr.id] || { upvotes: 0, downvotes: 0 };
+                                const upvotes = totals.upvotes;
+                                const downvotes = totals.downvotes;
                                 const score = upvotes - downvotes;
                                 
                                 return `
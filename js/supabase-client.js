@@ -565,6 +565,124 @@ function unsubscribe(subscription) {
     }
 }
 
+// ========================================
+// AGGREGATES
+// ========================================
+// Server-side tallies from the views in database/add_aggregate_views.sql, one row
+// per attraction / city / user. In demo mode, or before the views exist, the
+// raw rows are tallied in the browser instead.
+
+async function getAttractionVoteTotals() {
+    if (supabaseClient) {
+        const { data, error } = await supabaseClient
+            .from('attraction_vote_totals')
+            .select('attraction_id, score, upvotes, downvotes');
+        
+        if (!error) return data;
+        console.warn('attraction_vote_totals view unavailable, tallying votes locally:', error);
+    }
+    
+    const totals = {};
+    (await getVotes()).forEach(v => {
+        const t = totals[v.attraction_id] || (totals[v.attraction_id] = { attraction_id: v.attraction_id, score: 0, upvotes: 0, downvotes: 0 });
+        t.score += v.vote;
+        if (v.vote > 0) t.upvotes++; else t.downvotes++;
+    });
+    return Object.values(totals);
+}
+
+async function getCityDayTotals() {
+    if (supabaseClient) {
+        const { data, error } = await supabaseClient
+            .from('city_day_totals')
+            .select('city_id, total_days, user_count');
+        
+        if (!error) return data;
+        console.warn('city_day_totals view unavailable, tallying city days locally:', error);
+    }
+    
+    const totals = {};
+    (await getAllUserCityDays()).forEach(d => {
+        const t = totals[d.city_id] || (totals[d.city_id] = { city_id: d.city_id, total_days: 0, user_count: 0 });
+        t.total_days += d.days;
+        t.user_count++;
+    });
+    return Object.values(totals);
+}
+
+async function getUserProgress() {
+    if (supabaseClient) {
+        const { data, error } = await supabaseClient
+            .from('user_progress')
+            .select('user_id, availability, preferred, cities, votes');
+        
+        if (!error) return data;
+        console.warn('user_progress view unavailable, counting progress locally:', error);
+    }
+    
+    const [availability, cityDays, votes] = await Promise.all([getAvailability(), getAllUserCityDays(), getVotes()]);
+    const progress = {};
+    const progressFor = userId => progress[userId] || (progress[userId] = { user_id: userId, availability: false, preferred: false, cities: 0, votes: 0 });
+    
+    availability.forEach(a => {
+        const p = progressFor(a.user_id);
+        p.availability = true;
+        p.preferred = !!a.preferred_start;
+    });
+    cityDays.forEach(d => progressFor(d.user_id).cities++);
+    votes.forEach(v => progressFor(v.user_id).votes++);
+    return Object.values(progress);
+}
+
+// ========================================
+// DASHBOARD SNAPSHOT
+// ========================================
+
+// Fetch a precomputed JSON document from the public 'dashboard' bucket.
+// Returns null in demo mode, if it hasn't been published, or if its version doesn't match.
+async function getPublishedDocument(name, version) {
+    if (!supabaseClient) {
+        return null;
+    }
+    
+    try {
+        const { data } = supabaseClient.storage
+            .from('dashboard')
+            .getPublicUrl(`${name}-v${version}.json`);
+        
+        const response = await fetch(data.publicUrl);
+        if (!response.ok) {
+            return null;
+        }
+        
+        const doc = await response.json();
+        return doc.version === version ? doc : null;
+    } catch (err) {
+        console.warn(`Published ${name} unavailable:`, err);
+        return null;
+    }
+}
+
+// Dashboard snapshot (scripts/build_dashboard_snapshot.py)
+async function getDashboardSnapshot(version) {
+    return getPublishedDocument('snapshot', version);
+}
+
+// Per-day counts and best trip windows (scripts/availability_matrix.py)
+async function getAvailabilityArtifact(version) {
+    return getPublishedDocument('availability', version);
+}
+
+// City order and day-by-day schedule (scripts/route_planner.py)
+async function getRouteArtifact(version) {
+    return getPublishedDocument('route', version);
+}
+
+// Every budget plan priced for every trip length, per member and for the group (scripts/budget_scenarios.py)
+async function getBudgetArtifact(version) {
+    return getPublishedDocument('budget', version);
+}
+
 // ========================================
 // BUDGET PREFERENCES
 // ========================================
@@ -0,0 +1,261 @@
+"""
+Availability Overlap Engine for Japan Trip Planner
+==================================================
+Loads the availability table into users x days matrices over the trip
+window and answers the questions the calendar and dashboard ask:
+
+- how many people are available / prefer each day
+- for every trip length (TRIP_CONFIG.minTripLength..maxTripLength), the best
+  start date: the window the most people can attend in full, then the one
+  with the most preferred person-days
+
+Everything is computed with NumPy difference arrays and prefix sums, so the
+cost is one pass over the rows plus O(users x days) array work, instead of
+scanning every availability row for every calendar cell.
+
+The result is published as a small JSON artifact next to the dashboard
+snapshot (dashboard/availability-v1.json) for the front end to read.
+
+Usage:
+    python scripts/availability_matrix.py                    # load from Supabase, publish
+    python scripts/availability_matrix.py --dry-run          # print the results only
+    python scripts/availability_matrix.py --input rows.json  # what-if: availability rows from a file
+    python scripts/availability_matrix.py --input rows.json --output availability.json --dry-run
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import numpy as np
+    from supabase import create_client, Client
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install numpy supabase python-dotenv")
+    sys.exit(1)
+
+from build_dashboard_snapshot import publish_artifact, ARTIFACT_BUCKET
+from trip_config import TRIP_CONFIG
+
+# scripts/.env is loaded by trip_config
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+
+WINDOW_START = date.fromisoformat(TRIP_CONFIG["minDate"])
+WINDOW_END = date.fromisoformat(TRIP_CONFIG["maxDate"])
+MIN_TRIP_LENGTH = TRIP_CONFIG["minTripLength"]
+MAX_TRIP_LENGTH = TRIP_CONFIG["maxTripLength"]
+
+ARTIFACT_VERSION = 1
+ARTIFACT_KEY = f"availability-v{ARTIFACT_VERSION}.json"
+
+PAGE_SIZE = 1000
+
+
+# ========================================
+# LOADING
+# ========================================
+
+def fetch_availability(supabase: Client) -> list:
+    """Read the availability table in pages."""
+    rows = []
+    offset = 0
+    while True:
+        result = (
+            supabase.table("availability")
+            .select("user_id, available_start, available_end, preferred_start, preferred_end")
+            .order("user_id")
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def load_rows_file(path: Path) -> list:
+    """Availability rows from a JSON file (a list of rows, or {"availability": [...]})."""
+    data = json.loads(Path(path).read_text())
+    return data["availability"] if isinstance(data, dict) else data
+
+
+# ========================================
+# MATRICES
+# ========================================
+
+def day_index(value: str, start: date) -> int:
+    return (date.fromisoformat(value[:10]) - start).days
+
+
+def range_matrix(rows: list, start_field: str, end_field: str, start: date, num_days: int) -> "np.ndarray":
+    """
+    users x days 0/1 matrix of the [start_field, end_field] ranges, clipped
+    to the window. Built from a difference array: +1 at each range start,
+    -1 after each range end, then a cumulative sum along the days axis.
+    """
+    diff = np.zeros((len(rows), num_days + 1), dtype=np.int32)
+    user_idx, starts, ends = [], [], []
+    for i, row in enumerate(rows):
+        if row.get(start_field) and row.get(end_field):
+            user_idx.append(i)
+            starts.append(day_index(row[start_field], start))
+            ends.append(day_index(row[end_field], start))
+
+    if user_idx:
+        user_idx = np.array(user_idx)
+        starts = np.clip(np.array(starts), 0, num_days)
+        ends = np.clip(np.array(ends) + 1, 0, num_days)
+        valid = starts < ends
+        np.add.at(diff, (user_idx[valid], starts[valid]), 1)
+        np.add.at(diff, (user_idx[valid], ends[valid]), -1)
+
+    return np.cumsum(diff[:, :num_days], axis=1, dtype=np.int32).astype(np.uint8)
+
+
+def build_matrices(rows: list, start: date = WINDOW_START, end: date = WINDOW_END) -> tuple:
+    """Return (available, preferred) users x days matrices for the window."""
+    num_days = (end - start).days + 1
+    available = range_matrix(rows, "available_start", "available_end", start, num_days)
+    preferred = range_matrix(rows, "preferred_start", "preferred_end", start, num_days)
+    return available, preferred
+
+
+def window_sums(prefix: "np.ndarray", lengths: "np.ndarray", num_days: int) -> "np.ndarray":
+    """
+    Sums over every window for every length at once from prefix sums along the
+    last axis. Returns [..., len(lengths), num_days] with -1 where the window
+    would run past the end of the trip window.
+    """
+    starts = np.arange(num_days)
+    stops = starts[None, :] + lengths[:, None]                  # lengths x starts
+    fits = stops <= num_days
+    sums = prefix[..., np.minimum(stops, num_days)] - prefix[..., starts][..., None, :]
+    return np.where(fits, sums, -1)
+
+
+def best_trips(available: "np.ndarray", preferred: "np.ndarray", start: date = WINDOW_START,
+               min_length: int = MIN_TRIP_LENGTH, max_length: int = MAX_TRIP_LENGTH) -> list:
+    """
+    Best start date for every trip length in one vectorized pass.
+
+    Windows are ranked by how many people are available for every day of it,
+    then by preferred person-days, then by the earliest start.
+    """
+    num_users, num_days = available.shape
+    lengths = np.arange(min_length, min(max_length, num_days) + 1)
+    if lengths.size == 0:
+        return []
+
+    # Per-user prefix sums -> per-user days covered in each window
+    zeros = np.zeros((num_users, 1), dtype=np.int32)
+    user_avail_prefix = np.concatenate([zeros, np.cumsum(available, axis=1, dtype=np.int32)], axis=1)
+    user_pref_prefix = np.concatenate([zeros, np.cumsum(preferred, axis=1, dtype=np.int32)], axis=1)
+    covered = window_sums(user_avail_prefix, lengths, num_days)         # users x lengths x starts
+    covered_pref = window_sums(user_pref_prefix, lengths, num_days)
+
+    full_available = (covered == lengths[None, :, None]).sum(axis=0)    # lengths x starts
+    full_preferred = (covered_pref == lengths[None, :, None]).sum(axis=0)
+
+    # Team-level prefix sum of preferred person-days
+    pref_counts = preferred.sum(axis=0, dtype=np.int64)
+    pref_days = window_sums(np.concatenate([[0], np.cumsum(pref_counts)]), lengths, num_days)
+
+    # Rank: full attendance first, preferred person-days second; -1 marks windows that don't fit
+    fits = pref_days >= 0
+    score = np.where(fits, full_available * (num_users * num_days + 1) + pref_days, -1)
+    best_start = score.argmax(axis=1)                                   # first (earliest) max wins
+
+    results = []
+    for i, length in enumerate(lengths):
+        s = int(best_start[i])
+        results.append({
+            "length": int(length),
+            "start": (start + timedelta(days=s)).isoformat(),
+            "end": (start + timedelta(days=s + int(length) - 1)).isoformat(),
+            "full_available": int(full_available[i, s]),
+            "full_preferred": int(full_preferred[i, s]),
+            "preferred_person_days": int(pref_days[i, s]),
+        })
+    return results
+
+
+def build_artifact(rows: list, start: date = WINDOW_START, end: date = WINDOW_END) -> dict:
+    """The versioned document the front end reads."""
+    available, preferred = build_matrices(rows, start, end)
+    return {
+        "version": ARTIFACT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "window": {"start": start.isoformat(), "end": end.isoformat()},
+        "users": len(rows),
+        "days": {
+            "available": available.sum(axis=0).tolist(),
+            "preferred": preferred.sum(axis=0).tolist(),
+        },
+        "best_trips": best_trips(available, preferred, start),
+    }
+
+
+# ========================================
+# OUTPUT
+# ========================================
+
+def print_best_trips(artifact: dict):
+    print(f"  Travelers: {artifact['users']} | Window: {artifact['window']['start']} to {artifact['window']['end']}")
+    print(f"\n  {'Days':>4}  {'Start':<11} {'End':<11} {'All in':>6} {'Pref':>5} {'Pref days':>10}")
+    for trip in artifact["best_trips"]:
+        print(f"  {trip['length']:>4}  {trip['start']:<11} {trip['end']:<11} "
+              f"{trip['full_available']:>6} {trip['full_preferred']:>5} {trip['preferred_person_days']:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute availability overlaps and best trip windows")
+    parser.add_argument("--input", metavar="PATH",
+                        help="Read availability rows from a JSON file instead of Supabase (what-if scenarios)")
+    parser.add_argument("--output", metavar="PATH", help="Also write the artifact JSON to a local file")
+    parser.add_argument("--dry-run", action="store_true", help="Print the results without publishing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Availability Overlap Engine")
+    print("="*60)
+
+    supabase = None
+    if not args.input or not args.dry_run:
+        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+            print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
+            sys.exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    rows = load_rows_file(args.input) if args.input else fetch_availability(supabase)
+    artifact = build_artifact(rows)
+    body = json.dumps(artifact, separators=(",", ":")).encode("utf-8")
+    print_best_trips(artifact)
+
+    if args.output:
+        Path(args.output).write_bytes(body)
+        print(f"\n  Written to {args.output}")
+
+    if args.dry_run:
+        return
+
+    try:
+        url = publish_artifact(supabase, ARTIFACT_KEY, body)
+        print(f"\n✓ Published {ARTIFACT_BUCKET}/{ARTIFACT_KEY}")
+        print(f"  {url}")
+    except Exception as e:
+        print(f"\n✗ Could not publish artifact: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Avatar Database Access
+======================
+Shared users-table helpers for generate_avatars.py and upload_avatars.py.
+
+Both scripts resolve every user id with one SELECT up front and write all
+avatar changes with one bulk upsert at the end of the run. A single
+INSERT ... ON CONFLICT DO UPDATE statement is atomic in Postgres, so a run
+that dies partway leaves the table exactly as it was.
+"""
+
+from telemetry import tracer
+
+
+def fetch_user_ids(supabase, names: list = None) -> dict:
+    """Return {name: id} for the given user names (or every user) in one query."""
+    query = supabase.table("users").select("id, name")
+    if names:
+        query = query.in_("name", list(names))
+    with tracer.span("db_read_users") as span:
+        result = query.execute()
+        span["rows"] = len(result.data or [])
+    return {row["name"]: row["id"] for row in result.data or []}
+
+
+def avatar_row(user_id: str, user_name: str, avatar_urls: list, avatar_variants: list = None) -> dict:
+    """
+    Build one users row for bulk_save_avatars (first avatar becomes the default).
+    The sprite sheet and atlas tile were packed from the old avatars, so they
+    are cleared; the front end shows plain images until the next sync packs
+    new ones (upload_avatars.sync_sprites).
+    """
+    return {
+        "id": user_id,
+        "name": user_name,
+        "avatar_url": avatar_urls[0],
+        "avatar_options": avatar_urls,
+        "avatar_variants": avatar_variants,
+        "avatar_sprite": None,
+        "avatar_atlas": None,
+    }
+
+
+def bulk_save_avatars(supabase, rows: list) -> list:
+    """
+    Write avatar_url / avatar_options / avatar_variants (clearing the sprite
+    columns) for many users in one atomic upsert keyed on id. Rows must come
+    from avatar_row() with ids from fetch_user_ids(), so the upsert only ever
+    updates existing users.
+    Returns the names of the users that were written.
+    """
+    if not rows:
+        return []
+    with tracer.span("db_write_avatars", rows=len(rows)):
+        result = supabase.table("users").upsert(rows, on_conflict="id").execute()
+    return [row["name"] for row in result.data or []]
+
+
+def fetch_avatar_users(supabase, names: list) -> dict:
+    """Return {name: row} with the avatar and sprite columns for the given users, in one query."""
+    query = (supabase.table("users")
+             .select("id, name, avatar_url, avatar_options, avatar_sprite, avatar_atlas")
+             .in_("name", list(names)))
+    with tracer.span("db_read_users") as span:
+        result = query.execute()
+        span["rows"] = len(result.data or [])
+    return {row["name"]: row for row in result.data or []}
+
+
+def bulk_save_sprites(supabase, rows: list) -> list:
+    """
+    Write avatar_sprite / avatar_atlas for many users in one atomic upsert
+    keyed on id. Returns the names of the users that were written.
+    """
+    if not rows:
+        return []
+    with tracer.span("db_write_sprites", rows=len(rows)):
+        result = supabase.table("users").upsert(rows, on_conflict="id").execute()
+    return [row["name"] for row in result.data or []]
@@ -0,0 +1,124 @@
+"""
+Avatar Job Journal
+==================
+A small SQLite journal recording how far each (user, style) cell of the
+avatar matrix got, so an interrupted or partly failed run can be resumed
+without paying to regenerate avatars that already succeeded.
+
+States advance in order:
+    pending -> described -> generated -> uploaded -> committed
+
+- described: the user's photo description is known
+- generated: the image is saved locally under scripts/.cache/generated/
+- uploaded:  the image (and derivatives) are in storage; url/variants recorded
+- committed: the user's row in the database points at the uploaded image
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+CACHE_DIR = Path(os.getenv("AVATAR_CACHE_DIR", Path(__file__).parent / ".cache"))
+JOURNAL_PATH = CACHE_DIR / "avatar_jobs.sqlite3"
+GENERATED_DIR = CACHE_DIR / "generated"
+
+STATES = ["pending", "described", "generated", "uploaded", "committed"]
+
+
+def object_key(user_name: str, style_name: str) -> str:
+    """Deterministic storage key for a (user, style) cell, so retries overwrite instead of orphaning."""
+    return f"{user_name.lower()}_{style_name}.png"
+
+
+class JobJournal:
+    """Thread-safe SQLite journal of per-(user, style) progress."""
+
+    def __init__(self, path: Path = JOURNAL_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                user_name TEXT NOT NULL,
+                style TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                object_key TEXT,
+                url TEXT,
+                variants TEXT,
+                error TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (user_name, style)
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def reset(self):
+        """Forget all progress (a fresh, non-resumed run)."""
+        with self.lock:
+            self.conn.execute("DELETE FROM jobs")
+            self.conn.commit()
+
+    def get(self, user_name: str, style: str) -> dict:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT state, object_key, url, variants, error FROM jobs WHERE user_name = ? AND style = ?",
+                (user_name, style)
+            ).fetchone()
+        if not row:
+            return {"state": "pending", "object_key": None, "url": None, "variants": None, "error": None}
+        state, key, url, variants, error = row
+        return {
+            "state": state,
+            "object_key": key,
+            "url": url,
+            "variants": json.loads(variants) if variants else None,
+            "error": error,
+        }
+
+    def mark(self, user_name: str, style: str, state: str, url: str = None, variants: dict = None):
+        """Advance a cell to `state`, keeping any url/variants already recorded."""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO jobs (user_name, style, state, object_key, url, variants, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, ?)
+                ON CONFLICT (user_name, style) DO UPDATE SET
+                    state = excluded.state,
+                    object_key = excluded.object_key,
+                    url = COALESCE(excluded.url, jobs.url),
+                    variants = COALESCE(excluded.variants, jobs.variants),
+                    error = NULL,
+                    updated_at = excluded.updated_at
+            """, (
+                user_name, style, state, object_key(user_name, style), url,
+                json.dumps(variants) if variants is not None else None,
+                datetime.now(timezone.utc).isoformat()
+            ))
+            self.conn.commit()
+
+    def fail(self, user_name: str, style: str, error: str):
+        """Record an error without losing the state the cell had reached."""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO jobs (user_name, style, state, object_key, error, updated_at)
+                VALUES (?, ?, 'pending', ?, ?, ?)
+                ON CONFLICT (user_name, style) DO UPDATE SET error = excluded.error, updated_at = excluded.updated_at
+            """, (user_name, style, object_key(user_name, style), error, datetime.now(timezone.utc).isoformat()))
+            self.conn.commit()
+
+    def reached(self, user_name: str, style: str, state: str) -> bool:
+        """True if the cell has reached `state` or a later one."""
+        return STATES.index(self.get(user_name, style)["state"]) >= STATES.index(state)
+
+    def summary(self) -> dict:
+        """Count of cells per state."""
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
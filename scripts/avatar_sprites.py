@@ -0,0 +1,118 @@
+"""
+Avatar Sprite Sheets
+====================
+Packs avatars into single WebP sprite sheets so a page shows many avatars
+with one image request:
+
+- one sheet per user with their avatar_options in a 3x2 grid, for the
+  avatar picker (users.avatar_sprite)
+- one team-wide atlas of everyone's selected avatar_url, for the roster,
+  dashboard and nav (users.avatar_atlas)
+
+Sheets are stored under content-hashed names (sprites/<name>.<hash>.webp),
+so they can be cached for a year and a rebuilt sheet never serves stale
+tiles. Each sheet comes with the pixel offset of every tile; the front end
+turns those into CSS background-size / background-position percentages, so
+one sheet fits any box size (see database/add_avatar_sprites.sql).
+
+A sheet is rebuilt only when the fingerprint of its inputs (tile size, grid
+and the md5 of every source file) changes.
+"""
+
+import io
+import sys
+import math
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install Pillow")
+    sys.exit(1)
+
+SPRITE_PREFIX = "sprites"
+SPRITE_KEY = SPRITE_PREFIX + "/{name}.{hash}.webp"
+# About twice the CSS box: picker tiles are ~200px, roster avatars at most 70px
+USER_SPRITE_TILE = 384
+USER_SPRITE_COLUMNS = 3
+TEAM_ATLAS_TILE = 144
+SPRITE_QUALITY = 80
+# Content-hashed files never change, so they can be cached for a year
+SPRITE_CACHE_SECONDS = 31536000
+
+
+def atlas_columns(count: int) -> int:
+    """Columns for a near-square team atlas."""
+    return max(1, math.ceil(math.sqrt(count)))
+
+
+def sprite_fingerprint(md5s: list, tile: int, columns: int) -> str:
+    """Identifies a sheet's inputs; a sheet with the same fingerprint needs no rebuild."""
+    parts = [str(tile), str(columns), str(SPRITE_QUALITY), *md5s]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def pack_sprite(images: list, tile: int, columns: int) -> tuple:
+    """
+    Resize each image (bytes) to tile x tile and pack them row by row.
+    Returns (webp_bytes, sheet) where sheet is {"width", "height", "tile", "frames": [{"x", "y"}]}.
+    """
+    rows = max(1, math.ceil(len(images) / columns))
+    width, height = tile * min(columns, max(1, len(images))), tile * rows
+    sheet = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+
+    frames = []
+    for index, data in enumerate(images):
+        image = Image.open(io.BytesIO(data))
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        x, y = (index % columns) * tile, (index // columns) * tile
+        sheet.paste(image.resize((tile, tile), Image.LANCZOS), (x, y))
+        frames.append({"x": x, "y": y})
+
+    buffer = io.BytesIO()
+    sheet.save(buffer, format="WEBP", quality=SPRITE_QUALITY, method=6)
+    return buffer.getvalue(), {"width": width, "height": height, "tile": tile, "frames": frames}
+
+
+def _pack_from_paths(args: tuple) -> tuple:
+    name, paths, tile, columns = args
+    return name, pack_sprite([Path(p).read_bytes() for p in paths], tile, columns)
+
+
+def pack_sprites_parallel(jobs: dict, max_workers: int = None) -> dict:
+    """
+    Pack many sheets in a process pool.
+    jobs is {name: (local_paths, tile, columns)}; returns {name: pack_sprite result}.
+    """
+    work = [(name, [str(p) for p in paths], tile, columns) for name, (paths, tile, columns) in jobs.items()]
+    if not work:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_pack_from_paths, work))
+
+
+def sprite_key(name: str, data: bytes) -> str:
+    """Content-hashed storage object name for a sheet."""
+    return SPRITE_KEY.format(name=name, hash=hashlib.sha256(data).hexdigest()[:12])
+
+
+def upload_sprite(supabase, bucket: str, name: str, packed: tuple) -> tuple:
+    """
+    Upload one packed sheet. Returns (object_key, sheet) where sheet is the
+    metadata the front end reads: {"url", "width", "height", "tile", "frames"}.
+    """
+    data, sheet = packed
+    key = sprite_key(name, data)
+    supabase.storage.from_(bucket).upload(
+        path=key,
+        file=data,
+        file_options={
+            "content-type": "image/webp",
+            "cache-control": str(SPRITE_CACHE_SECONDS),
+            "upsert": "true",
+        }
+    )
+    return key, {"url": supabase.storage.from_(bucket).get_public_url(key), **sheet}
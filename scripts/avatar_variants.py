@@ -0,0 +1,118 @@
+"""
+Responsive Avatar Derivatives
+=============================
+Builds small WebP/AVIF versions of each 1024x1024 avatar so the avatar picker
+can use srcset instead of downloading the full PNGs.
+
+Derivatives are uploaded next to the originals under variants/, e.g.
+    julian_Julian1.png -> variants/julian_Julian1_96.webp, ..._192.avif, ...
+
+The URLs are stored per option in users.avatar_variants (see
+database/add_avatar_variants.sql), aligned with users.avatar_options.
+"""
+
+import io
+import sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install Pillow")
+    sys.exit(1)
+
+VARIANT_SIZES = [96, 192, 384]
+VARIANT_QUALITY = {"webp": 80, "avif": 55}
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+VARIANT_PREFIX = "variants"
+
+
+def _avif_supported() -> bool:
+    """AVIF needs Pillow >= 11.3 built with libavif, or the pillow-avif-plugin package."""
+    try:
+        if features.check("avif"):
+            return True
+    except ValueError:
+        pass
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF codec on import)
+        return True
+    except ImportError:
+        return False
+
+
+def variant_formats() -> list:
+    """Formats this machine can encode, in preference order for <picture> sources."""
+    return ["avif", "webp"] if _avif_supported() else ["webp"]
+
+
+def variant_key(object_key: str, size: int, fmt: str) -> str:
+    """Storage object name for one derivative of an uploaded avatar."""
+    return f"{VARIANT_PREFIX}/{Path(object_key).stem}_{size}.{fmt}"
+
+
+def build_variants(image, formats: list = None) -> dict:
+    """
+    Resize one avatar to every VARIANT_SIZES width in every format.
+    image is a path or binary file, decoded straight from disk rather than
+    read into memory first. Returns {(fmt, size): encoded_bytes}.
+    """
+    formats = formats or variant_formats()
+    source = Image.open(image)
+    source = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for size in VARIANT_SIZES:
+        resized = source.resize((size, size), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=VARIANT_QUALITY[fmt])
+            variants[(fmt, size)] = buffer.getvalue()
+    return variants
+
+
+def _build_from_path(args: tuple) -> tuple:
+    object_key, path, formats = args
+    return object_key, build_variants(path, formats)
+
+
+def build_variants_parallel(sources: dict, max_workers: int = None) -> dict:
+    """
+    Build derivatives for many files in a process pool.
+    sources is {object_key: local_path}; returns {object_key: variants}.
+    """
+    formats = variant_formats()
+    jobs = [(key, str(path), formats) for key, path in sources.items()]
+    if not jobs:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_build_from_path, jobs))
+
+
+def upload_variants(supabase, bucket: str, object_key: str, variants: dict) -> dict:
+    """
+    Upload derivatives for one avatar.
+    Returns the entry stored in users.avatar_variants: {fmt: {size: url}}.
+    """
+    entry = {}
+    for (fmt, size), data in sorted(variants.items()):
+        key = variant_key(object_key, size, fmt)
+        supabase.storage.from_(bucket).upload(
+            path=key,
+            file=data,
+            file_options={"content-type": CONTENT_TYPES[fmt], "upsert": "true"}
+        )
+        entry.setdefault(fmt, {})[str(size)] = supabase.storage.from_(bucket).get_public_url(key)
+    return entry
+
+
+def variant_urls(supabase, bucket: str, object_key: str, formats: list = None) -> dict:
+    """The {fmt: {size: url}} entry for derivatives that were uploaded earlier."""
+    entry = {}
+    for fmt in formats or variant_formats():
+        for size in VARIANT_SIZES:
+            key = variant_key(object_key, size, fmt)
+            entry.setdefault(fmt, {})[str(size)] = supabase.storage.from_(bucket).get_public_url(key)
+    return entry
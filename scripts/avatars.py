@@ -0,0 +1,397 @@
+"""
+Avatar Pipeline CLI
+===================
+One entry point for the avatar scripts:
+
+    generate   analyze source photos, generate avatars and upload them (generate_avatars.py)
+    sync       incremental sync of images/avatars into the bucket (upload_avatars.py)
+    upload     wipe the bucket and re-upload every avatar (upload_avatars.py --clear)
+    plan       list the API calls, bytes and objects a run would touch, without running it
+
+Options after a subcommand are passed on to the script, so
+`avatars.py generate --resume --concurrency 8` is `generate_avatars.py --resume --concurrency 8`.
+
+The OpenAI and Supabase SDKs are imported only by the subcommands that
+connect, and the roster and scripts/.env come from trip_config.py, so
+`plan` and `--help` start without loading either SDK.
+
+plan works from local state only: the job journal, the description cache,
+the sync manifest, file sizes and the photo index. It opens no connection.
+Objects the bucket gained since the last sync (from a generate run, or the
+dashboard) and users missing from the users table can't be seen offline, so
+the counts are what a run would do if the bucket and table still match the
+last sync. Image sizes not yet on disk and token counts are estimates.
+
+Usage:
+    python scripts/avatars.py plan                    # plan generate, sync and upload
+    python scripts/avatars.py plan generate --resume  # what a resumed generate would still do
+    python scripts/avatars.py generate --concurrency 8
+    python scripts/avatars.py sync --dry-run
+    python scripts/avatars.py upload --workers 8
+"""
+
+import sys
+import math
+import base64
+import argparse
+from pathlib import Path
+
+from trip_config import TEAM_MEMBERS
+
+script_dir = Path(__file__).parent
+AVATARS_DIR = script_dir.parent / "images" / "avatars"
+
+# Typical size of a DALL-E 3 1024x1024 PNG, for images not generated yet
+GENERATED_PNG_BYTES = 1_600_000
+# Typical vision request: prompt plus an 85-token low-detail image in, a 2-3 sentence answer out
+VISION_INPUT_TOKENS = 320
+VISION_OUTPUT_TOKENS = 100
+# An image URL returned instead of inline data (--fetch-url)
+IMAGE_URL_BYTES = 500
+
+KB = 1024
+MB = 1024 * 1024
+
+
+# ========================================
+# PLANS
+# ========================================
+
+class Plan:
+    """The API calls, bytes and storage objects one run would touch."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = {}         # endpoint -> {"calls", "bytes_out", "bytes_in", "cost_usd"}
+        self.objects = []       # (action, key, bytes or None, note)
+        self.users = {}         # user -> one-line status
+        self.notes = []
+
+    def call(self, endpoint: str, count: int = 1, bytes_out: int = 0, bytes_in: int = 0, cost_usd: float = 0.0):
+        if count <= 0:
+            return
+        entry = self.calls.setdefault(endpoint, {"calls": 0, "bytes_out": 0, "bytes_in": 0, "cost_usd": 0.0})
+        entry["calls"] += count
+        entry["bytes_out"] += bytes_out
+        entry["bytes_in"] += bytes_in
+        entry["cost_usd"] += cost_usd
+
+    def obj(self, action: str, key: str, size: int = None, note: str = ""):
+        self.objects.append((action, key, size, note))
+
+    def upload(self, key: str, size: int, note: str = ""):
+        """One avatar through UploadEngine: a streamed PUT, or TUS create + chunks when large."""
+        from upload_engine import RESUMABLE_THRESHOLD
+        from http_transfer import TUS_CHUNK_SIZE
+        if size > RESUMABLE_THRESHOLD:
+            self.call("storage TUS create", 1)
+            self.call("storage TUS PATCH", math.ceil(size / TUS_CHUNK_SIZE), bytes_out=size)
+        else:
+            self.call("storage upload", 1, bytes_out=size)
+        self.obj("+", key, size, note)
+
+    @property
+    def total_cost(self) -> float:
+        return sum(entry["cost_usd"] for entry in self.calls.values())
+
+    def print(self, show_objects: bool = True):
+        print("\n" + "="*60)
+        print(f"  Plan: {self.name}")
+        print("="*60)
+        for user, status in self.users.items():
+            print(f"  {user:<8} {status}")
+
+        print("\n  API calls:")
+        if not self.calls:
+            print("    none")
+        for endpoint, entry in self.calls.items():
+            cost = f"  ~${entry['cost_usd']:.2f}" if entry["cost_usd"] else ""
+            print(f"    {endpoint:<28} {entry['calls']:>5} x  {format_bytes(entry['bytes_out']):>9} out"
+                  f"  {format_bytes(entry['bytes_in']):>9} in{cost}")
+        print(f"    {'total':<28} {sum(e['calls'] for e in self.calls.values()):>5} x  "
+              f"{format_bytes(sum(e['bytes_out'] for e in self.calls.values())):>9} out  "
+              f"{format_bytes(sum(e['bytes_in'] for e in self.calls.values())):>9} in"
+              f"  ~${self.total_cost:.2f}")
+
+        written = sum(1 for action, *_ in self.objects if action == "+")
+        print(f"\n  Objects: {written} written, {len(self.objects) - written} deleted")
+        if show_objects:
+            for action, key, size, note in self.objects:
+                detail = ", ".join(part for part in (format_bytes(size) if size else "", note) if part)
+                print(f"    {action} {key}" + (f" ({detail})" if detail else ""))
+        for note in self.notes:
+            print(f"  ⚠ {note}")
+
+
+def format_bytes(size: int) -> str:
+    if size >= MB:
+        return f"{size / MB:.1f} MB"
+    if size >= KB:
+        return f"{size / KB:.0f} KB"
+    return f"{size} B"
+
+
+def plan_variants(plan: Plan, key: str, formats: list):
+    """The responsive derivatives uploaded for one avatar."""
+    from avatar_variants import VARIANT_SIZES, variant_key
+    plan.call("storage upload (derivative)", len(VARIANT_SIZES) * len(formats))
+    for fmt in formats:
+        for size in VARIANT_SIZES:
+            plan.obj("+", variant_key(key, size, fmt))
+
+
+def plan_generate(resume: bool = False, inline: bool = True) -> Plan:
+    """What `generate` would do, from the journal, description cache and source photos."""
+    from generate_avatars import (
+        AVATAR_STYLES, VISION_MODEL, PROMPT_VERSION, member_setting, prepare_photo_for_vision
+    )
+    from avatar_jobs import JobJournal, JOURNAL_PATH, GENERATED_DIR, object_key
+    from avatar_variants import variant_formats
+    from description_cache import DescriptionCache, photo_hash
+    from image_index import SOURCE_DIR, select_source_photos
+    from telemetry import COST_DALLE3_STANDARD_1024, COST_GPT4O_INPUT_PER_TOKEN, COST_GPT4O_OUTPUT_PER_TOKEN
+
+    plan = Plan("generate" + (" --resume" if resume else ""))
+    # A run without --resume starts a fresh journal, so every cell is redone
+    journal = JobJournal() if resume and JOURNAL_PATH.exists() else None
+    cache = DescriptionCache()
+    formats = variant_formats()
+    sources = select_source_photos(TEAM_MEMBERS, SOURCE_DIR)
+
+    plan.call("users select", 1)
+    needs_commit = False
+    for name in TEAM_MEMBERS:
+        photo = sources[name]["best"]
+        if not photo:
+            plan.users[name] = "no source photo, skipped"
+            continue
+
+        cells = {style["name"]: journal.get(name, style["name"])["state"] if journal else "pending"
+                 for style in AVATAR_STYLES}
+        needs_commit |= "uploaded" in cells.values()
+        todo = [style for style in AVATAR_STYLES if cells[style["name"]] not in ("uploaded", "committed")]
+        generated = {style["name"] for style in todo
+                     if cells[style["name"]] == "generated" and (GENERATED_DIR / object_key(name, style["name"])).exists()}
+        if not todo:
+            plan.users[name] = f"{photo.name}: up to date"
+            continue
+
+        description = "no analysis needed"
+        if len(generated) < len(todo):
+            if cache.get(DescriptionCache.key(photo_hash(str(photo)), VISION_MODEL, PROMPT_VERSION)):
+                description = "cached description"
+            else:
+                description = "photo analysis"
+                image_bytes, _ = prepare_photo_for_vision(str(photo))
+                plan.call(f"openai chat ({VISION_MODEL})", 1, bytes_out=len(base64.b64encode(image_bytes)),
+                          cost_usd=VISION_INPUT_TOKENS * COST_GPT4O_INPUT_PER_TOKEN
+                          + VISION_OUTPUT_TOKENS * COST_GPT4O_OUTPUT_PER_TOKEN)
+
+        for style in todo:
+            key = object_key(name, style["name"])
+            local = GENERATED_DIR / key
+            size = local.stat().st_size if style["name"] in generated else GENERATED_PNG_BYTES
+            if style["name"] not in generated:
+                if inline:
+                    plan.call("openai images (dall-e-3)", 1, bytes_in=math.ceil(size / 3) * 4,
+                              cost_usd=COST_DALLE3_STANDARD_1024)
+                else:
+                    plan.call("openai images (dall-e-3)", 1, bytes_in=IMAGE_URL_BYTES,
+                              cost_usd=COST_DALLE3_STANDARD_1024)
+                    plan.call("image download", 1, bytes_in=size)
+            plan.call("storage upload", 1, bytes_out=size)
+            plan.obj("+", key, size, "on disk" if style["name"] in generated else "estimated size")
+            plan_variants(plan, key, formats)
+        needs_commit = True
+        plan.users[name] = (f"{photo.name} ({member_setting(name)['setting_short']}): {description}, "
+                            f"{len(todo) - len(generated)} to generate, {len(todo)} to upload")
+
+    if needs_commit:
+        plan.call("users upsert", 1)
+    if journal:
+        journal.close()
+    plan.notes.append("Users missing from the users table are skipped by the run but counted here")
+    return plan
+
+
+def plan_sync(keep_duplicates: bool = False) -> Plan:
+    """What `sync` would do if the bucket still matches the manifest from the last sync."""
+    from upload_avatars import (
+        LIST_PAGE_SIZE, load_manifest, scan_local_avatars, drop_near_duplicates, with_derivatives,
+        plan_sync as diff_sync
+    )
+    from avatar_variants import variant_formats
+
+    plan = Plan("sync")
+    manifest = load_manifest()
+    local = scan_local_avatars(AVATARS_DIR, manifest)
+    if not keep_duplicates:
+        local = drop_near_duplicates(AVATARS_DIR, local)
+    previous = manifest.get("files", {})
+    remote = {key: entry.get("md5") for key, entry in previous.items()}
+    uploads, deletes = diff_sync(local, remote, manifest)
+    formats = variant_formats()
+
+    plan.call("storage list", len(remote) // LIST_PAGE_SIZE + 1)
+    for key in uploads:
+        plan.upload(key, local[key]["size"], "new" if key not in remote else "changed")
+    stale = [key for key in local
+             if key in uploads
+             or previous.get(key, {}).get("variants_md5") != local[key]["md5"]
+             or previous.get(key, {}).get("variant_formats") != formats]
+    for key in stale:
+        plan_variants(plan, key, formats)
+
+    changed = []
+    for name in TEAM_MEMBERS:
+        keys = {key for key, entry in local.items() if entry["user"] == name}
+        remote_keys = {key for key in remote if key.startswith(f"{name.lower()}_")}
+        if keys != remote_keys or any(key in stale for key in keys):
+            changed.append(name)
+            plan.users[name] = (f"{len(keys)} avatars: {sum(key in uploads for key in keys)} to upload, "
+                                f"{sum(key in stale for key in keys)} with new derivatives")
+        else:
+            plan.users[name] = f"{len(keys)} avatars up to date"
+    if changed:
+        plan.call("users select", 1)
+        plan.call("users upsert", 1)
+    plan_sprites(plan, changed)
+    if deletes:
+        plan.call("storage remove", 1)
+        for key in with_derivatives(deletes):
+            plan.obj("-", key, note="orphan" if key in deletes else "")
+
+    plan.notes.append("Compared against the manifest from the last sync; objects added to the bucket "
+                      "since (e.g. by generate) would also be deleted as orphans")
+    return plan
+
+
+def plan_sprites(plan: Plan, changed: list, force: bool = False):
+    """Sprite sheets rebuilt for users whose avatars changed, plus the team atlas."""
+    from avatar_sprites import SPRITE_KEY
+    plan.call("users select (sprites)", 1)
+    sheets = TEAM_MEMBERS if force else changed
+    if not sheets:
+        return
+    sheets = [name.lower() for name in sheets] + ["team"]
+    plan.call("storage upload (sprite)", len(sheets))
+    plan.call("users upsert (sprites)", 1)
+    plan.call("storage list", 1)
+    plan.call("storage remove", 1)
+    for name in sheets:
+        plan.obj("+", SPRITE_KEY.format(name=name, hash="<hash>"), note="sprite sheet")
+
+
+def plan_upload(keep_duplicates: bool = False) -> Plan:
+    """What `upload` (--clear) would do: delete everything, then upload every avatar."""
+    from upload_avatars import load_manifest, scan_local_avatars, drop_near_duplicates
+    from avatar_variants import VARIANT_SIZES, variant_formats, variant_key
+
+    plan = Plan("upload (--clear)")
+    manifest = load_manifest()
+    local = scan_local_avatars(AVATARS_DIR, manifest)
+    if not keep_duplicates:
+        local = drop_near_duplicates(AVATARS_DIR, local)
+    formats = variant_formats()
+
+    # Root listing, then the variants/ and sprites/ folders
+    plan.call("storage list", 3)
+    known = manifest.get("files", {})
+    if known:
+        plan.call("storage remove", 1)
+        for key, entry in known.items():
+            plan.obj("-", key)
+            for fmt in entry.get("variant_formats") or []:
+                for size in VARIANT_SIZES:
+                    plan.obj("-", variant_key(key, size, fmt))
+        plan.obj("-", "sprites/*", note=f"{len(manifest.get('sprites', {}))} sprite sheets")
+    for key in sorted(local):
+        plan.upload(key, local[key]["size"])
+        plan_variants(plan, key, formats)
+    for name in TEAM_MEMBERS:
+        plan.users[name] = f"{sum(entry['user'] == name for entry in local.values())} avatars to upload"
+    plan.call("users select", 1)
+    plan.call("users upsert", 1)
+    plan_sprites(plan, TEAM_MEMBERS, force=True)
+    plan.notes.append("Deletes are listed from the manifest; the run deletes whatever the bucket holds")
+    return plan
+
+
+# ========================================
+# CLI
+# ========================================
+
+def run_generate(rest: list):
+    import generate_avatars
+    generate_avatars.main(rest)
+
+
+def run_sync(rest: list):
+    import upload_avatars
+    upload_avatars.main(rest)
+
+
+def run_upload(rest: list):
+    import upload_avatars
+    upload_avatars.main(["--clear", *rest])
+
+
+COMMANDS = {
+    "generate": (run_generate, "Analyze source photos, generate avatars and upload them (generate_avatars.py)"),
+    "sync": (run_sync, "Upload new/changed avatars from images/avatars and delete orphans (upload_avatars.py)"),
+    "upload": (run_upload, "Wipe the bucket and re-upload every avatar (upload_avatars.py --clear)"),
+}
+
+PLAN_RUNS = ["generate", "sync", "upload"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate, upload and plan team avatars")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, (_, help_text) in COMMANDS.items():
+        # Options (including --help) belong to the script the command runs
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    plan = commands.add_parser("plan", help="Show the API calls, bytes and objects a run would touch, offline")
+    plan.add_argument("runs", nargs="*", metavar="RUN",
+                      help="generate, sync and/or upload (default: all three)")
+    plan.add_argument("--resume", action="store_true",
+                      help="Plan a generate --resume run (default: a fresh run that redoes every cell)")
+    plan.add_argument("--fetch-url", action="store_true",
+                      help="Plan generate --fetch-url (images downloaded from a URL instead of inline)")
+    plan.add_argument("--keep-duplicates", action="store_true",
+                      help="Plan sync/upload --keep-duplicates")
+    plan.add_argument("--summary", action="store_true",
+                      help="Only print the per-user lines and API call totals, not every object")
+    return parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, rest = parse_args(argv)
+    if args.command in COMMANDS:
+        COMMANDS[args.command][0](rest)
+        return
+    unknown = rest + [run for run in args.runs if run not in PLAN_RUNS]
+    if unknown:
+        print(f"Unknown plan arguments: {' '.join(unknown)} (runs are {', '.join(PLAN_RUNS)})")
+        sys.exit(2)
+
+    print("="*60)
+    print("  Avatar Plan (no network, nothing is changed)")
+    print("="*60)
+    print(f"  Team: {', '.join(TEAM_MEMBERS)}")
+
+    plans = []
+    runs = args.runs or PLAN_RUNS
+    if "generate" in runs:
+        plans.append(plan_generate(resume=args.resume, inline=not args.fetch_url))
+    if "sync" in runs:
+        plans.append(plan_sync(keep_duplicates=args.keep_duplicates))
+    if "upload" in runs:
+        plans.append(plan_upload(keep_duplicates=args.keep_duplicates))
+    for plan in plans:
+        plan.print(show_objects=not args.summary)
+
+
+if __name__ == "__main__":
+    main()
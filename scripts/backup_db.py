@@ -0,0 +1,403 @@
+"""
+Database Backup for Japan Trip Planner
+======================================
+Exports every planner table into a local SQLite snapshot, and restores a
+snapshot back into the database.
+
+Tables are read in keyset-paginated pages (WHERE id > last ORDER BY id
+LIMIT PAGE_SIZE) inside one read-only REPEATABLE READ transaction, so the
+snapshot is consistent across tables and memory use is bounded by the page
+size rather than the table size.
+
+After the first run, backups are incremental: only rows whose updated_at is
+past the table's last watermark are read and upserted, then the ids still in
+the table are swept (again in pages) to drop rows that were deleted. Tables
+without updated_at fall back to created_at and miss in-place edits - apply
+database/add_updated_at.sql (python scripts/migrate.py) to add it.
+
+Array columns are stored as JSON text; the source column types are kept in
+the snapshot's _backup_tables table and used to cast values back on restore.
+A restore disables the set_updated_at trigger while it inserts, so restored
+rows keep the snapshot's updated_at.
+
+Setup:
+1. pip install "psycopg[binary]" python-dotenv
+2. Add DATABASE_URL to scripts/.env (see migrate.py)
+
+Usage:
+    python scripts/backup_db.py                          # incremental backup to backups/japan2026.sqlite
+    python scripts/backup_db.py --full                   # re-export every row
+    python scripts/backup_db.py --output backups/pre-migrate.sqlite
+    python scripts/backup_db.py --restore backups/japan2026.sqlite        # show what would be restored
+    python scripts/backup_db.py --restore backups/japan2026.sqlite --yes  # replace the live tables
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime, date, timedelta, timezone
+
+try:
+    import psycopg
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print('pip install "psycopg[binary]" python-dotenv')
+    sys.exit(1)
+
+from trip_config import project_root
+
+# scripts/.env is loaded by trip_config
+DATABASE_URL = os.getenv('DATABASE_URL')
+BACKUP_PATH = project_root / "backups" / "japan2026.sqlite"
+
+# Parents before children, so a restore never violates a foreign key
+TABLES = [
+    "users",
+    "cities",
+    "attractions",
+    "availability",
+    "user_city_days",
+    "user_budgets",
+    "attraction_votes",
+]
+
+PAGE_SIZE = 1000
+
+# Set by database/add_updated_at.sql; disabled while restoring
+UPDATED_AT_TRIGGER = "set_updated_at"
+
+# Re-read rows this far behind the watermark, to catch transactions that
+# committed after a previous backup but stamped an earlier time
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+# ========================================
+# SNAPSHOT FILE
+# ========================================
+
+def open_snapshot(path: Path) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit; backup() wraps the whole export in one explicit transaction
+    snap = sqlite3.connect(str(path), isolation_level=None)
+    snap.execute("""
+        CREATE TABLE IF NOT EXISTS _backup_tables (
+            table_name TEXT PRIMARY KEY,
+            columns TEXT NOT NULL,
+            watermark_column TEXT,
+            watermark TEXT,
+            exported_at TEXT,
+            row_count INTEGER
+        )
+    """)
+    return snap
+
+
+def snapshot_state(snap: sqlite3.Connection) -> dict:
+    """{table: {"columns": [[name, type], ...], "watermark_column", "watermark", ...}}"""
+    state = {}
+    for name, columns, wm_column, watermark, exported_at, row_count in snap.execute(
+        "SELECT table_name, columns, watermark_column, watermark, exported_at, row_count FROM _backup_tables"
+    ):
+        state[name] = {
+            "columns": json.loads(columns),
+            "watermark_column": wm_column,
+            "watermark": datetime.fromisoformat(watermark) if watermark else None,
+            "exported_at": exported_at,
+            "row_count": row_count,
+        }
+    return state
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def to_sqlite(value):
+    """Plain SQLite value for a Postgres value."""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return str(value)
+
+
+def from_sqlite(value, pg_type: str):
+    """Value to send to Postgres for a snapshot value; the INSERT casts it to pg_type."""
+    if value is not None and pg_type.endswith("[]"):
+        return json.loads(value)
+    return value
+
+
+# ========================================
+# EXPORT
+# ========================================
+
+def pg_columns(pg, table: str) -> list:
+    """[[name, type], ...] of a live table, in column order."""
+    rows = pg.execute("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """, (table,)).fetchall()
+    return [list(row) for row in rows]
+
+
+def has_trigger(pg, table: str, trigger: str) -> bool:
+    return pg.execute(
+        "SELECT 1 FROM pg_trigger WHERE tgrelid = %s::regclass AND tgname = %s", (table, trigger)
+    ).fetchone() is not None
+
+
+def iter_pages(pg, table: str, columns: list, wm_column: str = None, since: datetime = None):
+    """
+    Yield the rows of a table in pages of PAGE_SIZE, by keyset pagination on id,
+    or on (wm_column, id) for the rows changed since `since`.
+    """
+    names = [c[0] for c in columns]
+    select = f"SELECT {', '.join(quote(n) for n in names)} FROM {quote(table)}"
+    id_pos = names.index("id")
+
+    if since is None:
+        last_id = None
+        while True:
+            if last_id is None:
+                page = pg.execute(f"{select} ORDER BY id LIMIT %s", (PAGE_SIZE,)).fetchall()
+            else:
+                page = pg.execute(f"{select} WHERE id > %s ORDER BY id LIMIT %s",
+                                  (last_id, PAGE_SIZE)).fetchall()
+            if page:
+                yield page
+                last_id = page[-1][id_pos]
+            if len(page) < PAGE_SIZE:
+                return
+
+    wm = quote(wm_column)
+    wm_pos = names.index(wm_column)
+    last = (since, "00000000-0000-0000-0000-000000000000")
+    while True:
+        page = pg.execute(f"{select} WHERE ({wm}, id) > (%s, %s::uuid) ORDER BY {wm}, id LIMIT %s",
+                          (*last, PAGE_SIZE)).fetchall()
+        if page:
+            yield page
+            last = (page[-1][wm_pos], page[-1][id_pos])
+        if len(page) < PAGE_SIZE:
+            return
+
+
+def create_table(snap: sqlite3.Connection, table: str, columns: list):
+    """(Re)create a table's copy in the snapshot."""
+    snap.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+    snap.execute(f"CREATE TABLE {quote(table)} ({', '.join(quote(c[0]) for c in columns)}, PRIMARY KEY (id))")
+
+
+def sweep_deleted(pg, snap: sqlite3.Connection, table: str) -> int:
+    """Drop snapshot rows whose id is no longer in the live table. Returns how many."""
+    snap.execute("CREATE TEMP TABLE IF NOT EXISTS _live_ids (id TEXT PRIMARY KEY)")
+    snap.execute("DELETE FROM _live_ids")
+    for page in iter_pages(pg, table, [["id", "uuid"]]):
+        snap.executemany("INSERT INTO _live_ids (id) VALUES (?)", [(str(row[0]),) for row in page])
+    deleted = snap.execute(
+        f"DELETE FROM {quote(table)} WHERE id NOT IN (SELECT id FROM _live_ids)"
+    ).rowcount
+    snap.execute("DELETE FROM _live_ids")
+    return deleted
+
+
+def export_table(pg, snap: sqlite3.Connection, table: str, previous: dict = None, full: bool = False) -> dict:
+    """Copy one table into the snapshot, incrementally when `previous` state allows."""
+    columns = pg_columns(pg, table)
+    names = [c[0] for c in columns]
+    wm_column = "updated_at" if "updated_at" in names else "created_at"
+
+    # A new column (or watermark column) means older snapshot rows are incomplete
+    incremental = (not full and previous is not None and previous["columns"] == columns
+                   and previous["watermark_column"] == wm_column and previous["watermark"] is not None)
+    if not incremental:
+        create_table(snap, table, columns)
+
+    since = previous["watermark"] - WATERMARK_OVERLAP if incremental else None
+    watermark = previous["watermark"] if incremental else None
+    wm_pos = names.index(wm_column)
+    insert = (f"INSERT OR REPLACE INTO {quote(table)} ({', '.join(quote(n) for n in names)}) "
+              f"VALUES ({', '.join('?' for _ in names)})")
+
+    written = 0
+    for page in iter_pages(pg, table, columns, wm_column, since):
+        snap.executemany(insert, [[to_sqlite(v) for v in row] for row in page])
+        written += len(page)
+        stamps = [row[wm_pos] for row in page if row[wm_pos] is not None]
+        if stamps and (watermark is None or max(stamps) > watermark):
+            watermark = max(stamps)
+
+    deleted = sweep_deleted(pg, snap, table) if incremental else 0
+    row_count = snap.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+
+    snap.execute("""
+        INSERT OR REPLACE INTO _backup_tables
+            (table_name, columns, watermark_column, watermark, exported_at, row_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (table, json.dumps(columns), wm_column, watermark.isoformat() if watermark else None,
+          datetime.now(timezone.utc).isoformat(), row_count))
+
+    return {"mode": "incremental" if incremental else "full", "written": written,
+            "deleted": deleted, "rows": row_count, "watermark_column": wm_column}
+
+
+def backup(pg, snap: sqlite3.Connection, full: bool = False) -> dict:
+    """Export every table. The snapshot file is only committed if all tables succeed."""
+    state = snapshot_state(snap)
+    results = {}
+    snap.execute("BEGIN")
+    try:
+        for table in TABLES:
+            results[table] = export_table(pg, snap, table, state.get(table), full)
+            r = results[table]
+            note = "" if r["watermark_column"] == "updated_at" else "  (no updated_at: edits not tracked)"
+            print(f"  ✓ {table:<18} {r['mode']:<12} {r['written']:>6} written {r['deleted']:>5} deleted "
+                  f"{r['rows']:>7} rows{note}")
+        snap.execute("COMMIT")
+    except BaseException:
+        snap.execute("ROLLBACK")
+        raise
+    return results
+
+
+# ========================================
+# RESTORE
+# ========================================
+
+def restore(pg, snap: sqlite3.Connection) -> dict:
+    """
+    Replace the live tables with the snapshot's rows, in one transaction.
+
+    The set_updated_at trigger (database/add_updated_at.sql) would stamp every
+    restored row with NOW(), so it is disabled on each table for the restore
+    and re-enabled before commit: rows keep the snapshot's updated_at, and the
+    next incremental backup doesn't re-export everything.
+    """
+    state = snapshot_state(snap)
+    tables = [t for t in TABLES if t in state]
+    counts = {}
+
+    with pg.transaction():
+        triggered = [t for t in tables if has_trigger(pg, t, UPDATED_AT_TRIGGER)]
+        for table in triggered:
+            pg.execute(f"ALTER TABLE {quote(table)} DISABLE TRIGGER {quote(UPDATED_AT_TRIGGER)}")
+
+        for table in reversed(tables):
+            pg.execute(f"DELETE FROM {quote(table)}")
+
+        for table in tables:
+            live = {name for name, _ in pg_columns(pg, table)}
+            columns = [c for c in state[table]["columns"] if c[0] in live]
+            skipped = [c[0] for c in state[table]["columns"] if c[0] not in live]
+            if skipped:
+                print(f"  ⚠ {table}: columns no longer in the database, not restored: {', '.join(skipped)}")
+
+            names = [c[0] for c in columns]
+            insert = (f"INSERT INTO {quote(table)} ({', '.join(quote(n) for n in names)}) "
+                      f"VALUES ({', '.join(f'%s::{t}' for _, t in columns)})")
+            select = f"SELECT {', '.join(quote(n) for n in names)} FROM {quote(table)}"
+            id_pos = names.index("id")
+
+            counts[table] = 0
+            last_id = ""
+            while True:
+                page = snap.execute(f"{select} WHERE id > ? ORDER BY id LIMIT ?", (last_id, PAGE_SIZE)).fetchall()
+                if page:
+                    pg.cursor().executemany(insert, [
+                        [from_sqlite(v, t) for v, (_, t) in zip(row, columns)] for row in page
+                    ])
+                    counts[table] += len(page)
+                    last_id = page[-1][id_pos]
+                if len(page) < PAGE_SIZE:
+                    break
+            print(f"  ✓ {table:<18} {counts[table]:>7} rows")
+
+        for table in triggered:
+            pg.execute(f"ALTER TABLE {quote(table)} ENABLE TRIGGER {quote(UPDATED_AT_TRIGGER)}")
+
+    return counts
+
+
+def print_snapshot(snap: sqlite3.Connection, path: Path):
+    state = snapshot_state(snap)
+    print(f"  Snapshot: {path}")
+    for table in TABLES:
+        if table in state:
+            s = state[table]
+            print(f"    {table:<18} {s['row_count']:>7} rows  (exported {s['exported_at'][:19]})")
+        else:
+            print(f"    {table:<18} not in snapshot")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Back up the planner tables to SQLite, or restore a backup")
+    parser.add_argument("--output", metavar="PATH", default=str(BACKUP_PATH),
+                        help="Snapshot file to create or update (default: backups/japan2026.sqlite)")
+    parser.add_argument("--full", action="store_true", help="Re-export every row instead of only changes")
+    parser.add_argument("--restore", metavar="PATH", help="Restore this snapshot into the database")
+    parser.add_argument("--yes", action="store_true",
+                        help="With --restore, actually replace the live tables (otherwise only show the snapshot)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Database Restore" if args.restore else "  Database Backup")
+    print("="*60)
+
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL must be set in scripts/.env")
+        sys.exit(1)
+
+    if args.restore:
+        if not Path(args.restore).exists():
+            print(f"✗ No snapshot at {args.restore}")
+            sys.exit(1)
+        snap = sqlite3.connect(args.restore)
+        try:
+            print_snapshot(snap, args.restore)
+        except sqlite3.DatabaseError as e:
+            print(f"✗ {args.restore} is not a backup snapshot: {e}")
+            sys.exit(1)
+        if not args.yes:
+            print("\n  ⚠ Restoring deletes the current rows of these tables. Re-run with --yes to restore.")
+            return
+        with psycopg.connect(DATABASE_URL, autocommit=True) as pg:
+            try:
+                restore(pg, snap)
+            except psycopg.Error as e:
+                print(f"\n✗ Restore failed and was rolled back: {e}")
+                sys.exit(1)
+        print("\n✓ Restore complete")
+        return
+
+    snap = open_snapshot(args.output)
+    with psycopg.connect(DATABASE_URL) as pg:
+        # One consistent, read-only view of every table for the whole export
+        pg.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        pg.read_only = True
+        try:
+            backup(pg, snap, full=args.full)
+        except psycopg.Error as e:
+            print(f"\n✗ Backup failed, snapshot left unchanged: {e}")
+            sys.exit(1)
+        finally:
+            pg.rollback()
+            snap.close()
+
+    print(f"\n✓ Backup written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
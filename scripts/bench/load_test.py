@@ -0,0 +1,483 @@
+"""
+Planner Load Test
+=================
+Simulates N people using the trip planner at once and measures what their
+clicks cost the database. Each simulated user replays the same requests
+js/supabase-client.js makes against a local PostgREST stand-in
+(postgrest_sqlite.py, built from database/schema.sql):
+
+- vote:    one upsert (or delete when a vote is toggled off)
+- dates:   saveAvailability's read-then-insert/update, then the calendar's
+           refetch of every availability row (updateCalendarView)
+- cities:  saveUserCityDays' upsert (or delete at 0 days)
+- budget:  saveAllBudgetTiers' read-then-insert/update
+- open:    the initial dashboard load, once per user
+
+Every user also keeps the dashboard's realtime subscriptions
+(availability, user_city_days, attraction_votes, user_budgets). Each
+changed row the stand-in publishes makes every user's tab run
+refreshDashboard() - seven full-table or view reads - so one click by one
+person costs N refreshes. Those requests are counted against the action
+that caused them.
+
+The report shows requests/sec, latency percentiles per route, the
+user-visible latency of each action, requests, rows and KB per action
+(split into the action's own requests and the realtime refetches it
+triggered), and how long the other tabs took to catch up.
+
+Usage:
+    python scripts/bench/load_test.py
+    python scripts/bench/load_test.py --users 20 --actions 40
+    python scripts/bench/load_test.py --users 12 --latency-ms 30 --json load.json
+    python scripts/bench/load_test.py --mix vote=1 --no-realtime   # write path alone
+"""
+
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+from pathlib import Path
+from datetime import date, timedelta
+from collections import defaultdict
+
+try:
+    import requests
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install requests")
+    sys.exit(1)
+
+from postgrest_sqlite import OBJECT_MEDIA_TYPE, start_postgrest_server
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from telemetry import percentile  # noqa: E402
+
+DEFAULT_USERS = 7
+DEFAULT_ACTIONS = 25
+DEFAULT_THINK_MS = 200
+DEFAULT_MIX = {"vote": 6, "dates": 1, "cities": 2, "budget": 1}
+
+# Tables js/dashboard.js subscribes to; each change runs refreshDashboard()
+DASHBOARD_SUBSCRIPTIONS = {"availability", "user_city_days", "attraction_votes", "user_budgets"}
+# refreshDashboard()'s reads, in order
+DASHBOARD_QUERIES = [
+    ("availability", {"select": "*,users(id,name,avatar_url)"}),
+    ("cities", {"select": "*", "order": "name.asc"}),
+    ("city_day_totals", {"select": "city_id,total_days,user_count"}),
+    ("attractions", {"select": "*,cities(id,name)", "order": "name.asc"}),
+    ("attraction_vote_totals", {"select": "attraction_id,score,upvotes,downvotes"}),
+    ("user_progress", {"select": "user_id,availability,preferred,cities,votes"}),
+    ("user_budgets", {"select": "*"}),
+]
+
+# The availability calendar covers July and August 2026
+TRIP_WINDOW_START = date(2026, 7, 1)
+TRIP_WINDOW_DAYS = 62
+BUDGET_TIERS = {
+    "flight_tier": ["economy", "business"],
+    "hotels_tier": ["budget", "mid", "luxury"],
+    "food_tier": ["budget", "mid", "premium"],
+    "activities_tier": ["basic", "moderate", "premium"],
+    "shopping_tier": ["minimal", "moderate", "splurge"],
+}
+
+UPSERT = "resolution=merge-duplicates,return=representation"
+REPRESENTATION = "return=representation"
+
+
+# ========================================
+# METRICS
+# ========================================
+
+class LoadMetrics:
+    """Thread-safe record of every request, action and realtime refresh."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []      # {"route", "ms", "rows", "bytes", "action", "source", "status"}
+        self.actions = {}       # action id -> {"kind", "user", "ms"}
+        self.changes = 0
+        self.refresh_lag_ms = []
+
+    def record_request(self, **request):
+        with self.lock:
+            self.requests.append(request)
+
+    def record_action(self, action: str, kind: str, user: str, ms: float):
+        with self.lock:
+            self.actions[action] = {"kind": kind, "user": user, "ms": ms}
+
+    def record_refresh(self, lag_ms: float):
+        with self.lock:
+            self.refresh_lag_ms.append(lag_ms)
+
+    def summary(self, wall_seconds: float) -> dict:
+        """Per-route and per-action-kind aggregates."""
+        routes = defaultdict(list)
+        for r in self.requests:
+            routes[r["route"]].append(r)
+
+        by_action = defaultdict(lambda: {"direct": [], "realtime": []})
+        for r in self.requests:
+            if r["action"] in self.actions:
+                by_action[r["action"]][r["source"]].append(r)
+        kinds = defaultdict(list)
+        for action, info in self.actions.items():
+            kinds[info["kind"]].append((info, by_action[action]))
+
+        def per_action(entries, source, field):
+            total = sum(len(reqs[source]) if field is None else sum(r[field] for r in reqs[source])
+                        for _, reqs in entries)
+            return total / len(entries)
+
+        errors = [r for r in self.requests if r["status"] >= 400 and r["status"] != 406]
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "total_requests": len(self.requests),
+            "requests_per_second": round(len(self.requests) / max(wall_seconds, 1e-6), 1),
+            "errors": len(errors),
+            "rows_out": sum(r["rows"] for r in self.requests),
+            "bytes_out": sum(r["bytes"] for r in self.requests),
+            "realtime_changes": self.changes,
+            "realtime_refreshes": len(self.refresh_lag_ms),
+            "refresh_lag_ms": {"p50": round(percentile(self.refresh_lag_ms, 50), 1),
+                               "p95": round(percentile(self.refresh_lag_ms, 95), 1)},
+            "routes": {
+                route: {
+                    "count": len(reqs),
+                    **{f"p{p}_ms": round(percentile([r["ms"] for r in reqs], p), 2) for p in (50, 95, 99)},
+                    "rows_per_request": round(sum(r["rows"] for r in reqs) / len(reqs), 1),
+                }
+                for route, reqs in sorted(routes.items())
+            },
+            "actions": {
+                kind: {
+                    "count": len(entries),
+                    **{f"p{p}_ms": round(percentile([info["ms"] for info, _ in entries], p), 2) for p in (50, 95)},
+                    **{f"{source}_{name}": round(per_action(entries, source, field), 1)
+                       for source in ("direct", "realtime")
+                       for name, field in (("requests", None), ("rows", "rows"), ("bytes", "bytes"))},
+                }
+                for kind, entries in sorted(kinds.items())
+            },
+        }
+
+
+# ========================================
+# SIMULATED CLIENT
+# ========================================
+
+class PlannerClient:
+    """
+    One user's browser tab. Methods mirror the js/supabase-client.js calls
+    request for request; realtime refreshes use their own connection.
+    """
+
+    def __init__(self, base_url: str, user: dict, metrics: LoadMetrics, seed: int):
+        self.rest = f"{base_url}/rest/v1"
+        self.user = user
+        self.metrics = metrics
+        self.rng = random.Random(seed)
+        self.sessions = {"direct": requests.Session(), "realtime": requests.Session()}
+        self.inbox = queue.Queue()
+        self.votes = {}         # attraction id -> 1 / -1, the tab's local votesData
+        self.city_days = {}     # city id -> days, the tab's local userCityDaysData
+
+    def request(self, method: str, table: str, action: str, params: dict = None, body=None,
+                prefer: str = None, single: bool = False, source: str = "direct"):
+        headers = {"X-Load-Action": action}
+        if prefer:
+            headers["Prefer"] = prefer
+        if single:
+            headers["Accept"] = OBJECT_MEDIA_TYPE
+        started = time.perf_counter()
+        response = self.sessions[source].request(method, f"{self.rest}/{table}", params=params,
+                                                 json=body, headers=headers)
+        ms = (time.perf_counter() - started) * 1000
+        data = response.json() if response.content else None
+        rows = len(data) if isinstance(data, list) else int(response.ok and isinstance(data, dict))
+        self.metrics.record_request(route=f"{method} {table}", ms=ms, rows=rows, bytes=len(response.content),
+                                    action=action, source=source, status=response.status_code)
+        # .single() on no rows is PGRST116, which the app treats as "not found"
+        if response.status_code == 406 and single:
+            return None
+        response.raise_for_status()
+        return data
+
+    # ---------- supabase-client.js ----------
+
+    def get_user_availability(self, action):
+        return self.request("GET", "availability", action, {"select": "*", "user_id": f"eq.{self.user['id']}"},
+                            single=True)
+
+    def get_availability(self, action):
+        return self.request("GET", "availability", action, {"select": "*,users(id,name,avatar_url)"})
+
+    def save_availability(self, data: dict, action):
+        if self.get_user_availability(action):
+            return self.request("PATCH", "availability", action,
+                                {"user_id": f"eq.{self.user['id']}", "select": "*"},
+                                {**data, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+                                prefer=REPRESENTATION, single=True)
+        return self.request("POST", "availability", action, {"select": "*"},
+                            {"user_id": self.user["id"], **data}, prefer=REPRESENTATION, single=True)
+
+    def vote(self, attraction_id: str, value: int, action):
+        if value == 0:
+            return self.request("DELETE", "attraction_votes", action,
+                                {"user_id": f"eq.{self.user['id']}", "attraction_id": f"eq.{attraction_id}"})
+        return self.request("POST", "attraction_votes", action,
+                            {"on_conflict": "user_id,attraction_id", "select": "*"},
+                            {"user_id": self.user["id"], "attraction_id": attraction_id, "vote": value},
+                            prefer=UPSERT, single=True)
+
+    def save_user_city_days(self, city_id: str, days: int, action):
+        if days == 0:
+            return self.request("DELETE", "user_city_days", action,
+                                {"user_id": f"eq.{self.user['id']}", "city_id": f"eq.{city_id}"})
+        return self.request("POST", "user_city_days", action,
+                            {"on_conflict": "user_id,city_id", "select": "*"},
+                            {"user_id": self.user["id"], "city_id": city_id, "days": days},
+                            prefer=UPSERT, single=True)
+
+    def save_all_budget_tiers(self, tiers: dict, action):
+        existing = self.request("GET", "user_budgets", action,
+                                {"select": "*", "user_id": f"eq.{self.user['id']}"}, single=True)
+        data = {"user_id": self.user["id"], **tiers,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        if existing:
+            return self.request("PATCH", "user_budgets", action, {"user_id": f"eq.{self.user['id']}", "select": "*"},
+                                data, prefer=REPRESENTATION, single=True)
+        return self.request("POST", "user_budgets", action, {"select": "*"}, [data],
+                            prefer=REPRESENTATION, single=True)
+
+    def refresh_dashboard(self, action, source="direct"):
+        for table, params in DASHBOARD_QUERIES:
+            self.request("GET", table, action, params, source=source)
+
+    # ---------- user actions (the UI handlers) ----------
+
+    def act_vote(self, catalog: dict, action):
+        """handleVote: pressing the vote you already cast removes it."""
+        attraction = self.rng.choice(catalog["attractions"])
+        pressed = self.rng.choice([1, -1])
+        value = 0 if self.votes.get(attraction) == pressed else pressed
+        self.vote(attraction, value, action)
+        if value:
+            self.votes[attraction] = value
+        else:
+            self.votes.pop(attraction, None)
+
+    def act_dates(self, catalog: dict, action):
+        """handleSaveAvailability, then updateCalendarView."""
+        start = self.rng.randrange(TRIP_WINDOW_DAYS - 21)
+        end = self.rng.randrange(start + 7, TRIP_WINDOW_DAYS)
+        length = self.rng.randrange(7, end - start + 1)
+        preferred = self.rng.randrange(start, end - length + 1)
+        day = lambda offset: (TRIP_WINDOW_START + timedelta(days=offset)).isoformat()  # noqa: E731
+        self.save_availability({"available_start": day(start), "available_end": day(end),
+                                "preferred_length_days": length,
+                                "preferred_start": day(preferred), "preferred_end": day(preferred + length)}, action)
+        self.get_availability(action)
+
+    def act_cities(self, catalog: dict, action):
+        """handleDaysChange: one click on + or -."""
+        city = self.rng.choice(catalog["cities"])
+        days = self.city_days.get(city, 0)
+        days = days + 1 if days == 0 or self.rng.random() < 0.6 else days - 1
+        self.save_user_city_days(city, days, action)
+        self.city_days[city] = days
+
+    def act_budget(self, catalog: dict, action):
+        """handleSaveBudget."""
+        self.save_all_budget_tiers({column: self.rng.choice(tiers) for column, tiers in BUDGET_TIERS.items()},
+                                   action)
+
+    # ---------- realtime ----------
+
+    def on_change(self, table: str, event: str, row: dict, action: str):
+        if table in DASHBOARD_SUBSCRIPTIONS:
+            self.inbox.put((action, time.perf_counter()))
+
+    def listen(self):
+        """Run refreshDashboard() for every change delivered to this tab, in arrival order."""
+        while True:
+            item = self.inbox.get()
+            try:
+                if item is None:
+                    return
+                action, published = item
+                self.refresh_dashboard(action, source="realtime")
+                self.metrics.record_refresh((time.perf_counter() - published) * 1000)
+            except requests.RequestException as e:
+                print(f"  ⚠ {self.user['name']}: realtime refresh failed: {e}")
+            finally:
+                self.inbox.task_done()
+
+
+# ========================================
+# RUN
+# ========================================
+
+def ensure_users(base_url: str, count: int) -> list:
+    """The schema's seeded team, plus extra travelers when simulating a bigger group."""
+    rest = f"{base_url}/rest/v1/users"
+    users = requests.get(rest, params={"select": "id,name", "order": "created_at.asc,name.asc"}).json()
+    extra = [{"name": f"Traveler {i + 1}", "initials": f"T{i + 1}"} for i in range(len(users), count)]
+    if extra:
+        response = requests.post(rest, params={"select": "id,name"}, json=extra,
+                                 headers={"Prefer": REPRESENTATION})
+        response.raise_for_status()
+        users += response.json()
+    return users[:count]
+
+
+def load_catalog(base_url: str) -> dict:
+    rest = f"{base_url}/rest/v1"
+    return {table: [row["id"] for row in requests.get(f"{rest}/{table}", params={"select": "id"}).json()]
+            for table in ("attractions", "cities")}
+
+
+def run_load(base_url: str, state, users: int, actions: int, mix: dict, think_ms: float,
+             realtime: bool = True, seed: int = 0) -> dict:
+    """Drive `users` concurrent clients through `actions` weighted actions each and summarize."""
+    metrics = LoadMetrics()
+    catalog = load_catalog(base_url)
+    clients = [PlannerClient(base_url, user, metrics, seed * 1000 + i)
+               for i, user in enumerate(ensure_users(base_url, users))]
+
+    if realtime:
+        def fan_out(table, event, row, action):
+            if table in DASHBOARD_SUBSCRIPTIONS:
+                with metrics.lock:
+                    metrics.changes += 1
+            for client in clients:
+                client.on_change(table, event, row, action)
+        state.subscribe(fan_out)
+    listeners = [threading.Thread(target=c.listen, daemon=True) for c in clients] if realtime else []
+    for thread in listeners:
+        thread.start()
+
+    kinds, weights = zip(*mix.items())
+    think = think_ms / 1000.0
+
+    def drive(index: int, client: PlannerClient):
+        name = client.user["name"]
+        time.sleep(client.rng.uniform(0, think))
+        started = time.perf_counter()
+        client.refresh_dashboard(f"{index}-open")
+        metrics.record_action(f"{index}-open", "open", name, (time.perf_counter() - started) * 1000)
+        for n in range(actions):
+            time.sleep(client.rng.expovariate(1 / think) if think else 0)
+            kind = client.rng.choices(kinds, weights)[0]
+            action = f"{index}-{n}"
+            started = time.perf_counter()
+            try:
+                getattr(client, f"act_{kind}")(catalog, action)
+            except requests.RequestException as e:
+                print(f"  ⚠ {name}: {kind} failed: {e}")
+                continue
+            metrics.record_action(action, kind, name, (time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    drivers = [threading.Thread(target=drive, args=(i, c)) for i, c in enumerate(clients)]
+    for thread in drivers:
+        thread.start()
+    for thread in drivers:
+        thread.join()
+    for client in clients if realtime else []:
+        client.inbox.join()
+    wall = time.perf_counter() - started
+
+    for client in clients if realtime else []:
+        client.inbox.put(None)
+    for thread in listeners:
+        thread.join()
+    return metrics.summary(wall)
+
+
+# ========================================
+# REPORT
+# ========================================
+
+def print_report(result: dict, config: dict):
+    print("=" * 60)
+    print("  Planner Load Test")
+    print("=" * 60)
+    print(f"  {config['users']} users x {config['actions']} actions, think {config['think_ms']:g}ms, "
+          f"latency {config['latency_ms']:g}ms, realtime {'on' if config['realtime'] else 'off'}")
+    print(f"  Wall time:  {result['wall_seconds']:.2f}s")
+    print(f"  Requests:   {result['total_requests']} ({result['requests_per_second']:.0f} req/s), "
+          f"{result['errors']} errors")
+    print(f"  Rows out:   {result['rows_out']:,} ({result['bytes_out'] / 1e6:.2f} MB)")
+    if config["realtime"]:
+        lag = result["refresh_lag_ms"]
+        print(f"  Realtime:   {result['realtime_changes']} changes -> {result['realtime_refreshes']} dashboard "
+              f"refreshes, caught up in p50 {lag['p50']:.0f} ms / p95 {lag['p95']:.0f} ms")
+
+    print(f"\n  {'Route':<32}{'n':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rows':>7}")
+    for route, r in result["routes"].items():
+        print(f"  {route:<32}{r['count']:>6}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['rows_per_request']:>7.1f}")
+
+    def pair(own, triggered):
+        return f"{own:>7.1f} + {triggered:<7.1f}"
+
+    print("\n  Per action (own requests + realtime refetches they triggered)")
+    print(f"  {'Action':<8}{'n':>5}{'p50 ms':>9}{'p95 ms':>9}  {'requests':^17}{'rows':^17}{'KB':^17}")
+    for kind, a in result["actions"].items():
+        print(f"  {kind:<8}{a['count']:>5}{a['p50_ms']:>9.1f}{a['p95_ms']:>9.1f}  "
+              f"{pair(a['direct_requests'], a['realtime_requests'])}"
+              f"{pair(a['direct_rows'], a['realtime_rows'])}"
+              f"{pair(a['direct_bytes'] / 1024, a['realtime_bytes'] / 1024)}")
+
+
+def parse_mix(text: str) -> dict:
+    """'vote=6,dates=1' -> {"vote": 6, "dates": 1}"""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown action {kind!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the planner's data-access paths against a local stand-in")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="Concurrent simulated users")
+    parser.add_argument("--actions", type=int, default=DEFAULT_ACTIONS, help="Actions per user")
+    parser.add_argument("--think-ms", type=float, default=DEFAULT_THINK_MS,
+                        help="Mean pause between a user's actions")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per request (network round trip)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Action weights, e.g. vote=6,dates=1,cities=2,budget=1")
+    parser.add_argument("--no-realtime", dest="realtime", action="store_false",
+                        help="Don't simulate the dashboard's realtime refetches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {"users": args.users, "actions": args.actions, "think_ms": args.think_ms,
+              "latency_ms": args.latency_ms, "mix": args.mix, "realtime": args.realtime, "seed": args.seed}
+    server, state, base_url = start_postgrest_server(latency_ms=args.latency_ms)
+    try:
+        result = run_load(base_url, state, args.users, args.actions, args.mix, args.think_ms,
+                          args.realtime, args.seed)
+    finally:
+        server.shutdown()
+
+    print_report(result, config)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": config, "result": result}, indent=2))
+        print(f"\n  Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+PostgREST Stand-in on SQLite
+============================
+A threaded HTTP server that answers the subset of PostgREST the front end
+(js/supabase-client.js) uses, backed by an in-memory SQLite database built
+from database/schema.sql, plus a realtime feed of row changes. It lets the
+load test (load_test.py) replay the app's request patterns with real rows,
+real filters and real aggregate views, without a Postgres instance.
+
+Supported:
+- GET    /rest/v1/<table|view>?select=*,users(id,name)&col=eq.x&order=name&limit=n
+- POST   /rest/v1/<table>   insert, or upsert with on_conflict= and
+                            Prefer: resolution=merge-duplicates
+- PATCH  /rest/v1/<table>?col=eq.x
+- DELETE /rest/v1/<table>?col=eq.x
+- Prefer: return=representation / return=minimal
+- Accept: application/vnd.pgrst.object+json (.single(); 406 PGRST116 unless one row)
+- Filters eq, neq, gt, gte, lt, lte, in, is; embeds follow REFERENCES columns
+
+Realtime: every inserted, updated or deleted row of a table in the
+supabase_realtime publication (per schema.sql) is passed to the callbacks
+registered with state.subscribe(), like postgres_changes messages. A write
+request's X-Load-Action header is handed along so the load test can
+attribute the refetches it causes.
+
+The schema is translated just enough for SQLite: UUIDs and timestamps
+become TEXT, TEXT[] and JSONB become JSON text, Postgres-only statements
+(policies, triggers, publications) are skipped. Queries run one at a time
+behind a lock, so under load the latency includes queueing for the
+database, as it would on a small project tier.
+"""
+
+import re
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent.parent / "database" / "schema.sql"
+OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+FILTER_OPS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+# ========================================
+# SCHEMA TRANSLATION
+# ========================================
+
+def _split_statements(sql: str) -> list:
+    """Statements of a SQL script with -- comments removed (dollar-quoted bodies come out as fragments)."""
+    lines = [re.sub(r"--.*$", "", line) for line in sql.splitlines()]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def translate_schema(sql: str) -> dict:
+    """
+    SQLite versions of the tables, seed rows, indexes and views in a Postgres schema.
+    Returns {"statements": [...], "json_columns": {table: {col}},
+    "references": {table: {col: ref_table}}, "realtime": {table}}.
+    """
+    statements, json_columns, references, realtime = [], {}, {}, set()
+    for statement in _split_statements(sql):
+        head = " ".join(statement.split()[:4]).upper()
+        published = re.match(r"ALTER PUBLICATION supabase_realtime ADD TABLE (\w+)", statement, re.I)
+        if published:
+            realtime.add(published.group(1))
+            continue
+        if not head.startswith(("CREATE TABLE", "INSERT INTO", "CREATE INDEX", "CREATE OR REPLACE VIEW")):
+            continue
+
+        table = re.search(r"(?:TABLE IF NOT EXISTS|INTO|VIEW)\s+(\w+)", statement, re.I)
+        if head.startswith("CREATE TABLE") and table:
+            name = table.group(1)
+            json_columns[name] = set(re.findall(r"^\s*(\w+)\s+(?:JSONB|TEXT\[\])", statement, re.I | re.M))
+            references[name] = dict(re.findall(r"^\s*(\w+)\s+UUID\s+REFERENCES\s+(\w+)\s*\(", statement, re.I | re.M))
+
+        s = statement
+        s = re.sub(r"UUID PRIMARY KEY DEFAULT uuid_generate_v4\(\)",
+                   "TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16))))", s, flags=re.I)
+        s = re.sub(r"TIMESTAMP WITH TIME ZONE DEFAULT NOW\(\)", "TEXT DEFAULT CURRENT_TIMESTAMP", s, flags=re.I)
+        s = re.sub(r"\bUUID\b", "TEXT", s)
+        s = re.sub(r"\bJSONB\b|\bTEXT\[\]", "TEXT", s, flags=re.I)
+        s = re.sub(r"ARRAY\[(.*?)\]", r"json_array(\1)", s)
+        s = re.sub(r"\s+WITH \(security_invoker = true\)", "", s, flags=re.I)
+        s = re.sub(r"::INTEGER", "", s, flags=re.I)
+        s = re.sub(r"CREATE OR REPLACE VIEW", "CREATE VIEW IF NOT EXISTS", s, flags=re.I)
+        statements.append(s)
+    return {"statements": statements, "json_columns": json_columns,
+            "references": references, "realtime": realtime}
+
+
+# ========================================
+# DATABASE
+# ========================================
+
+class RestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _split_top_level(text: str) -> list:
+    """Split a select list on commas outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += (ch == "(") - (ch == ")")
+        current += ch
+    return [p.strip() for p in parts + [current] if p.strip()]
+
+
+def _identifier(name: str) -> str:
+    if not IDENTIFIER.match(name):
+        raise RestError(400, "PGRST100", f"invalid identifier {name!r}")
+    return f'"{name}"'
+
+
+class Database:
+    """One SQLite connection, used under a lock, with PostgREST-shaped reads and writes."""
+
+    def __init__(self, schema_path: Path = SCHEMA_PATH):
+        schema = translate_schema(Path(schema_path).read_text())
+        self.json_columns = schema["json_columns"]
+        self.references = schema["references"]
+        self.realtime_tables = schema["realtime"]
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        for statement in schema["statements"]:
+            self.conn.execute(statement)
+        self.relations = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+    def _relation(self, name: str) -> str:
+        if name not in self.relations:
+            raise RestError(404, "42P01", f'relation "public.{name}" does not exist')
+        return _identifier(name)
+
+    def _row(self, table: str, row: sqlite3.Row) -> dict:
+        data = dict(row)
+        for column in self.json_columns.get(table, ()):
+            if isinstance(data.get(column), str):
+                data[column] = json.loads(data[column])
+        return data
+
+    def _where(self, query: dict) -> tuple:
+        clauses, params = [], []
+        for column, values in query.items():
+            if column in RESERVED_PARAMS:
+                continue
+            for value in values:
+                op, _, operand = value.partition(".")
+                if op == "in":
+                    items = [v.strip().strip('"') for v in operand.strip("()").split(",") if v.strip()]
+                    clauses.append(f"{_identifier(column)} IN ({', '.join('?' * len(items)) or 'NULL'})")
+                    params += items
+                elif op == "is":
+                    clauses.append(f"{_identifier(column)} IS {'NOT NULL' if operand == 'not.null' else 'NULL'}")
+                elif op in FILTER_OPS:
+                    clauses.append(f"{_identifier(column)} {FILTER_OPS[op]} ?")
+                    params.append(operand)
+                else:
+                    raise RestError(400, "PGRST100", f"unsupported operator {op!r}")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _encode(self, table: str, values: dict) -> dict:
+        return {column: json.dumps(value) if column in self.json_columns.get(table, ()) and value is not None
+                else value for column, value in values.items()}
+
+    def select(self, table: str, query: dict) -> list:
+        relation = self._relation(table)
+        columns, embeds = [], []
+        for item in _split_top_level(query.get("select", ["*"])[0]):
+            match = re.match(r"^(\w+)\s*\((.*)\)$", item, re.S)
+            if match:
+                embeds.append((match.group(1), [c.strip() for c in match.group(2).split(",")]))
+            else:
+                columns.append(item)
+        # Every column is read so embeds can follow foreign keys that aren't selected
+        wanted = None if not columns or "*" in columns else [c for c in columns if _identifier(c)]
+        where, params = self._where(query)
+        sql = f"SELECT * FROM {relation}{where}"
+        if "order" in query:
+            terms = []
+            for term in query["order"][0].split(","):
+                column, _, direction = term.partition(".")
+                terms.append(f"{_identifier(column)} {'DESC' if direction.startswith('desc') else 'ASC'}")
+            sql += " ORDER BY " + ", ".join(terms)
+        if "limit" in query:
+            sql += f" LIMIT {int(query['limit'][0])} OFFSET {int(query.get('offset', ['0'])[0])}"
+
+        with self.lock:
+            rows = [self._row(table, r) for r in self.conn.execute(sql, params)]
+            for target, fields in embeds:
+                self._embed(table, rows, target, fields)
+        if wanted is not None:
+            keep = wanted + [target for target, _ in embeds]
+            rows = [{c: row[c] for c in keep if c in row} for row in rows]
+        return rows
+
+    def _embed(self, table: str, rows: list, target: str, fields: list):
+        """Attach the many-to-one row each REFERENCES column points at, like users(id, name)."""
+        column = next((c for c, ref in self.references.get(table, {}).items() if ref == target), None)
+        if column is None:
+            raise RestError(400, "PGRST200", f"no relationship between {table!r} and {target!r}")
+        ids = sorted({r[column] for r in rows if r.get(column)})
+        wanted = "*" if "*" in fields else ", ".join(_identifier(f) for f in {"id", *fields})
+        found = {}
+        if ids:
+            sql = f"SELECT {wanted} FROM {self._relation(target)} WHERE id IN ({', '.join('?' * len(ids))})"
+            found = {r["id"]: self._row(target, r) for r in self.conn.execute(sql, ids)}
+        for row in rows:
+            embedded = found.get(row.get(column))
+            row[target] = {f: embedded[f] for f in fields if f in embedded} if embedded and "*" not in fields \
+                else embedded
+
+    def insert(self, table: str, payload: list, on_conflict: list = None, merge: bool = False) -> list:
+        relation = self._relation(table)
+        written = []
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for values in payload:
+                    values = self._encode(table, values)
+                    names = ", ".join(_identifier(c) for c in values)
+                    sql = f"INSERT INTO {relation} ({names}) VALUES ({', '.join('?' * len(values))})"
+                    if merge:
+                        target = ", ".join(_identifier(c) for c in (on_conflict or ["id"]))
+                        updates = ", ".join(f"{_identifier(c)} = excluded.{_identifier(c)}" for c in values)
+                        sql += f" ON CONFLICT ({target}) DO UPDATE SET {updates}"
+                    written += [self._row(table, r) for r in self.conn.execute(sql + " RETURNING *",
+                                                                              list(values.values()))]
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+        return written
+
+    def update(self, table: str, query: dict, values: dict) -> list:
+        relation = self._relation(table)
+        values = self._encode(table, values)
+        where, params = self._where(query)
+        updates = ", ".join(f"{_identifier(c)} = ?" for c in values)
+        with self.lock:
+            rows = self.conn.execute(f"UPDATE {relation} SET {updates}{where} RETURNING *",
+                                     list(values.values()) + params)
+            return [self._row(table, r) for r in rows]
+
+    def delete(self, table: str, query: dict) -> list:
+        relation = self._relation(table)
+        where, params = self._where(query)
+        with self.lock:
+            return [self._row(table, r) for r in self.conn.execute(f"DELETE FROM {relation}{where} RETURNING *",
+                                                                   params)]
+
+
+# ========================================
+# SERVER
+# ========================================
+
+class RestState:
+    """Database, realtime subscribers and counters for one server."""
+
+    def __init__(self, schema_path: Path = SCHEMA_PATH, latency_ms: float = 0):
+        self.db = Database(schema_path)
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.subscribers = []
+        self.requests = 0
+        self.changes = 0
+
+    def subscribe(self, callback):
+        """callback(table, event, row, action) is called for each changed row of a realtime table."""
+        self.subscribers.append(callback)
+
+    def publish(self, table: str, event: str, rows: list, action: str = None):
+        if table not in self.db.realtime_tables:
+            return
+        with self.lock:
+            self.changes += len(rows)
+        for row in rows:
+            for callback in self.subscribers:
+                callback(table, event, row, action)
+
+
+class RestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+    state: RestState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload=None, headers: dict = None):
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _respond(self, status: int, rows: list):
+        """Shape rows per the Prefer and Accept headers, like PostgREST."""
+        prefer = self.headers.get("Prefer", "")
+        if self.command != "GET" and "return=representation" not in prefer:
+            return self._send(204 if self.command != "POST" else 201)
+        if OBJECT_MEDIA_TYPE in self.headers.get("Accept", ""):
+            if len(rows) != 1:
+                return self._send(406, {"code": "PGRST116", "details": f"The result contains {len(rows)} rows",
+                                        "message": "JSON object requested, multiple (or no) rows returned"})
+            return self._send(status, rows[0])
+        self._send(status, rows)
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        if not path.startswith("/rest/v1/"):
+            return self._send(404, {"message": f"No route for {self.command} {path}"})
+        table = path[len("/rest/v1/"):].strip("/")
+        query = parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        action = self.headers.get("X-Load-Action")
+
+        with self.state.lock:
+            self.state.requests += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        db = self.state.db
+        try:
+            if self.command == "GET":
+                return self._respond(200, db.select(table, query))
+            if self.command == "POST":
+                payload = json.loads(body or b"[]")
+                payload = payload if isinstance(payload, list) else [payload]
+                on_conflict = query["on_conflict"][0].split(",") if "on_conflict" in query else None
+                merge = "resolution=merge-duplicates" in self.headers.get("Prefer", "")
+                rows = db.insert(table, payload, on_conflict, merge)
+                self.state.publish(table, "INSERT", rows, action)
+                return self._respond(201, rows)
+            if self.command == "PATCH":
+                rows = db.update(table, query, json.loads(body or b"{}"))
+                self.state.publish(table, "UPDATE", rows, action)
+                return self._respond(200, rows)
+            if self.command == "DELETE":
+                rows = db.delete(table, query)
+                self.state.publish(table, "DELETE", rows, action)
+                return self._respond(200, rows)
+        except RestError as e:
+            return self._send(e.status, {"code": e.code, "message": str(e)})
+        except sqlite3.IntegrityError as e:
+            return self._send(409, {"code": "23505", "message": str(e)})
+        except (sqlite3.Error, ValueError) as e:
+            return self._send(400, {"code": "PGRST100", "message": str(e)})
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def start_postgrest_server(schema_path: Path = SCHEMA_PATH, latency_ms: float = 0,
+                           host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stand-in on a background thread.
+    Returns (server, state, base_url); call server.shutdown() when done.
+    """
+    state = RestState(schema_path, latency_ms)
+    handler = type("BoundRestHandler", (RestHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the PostgREST stand-in in the foreground")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server, state, base_url = start_postgrest_server(latency_ms=args.latency_ms, port=args.port)
+    print(f"PostgREST stand-in listening on {base_url}/rest/v1 (Ctrl+C to stop)")
+    print(f"  Tables: {', '.join(sorted(state.db.relations))}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
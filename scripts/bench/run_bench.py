@@ -0,0 +1,177 @@
+"""
+Offline Avatar Pipeline Benchmark
+=================================
+Runs generate_avatars.py, upload_avatars.py and/or mirror_images.py against
+the local stub server (stub_servers.py) and reports wall time, requests
+issued, bytes moved and peak RSS. Nothing touches the network or costs money.
+
+The mirror scenario runs twice in the same cache directory: a cold run that
+downloads and resizes every catalog image, then a re-run that should only
+revalidate (304s from the stub's image host).
+
+Each scenario runs the real script's main() in a subprocess, with
+OPENAI_BASE_URL / SUPABASE_URL pointed at the stub and a throwaway cache
+directory, so the numbers include interpreter and SDK start-up just like a
+real run.
+
+Usage:
+    python scripts/bench/run_bench.py
+    python scripts/bench/run_bench.py --scenario generate --latency-ms 800 --concurrency 8
+    python scripts/bench/run_bench.py --scenario upload --error-rate 0.02 --json results.json
+    python scripts/bench/run_bench.py --scenario mirror --payload-kb 4000
+    python scripts/bench/run_bench.py --scenario generate -- --fetch-url   # extra script args after --
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+from stub_servers import start_stub_server
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = {
+    "generate": SCRIPTS_DIR / "generate_avatars.py",
+    "upload": SCRIPTS_DIR / "upload_avatars.py",
+    "mirror": SCRIPTS_DIR / "mirror_images.py",
+}
+# A syntactically valid (but fake) JWT; supabase-py checks the key's shape
+BENCH_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.YmVuY2g"
+
+
+def fetch_stats(base_url: str) -> dict:
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.loads(response.read())
+
+
+def diff_stats(before: dict, after: dict) -> dict:
+    """Counters accumulated between two /__stats snapshots."""
+    requests = {
+        route: count - before["requests"].get(route, 0)
+        for route, count in after["requests"].items()
+        if count - before["requests"].get(route, 0)
+    }
+    errors = {
+        route: count - before["errors"].get(route, 0)
+        for route, count in after["errors"].items()
+        if count - before["errors"].get(route, 0)
+    }
+    return {
+        "requests": requests,
+        "errors": errors,
+        "total_requests": sum(requests.values()),
+        "bytes_in": after["bytes_in"] - before["bytes_in"],
+        "bytes_out": after["bytes_out"] - before["bytes_out"],
+    }
+
+
+def run_scenario(name: str, base_url: str, cache_dir: Path, script_args: list, verbose: bool,
+                 label: str = None) -> dict:
+    """Run one script to completion against the stub and measure it."""
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "SUPABASE_URL": base_url,
+        "SUPABASE_SERVICE_KEY": BENCH_KEY,
+        "AVATAR_CACHE_DIR": str(cache_dir),
+        "AVATAR_MANIFEST_PATH": str(cache_dir / "avatar_manifest.json"),
+        "PYTHONUNBUFFERED": "1",
+    })
+
+    before = fetch_stats(base_url)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SCENARIOS[name]), *script_args],
+        cwd=str(cache_dir),     # scripts/.env is loaded too, but never overrides the variables above
+        env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.STDOUT,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+    after = fetch_stats(base_url)
+
+    result = {
+        "scenario": label or name,
+        "exit_code": process.returncode,
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),   # ru_maxrss is KB on Linux
+        "user_cpu_seconds": round(usage.ru_utime, 3),
+    }
+    result.update(diff_stats(before, after))
+    return result
+
+
+def print_report(results: list, config: dict):
+    print("=" * 60)
+    print("  Avatar Pipeline Benchmark")
+    print("=" * 60)
+    print(f"  latency={config['latency_ms']}ms error_rate={config['error_rate']} "
+          f"payload={config['payload_kb']}KB")
+    for r in results:
+        print(f"\n  {r['scenario']} (exit {r['exit_code']})")
+        print(f"    Wall time:   {r['wall_seconds']:.2f}s")
+        print(f"    Requests:    {r['total_requests']}")
+        for route, count in sorted(r["requests"].items()):
+            errors = r["errors"].get(route, 0)
+            print(f"      {route:<16} {count:>5}" + (f"  ({errors} injected errors)" if errors else ""))
+        print(f"    Bytes up:    {r['bytes_in'] / 1e6:.2f} MB")
+        print(f"    Bytes down:  {r['bytes_out'] / 1e6:.2f} MB")
+        print(f"    Peak RSS:    {r['peak_rss_mb']:.1f} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the avatar scripts against local stubs")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Added latency per stub request")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429 (OpenAI) or 503 (Supabase)")
+    parser.add_argument("--payload-kb", type=int, default=1500, help="Size of each generated image")
+    parser.add_argument("--concurrency", type=int, default=None, help="Passed through to generate_avatars.py")
+    parser.add_argument("--rpm", type=int, default=100000,
+                        help="Image API quota passed to generate_avatars.py (default: effectively unlimited)")
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' own output")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments for the script (after --)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {"latency_ms": args.latency_ms, "error_rate": args.error_rate, "payload_kb": args.payload_kb}
+    server, _, base_url = start_stub_server(**config)
+
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="avatar-bench-") as tmp:
+            for name in scenarios:
+                script_args = list(args.script_args)
+                if name == "generate":
+                    script_args += ["--rpm", str(args.rpm)]
+                    if args.concurrency:
+                        script_args += ["--concurrency", str(args.concurrency)]
+                cache_dir = Path(tmp) / name
+                cache_dir.mkdir()
+                results.append(run_scenario(name, base_url, cache_dir, script_args, args.verbose))
+                if name == "mirror":
+                    results.append(run_scenario(name, base_url, cache_dir, script_args, args.verbose,
+                                                label="mirror (re-run)"))
+    finally:
+        server.shutdown()
+
+    print_report(results, config)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": config, "results": results}, indent=2))
+        print(f"\n  Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+"""
+Local Service Stand-ins for Benchmarks
+======================================
+One threaded HTTP server that mimics just enough of the OpenAI API and
+Supabase (Storage + PostgREST) for the avatar scripts to run end-to-end
+with no network access and no cost.
+
+Endpoints:
+- POST /v1/chat/completions                 -> canned photo description
+- POST /v1/images/generations               -> PNG payload (b64_json or url)
+- GET  /files/<id>.png                      -> image for url-mode generations
+- POST/PUT /storage/v1/object/<bucket>/<key> -> store object (multipart or raw, chunked ok)
+- POST /storage/v1/object/list/<bucket>     -> paginated listing with eTags
+- POST/HEAD/PATCH /storage/v1/upload/resumable -> TUS resumable uploads (create, offset, chunk)
+- DELETE /storage/v1/object/<bucket>        -> remove {"prefixes": [...]}
+- GET/POST/PATCH /rest/v1/users             -> minimal PostgREST for users
+- GET/POST /rest/v1/cities, /rest/v1/attractions -> the same, for catalog image columns
+- GET  /origin/<name>                       -> third-party image host with ETag /
+                                               Last-Modified revalidation (404 for missing-*)
+- GET  /__stats                             -> request/byte counters as JSON
+
+Latency, error rate and image payload size are configurable per server.
+"""
+
+import json
+import base64
+import time
+import uuid
+import zlib
+import random
+import struct
+import hashlib
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+TEAM = ["Julian", "Dave", "Jason", "Frank", "Cathy", "Matylda", "Patryk"]
+
+# Catalog rows whose image_url points at the stub's /origin/ host. Shared
+# names exercise de-duplication; missing-* exercises a broken source.
+CATALOG_IMAGES = {
+    "cities": {"Tokyo": "tokyo.jpg", "Kyoto": "kyoto.jpg", "Osaka": "osaka.jpg", "Nara": "nara.jpg"},
+    "attractions": {"Shibuya Crossing": "shibuya.jpg", "Senso-ji Temple": "sensoji.jpg",
+                    "Fushimi Inari Shrine": "fushimi.jpg", "Dotonbori": "osaka.jpg",
+                    "Nara Deer Park": "missing-deer.jpg"},
+}
+ORIGIN_LAST_MODIFIED = "Wed, 01 Jul 2026 00:00:00 GMT"
+
+DESCRIPTION = ("Short dark wavy hair, oval face shape, warm cheerful expression, "
+               "perfect for a Ghibli-style character.")
+
+
+def make_png(payload_kb: int) -> bytes:
+    """A valid RGB PNG of roughly payload_kb kilobytes (noise doesn't compress)."""
+    side = max(16, int(((payload_kb * 1024) / 3) ** 0.5))
+    rng = random.Random(payload_kb)
+    raw = b"".join(b"\x00" + rng.randbytes(side * 3) for _ in range(side))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+class StubState:
+    """Shared state and counters for one stub server."""
+
+    def __init__(self, latency_ms: float = 0, error_rate: float = 0.0, payload_kb: int = 1500, seed: int = 0):
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.image = make_png(payload_kb)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.objects = {}       # (bucket, key) -> bytes
+        self.files = {}         # id -> bytes, for url-mode generations
+        self.users = {name: {"id": str(uuid.uuid4()), "name": name, "avatar_url": None,
+                             "avatar_options": None, "avatar_variants": None,
+                             "avatar_sprite": None, "avatar_atlas": None} for name in TEAM}
+        self.catalog = {table: {} for table in CATALOG_IMAGES}     # table -> {id: row}
+        self.origin = {}        # name -> bytes served under /origin/
+        self.tus = {}           # upload id -> {"bucket", "key", "length", "data"}
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "total_requests": sum(self.requests.values()),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "objects": len(self.objects),
+            }
+
+    def seed_catalog(self, base_url: str, payload_kb: int):
+        """Create the catalog rows and their origin images (needs the server's URL)."""
+        for i, name in enumerate(sorted({n for images in CATALOG_IMAGES.values() for n in images.values()})):
+            if not name.startswith("missing-"):
+                self.origin[name] = make_png(payload_kb + i)
+        for table, images in CATALOG_IMAGES.items():
+            for name, image in images.items():
+                row_id = str(uuid.uuid4())
+                self.catalog[table][row_id] = {"id": row_id, "name": name,
+                                               "image_url": f"{base_url}/origin/{image}",
+                                               "image_source_url": None, "image_variants": None}
+
+
+def _route(method: str, path: str) -> str:
+    """Collapse a request path into a stats bucket name."""
+    if path.startswith("/v1/chat"):
+        return "openai.chat"
+    if path.startswith("/v1/images"):
+        return "openai.images"
+    if path.startswith("/files/"):
+        return "openai.files"
+    if path.startswith("/origin/"):
+        return "origin.get"
+    if path.startswith("/storage/v1/object/list"):
+        return "storage.list"
+    if path.startswith("/storage/v1/upload/resumable"):
+        return f"storage.tus_{method.lower()}"
+    if path.startswith("/storage/v1/object"):
+        return f"storage.{method.lower()}"
+    if path.startswith("/rest/v1/"):
+        return f"rest.{method.lower()}"
+    return "other"
+
+
+def _parse_filters(query: dict) -> list:
+    """PostgREST-style filters like name=eq.Julian or name=in.(A,B)."""
+    filters = []
+    for column, values in query.items():
+        if column in ("select", "on_conflict", "order", "limit", "offset", "columns"):
+            continue
+        for value in values:
+            op, _, operand = value.partition(".")
+            if op == "in":
+                filters.append((column, set(operand.strip("()").split(","))))
+            elif op == "eq":
+                filters.append((column, {operand}))
+    return filters
+
+
+def _multipart_payload(body: bytes, content_type: str) -> bytes:
+    """Extract the first part's bytes from a multipart/form-data body."""
+    boundary = content_type.split("boundary=")[-1].strip('"').encode()
+    start = body.find(b"\r\n\r\n") + 4
+    end = body.rfind(b"\r\n--" + boundary)
+    return body[start:end] if start > 3 and end > start else body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    # ---------- plumbing ----------
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b"".join(parts)
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.state.lock:
+            self.state.bytes_in += len(body)
+        return body
+
+    def _send(self, status: int, payload=None, content_type: str = "application/json", headers: dict = None):
+        if isinstance(payload, (dict, list)):
+            data = json.dumps(payload).encode()
+        else:
+            data = payload or b""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+        with self.state.lock:
+            self.state.bytes_out += len(data)
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        route = _route(method, path)
+        body = self._read_body() if method in ("POST", "PUT", "PATCH", "DELETE") else b""
+
+        if path == "/__stats":
+            return self._send(200, self.state.stats())
+
+        with self.state.lock:
+            self.state.requests[route] += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.should_fail():
+            with self.state.lock:
+                self.state.errors[route] += 1
+            if route.startswith("openai"):
+                return self._send(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests"}},
+                                  headers={"Retry-After": "0"})
+            return self._send(503, {"message": "Service unavailable (stub)"})
+
+        handler = getattr(self, "_" + route.replace(".", "_"), None)
+        if handler is None:
+            return self._send(404, {"message": f"No stub for {method} {path}"})
+        return handler(path, parse_qs(url.query), body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def do_HEAD(self):
+        self._handle("HEAD")
+
+    # ---------- OpenAI ----------
+
+    def _openai_chat(self, path, query, body):
+        request = json.loads(body or b"{}")
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": DESCRIPTION}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140},
+        })
+
+    def _openai_images(self, path, query, body):
+        request = json.loads(body or b"{}")
+        if request.get("response_format") == "b64_json":
+            item = {"b64_json": base64.b64encode(self.state.image).decode()}
+        else:
+            file_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.files[file_id] = self.state.image
+            host, port = self.server.server_address[:2]
+            item = {"url": f"http://{host}:{port}/files/{file_id}.png"}
+        self._send(200, {"created": int(time.time()), "data": [item]})
+
+    def _openai_files(self, path, query, body):
+        file_id = path.rsplit("/", 1)[-1].split(".")[0]
+        with self.state.lock:
+            data = self.state.files.pop(file_id, None)
+        if data is None:
+            return self._send(404, {"message": "expired"})
+        self._send(200, data, content_type="image/png")
+
+    # ---------- Storage ----------
+
+    def _store(self, path, body):
+        bucket, _, key = path[len("/storage/v1/object/"):].partition("/")
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            body = _multipart_payload(body, content_type)
+        with self.state.lock:
+            self.state.objects[(bucket, key)] = body
+        self._send(200, {"Key": f"{bucket}/{key}", "Id": str(uuid.uuid4())})
+
+    def _storage_post(self, path, query, body):
+        self._store(path, body)
+
+    def _storage_put(self, path, query, body):
+        self._store(path, body)
+
+    def _storage_get(self, path, query, body):
+        rest = path[len("/storage/v1/object/"):]
+        if rest.startswith("public/"):
+            rest = rest[len("public/"):]
+        bucket, _, key = rest.partition("/")
+        with self.state.lock:
+            data = self.state.objects.get((bucket, key))
+        if data is None:
+            return self._send(404, {"message": "Object not found"})
+        self._send(200, data, content_type="application/octet-stream")
+
+    def _storage_delete(self, path, query, body):
+        bucket = path[len("/storage/v1/object/"):].strip("/")
+        prefixes = json.loads(body or b"{}").get("prefixes", [])
+        removed = []
+        with self.state.lock:
+            for key in prefixes:
+                if self.state.objects.pop((bucket, key), None) is not None:
+                    removed.append({"name": key})
+        self._send(200, removed)
+
+    def _storage_list(self, path, query, body):
+        bucket = path[len("/storage/v1/object/list/"):].strip("/")
+        request = json.loads(body or b"{}")
+        prefix = (request.get("prefix") or "").strip("/")
+        limit = int(request.get("limit", 100))
+        offset = int(request.get("offset", 0))
+
+        entries, folders = [], set()
+        with self.state.lock:
+            for (b, key), data in self.state.objects.items():
+                if b != bucket:
+                    continue
+                if prefix:
+                    if not key.startswith(prefix + "/"):
+                        continue
+                    name = key[len(prefix) + 1:]
+                else:
+                    name = key
+                if "/" in name:
+                    folders.add(name.split("/", 1)[0])
+                    continue
+                entries.append({
+                    "name": name,
+                    "id": hashlib.sha1(key.encode()).hexdigest(),
+                    "metadata": {"eTag": f'"{hashlib.md5(data).hexdigest()}"', "size": len(data)},
+                })
+        entries += [{"name": folder, "id": None, "metadata": None} for folder in folders]
+        entries.sort(key=lambda e: e["name"])
+        self._send(200, entries[offset:offset + limit])
+
+    # ---------- Storage: resumable (TUS) uploads ----------
+
+    def _storage_tus_post(self, path, query, body):
+        metadata = {}
+        for item in self.headers.get("Upload-Metadata", "").split(","):
+            name, _, value = item.strip().partition(" ")
+            metadata[name] = base64.b64decode(value).decode() if value else ""
+        upload_id = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.tus[upload_id] = {"bucket": metadata.get("bucketName"), "key": metadata.get("objectName"),
+                                         "length": int(self.headers.get("Upload-Length", 0)), "data": bytearray()}
+        self._send(201, headers={"Location": f"/storage/v1/upload/resumable/{upload_id}", "Tus-Resumable": "1.0.0"})
+
+    def _tus_upload(self, path):
+        return self.state.tus.get(path.rstrip("/").rsplit("/", 1)[-1])
+
+    def _storage_tus_head(self, path, query, body):
+        with self.state.lock:
+            upload = self._tus_upload(path)
+        if upload is None:
+            return self._send(404)
+        self._send(200, headers={"Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"]),
+                                 "Tus-Resumable": "1.0.0"})
+
+    def _storage_tus_patch(self, path, query, body):
+        with self.state.lock:
+            upload = self._tus_upload(path)
+            if upload is None:
+                return self._send(404, {"message": "Upload not found"})
+            if int(self.headers.get("Upload-Offset", -1)) != len(upload["data"]):
+                return self._send(409, {"message": "Upload-Offset mismatch"})
+            upload["data"] += body
+            offset = len(upload["data"])
+            if offset >= upload["length"]:
+                self.state.objects[(upload["bucket"], upload["key"])] = bytes(upload["data"])
+        self._send(204, headers={"Upload-Offset": str(offset), "Tus-Resumable": "1.0.0"})
+
+    # ---------- Third-party image host ----------
+
+    def _origin_get(self, path, query, body):
+        name = path[len("/origin/"):]
+        data = self.state.origin.get(name)
+        if data is None:
+            return self._send(404, b"Not Found", content_type="text/plain")
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        headers = {"ETag": etag, "Last-Modified": ORIGIN_LAST_MODIFIED}
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers=headers)
+        self._send(200, data, content_type="image/png", headers=headers)
+
+    # ---------- PostgREST (users, cities, attractions) ----------
+
+    def _table(self, path):
+        return path[len("/rest/v1/"):].strip("/")
+
+    def _matching_rows(self, table, query):
+        filters = _parse_filters(query)
+        rows = self.state.users.values() if table == "users" else self.state.catalog.get(table, {}).values()
+        return [r for r in rows if all(str(r.get(column)) in allowed for column, allowed in filters)]
+
+    def _rest_get(self, path, query, body):
+        with self.state.lock:
+            rows = self._matching_rows(self._table(path), query)
+        self._send(200, rows)
+
+    def _rest_patch(self, path, query, body):
+        changes = json.loads(body or b"{}")
+        with self.state.lock:
+            rows = self._matching_rows(self._table(path), query)
+            for row in rows:
+                row.update(changes)
+        self._send(200, rows)
+
+    def _rest_post(self, path, query, body):
+        payload = json.loads(body or b"[]")
+        payload = payload if isinstance(payload, list) else [payload]
+        table = self._table(path)
+        if table != "users":
+            return self._upsert_catalog(table, payload)
+        written = []
+        with self.state.lock:
+            by_id = {u["id"]: u for u in self.state.users.values()}
+            for row in payload:
+                existing = by_id.get(row.get("id")) or self.state.users.get(row.get("name"))
+                if existing:
+                    existing.update(row)
+                    written.append(existing)
+                else:
+                    self.state.users[row["name"]] = dict(row)
+                    written.append(row)
+        self._send(201, written)
+
+    def _upsert_catalog(self, table, payload):
+        written = []
+        with self.state.lock:
+            rows = self.state.catalog.setdefault(table, {})
+            for row in payload:
+                row_id = row.get("id") or str(uuid.uuid4())
+                rows.setdefault(row_id, {"id": row_id}).update(row)
+                written.append(rows[row_id])
+        self._send(201, written)
+
+
+def start_stub_server(latency_ms: float = 0, error_rate: float = 0.0, payload_kb: int = 1500,
+                      host: str = "127.0.0.1", port: int = 0):
+    """
+    Start a stub server on a background thread.
+    Returns (server, state, base_url); call server.shutdown() when done.
+    """
+    state = StubState(latency_ms=latency_ms, error_rate=error_rate, payload_kb=payload_kb)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    state.seed_catalog(base_url, payload_kb)
+    return server, state, base_url
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the OpenAI/Supabase stub server in the foreground")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=int, default=1500)
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub_server(args.latency_ms, args.error_rate, args.payload_kb, port=args.port)
+    print(f"Stub server listening on {base_url} (Ctrl+C to stop)")
+    print(f"  OPENAI_BASE_URL={base_url}/v1")
+    print(f"  SUPABASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,443 @@
+"""
+Group Budget Scenario Engine for Japan Trip Planner
+===================================================
+Prices every budget plan for every trip length in one batched NumPy pass:
+
+- a plan is one tier per category of BUDGET_PRICING (read from js/budget.js
+  through trip_config.js_constant, so it can't drift from the budget page);
+  every combination is evaluated, 2 x 3 x 3 x 3 x 3 = 162 of them today
+- trip lengths are TRIP_CONFIG.minTripLength..maxTripLength (7-21 days)
+- costs scale like calculateBudgetForTiers() in js/budget.js: flight and
+  shopping once, hotels per night (days - 1), food and activities per day
+
+All plan totals come from one (plans x categories) @ (categories x lengths)
+product. Members' saved user_budgets rows then index that table, so per-user
+and group totals, percentile spreads and "best plan within N" lookups for a
+whole group, many budgets and every currency are array operations, not
+loops over people.
+
+"Best plan within N" is the plan costing at most N that is the fewest tier
+steps away from someone's current choices, keeping as much of the budget as
+possible among equally close ones (with no current choice, the
+most expensive plan that fits).
+
+The result is published as a JSON artifact next to the dashboard snapshot
+(dashboard/budget-v1.json). The budget page's Group Budget card reads it
+and answers its what-if sliders from the precomputed table.
+
+Usage:
+    python scripts/budget_scenarios.py                          # load from Supabase, publish
+    python scripts/budget_scenarios.py --dry-run --within 3000  # best plan per member within $3,000
+    python scripts/budget_scenarios.py --dry-run --currency JPY --within 450000
+    python scripts/budget_scenarios.py --input budgets.json --simulate 500 --dry-run --benchmark
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+    from supabase import create_client, Client
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install numpy supabase python-dotenv")
+    sys.exit(1)
+
+from build_dashboard_snapshot import fetch_table, publish_artifact, ARTIFACT_BUCKET
+from trip_config import TRIP_CONFIG, project_root, js_constant
+
+# scripts/.env is loaded by trip_config
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+
+BUDGET_PRICING = js_constant(project_root / "js" / "budget.js", "BUDGET_PRICING")
+TRIP_LENGTHS = list(range(TRIP_CONFIG["minTripLength"], TRIP_CONFIG["maxTripLength"] + 1))
+DEFAULT_TRIP_LENGTH = TRIP_CONFIG["defaultTripLength"]
+
+# How each category scales with the trip length (calculateBudgetForTiers in js/budget.js)
+CATEGORY_UNITS = {
+    "flight": "trip",
+    "hotels": "night",
+    "food": "day",
+    "activities": "day",
+    "shopping": "trip",
+}
+
+# Prices are in USD; units of each currency per dollar (approximate, override with --rate)
+BASE_CURRENCY = "USD"
+CURRENCY_RATES = {
+    "USD": 1.0,
+    "JPY": 150.0,
+    "EUR": 0.86,
+    "GBP": 0.75,
+    "PLN": 3.65,
+    "CAD": 1.40,
+}
+
+PERCENTILES = [10, 50, 90]
+
+ARTIFACT_VERSION = 1
+ARTIFACT_KEY = f"budget-v{ARTIFACT_VERSION}.json"
+
+
+# ========================================
+# LOADING
+# ========================================
+
+def fetch_budget_data(supabase: Client) -> dict:
+    """Read only the columns the engine needs."""
+    return {
+        "users": fetch_table(supabase, "users", "id, name", order="name"),
+        "user_budgets": fetch_table(
+            supabase, "user_budgets",
+            "id, user_id, flight_tier, hotels_tier, food_tier, activities_tier, shopping_tier"
+        ),
+        "availability": fetch_table(supabase, "availability", "id, user_id, preferred_length_days"),
+    }
+
+
+def load_budget_file(path: Path) -> dict:
+    """Engine input from a JSON file with the same keys as fetch_budget_data()."""
+    return json.loads(Path(path).read_text())
+
+
+def group_members(data: dict) -> list:
+    """
+    One entry per user: {"name", "saved", "tiers": {category: tier}, "days"}.
+    Users without a user_budgets row get each category's first tier, like
+    the budget page before they save; trip length is their preferred length.
+    """
+    budgets = {row["user_id"]: row for row in data.get("user_budgets", [])}
+    lengths = {row["user_id"]: row.get("preferred_length_days") for row in data.get("availability", [])}
+    members = []
+    for user in data.get("users", []):
+        row = budgets.get(user["id"], {})
+        members.append({
+            "name": user["name"],
+            "saved": user["id"] in budgets,
+            "tiers": {category: row.get(f"{category}_tier") for category in BUDGET_PRICING},
+            "days": lengths.get(user["id"]) or DEFAULT_TRIP_LENGTH,
+        })
+    return members
+
+
+def simulate_members(scenarios: "BudgetScenarios", members: list, count: int, seed: int = 0) -> list:
+    """
+    `count` synthetic members for what-ifs on larger groups: tiers drawn from
+    how often the saved members chose each one (uniform if nobody has saved),
+    trip lengths drawn from the members' lengths (uniform if there are none).
+    """
+    rng = np.random.default_rng(seed)
+    saved = [member for member in members if member["saved"]]
+    picks = {}
+    for k, category in enumerate(scenarios.categories):
+        counts = np.ones(len(scenarios.tiers[category]))
+        if saved:
+            counts = np.bincount(scenarios.tier_indexes(saved)[:, k], minlength=len(counts)) + 0.5
+        picks[category] = rng.choice(len(counts), size=count, p=counts / counts.sum())
+    known_days = [member["days"] for member in members] or scenarios.lengths.tolist()
+    days = rng.choice(known_days, size=count)
+    return [{
+        "name": f"Simulated {i + 1}",
+        "saved": True,
+        "simulated": True,
+        "tiers": {category: scenarios.tiers[category][picks[category][i]] for category in scenarios.categories},
+        "days": int(days[i]),
+    } for i in range(count)]
+
+
+# ========================================
+# SCENARIOS
+# ========================================
+
+class BudgetScenarios:
+    """Every tier combination priced for every trip length."""
+
+    def __init__(self, pricing: dict = BUDGET_PRICING, lengths: list = TRIP_LENGTHS):
+        missing = [category for category in pricing if category not in CATEGORY_UNITS]
+        if missing:
+            raise ValueError(f"No CATEGORY_UNITS entry for {', '.join(missing)}")
+        self.categories = list(pricing)
+        self.tiers = {category: list(pricing[category]) for category in self.categories}
+        self.lengths = np.asarray(lengths)
+        sizes = [len(self.tiers[category]) for category in self.categories]
+
+        # plans x categories tier indexes, first category varying slowest
+        grids = np.meshgrid(*[np.arange(size) for size in sizes], indexing="ij")
+        self.plans = np.stack(grids, axis=-1).reshape(-1, len(sizes))
+        self.strides = np.array([int(np.prod(sizes[k + 1:])) for k in range(len(sizes))])
+
+        prices = [np.array([pricing[category][tier] for tier in self.tiers[category]], dtype=np.float64)
+                  for category in self.categories]
+        self.plan_prices = np.stack([prices[k][self.plans[:, k]] for k in range(len(sizes))], axis=1)
+        per_unit = {"trip": np.ones(len(self.lengths)), "night": self.lengths - 1.0, "day": self.lengths * 1.0}
+        self.units = np.stack([per_unit[CATEGORY_UNITS[category]] for category in self.categories])
+        # plans x lengths, in USD
+        self.totals = self.plan_prices @ self.units
+        # plans x plans: how many tier steps apart two plans are
+        self.distance = np.abs(self.plans[:, None, :] - self.plans[None, :, :]).sum(axis=-1)
+
+    def tier_indexes(self, members: list) -> "np.ndarray":
+        """members x categories tier indexes; unknown or empty tiers count as the first tier."""
+        lookup = [{tier: i for i, tier in enumerate(self.tiers[category])} for category in self.categories]
+        return np.array([[lookup[k].get(member["tiers"].get(category), 0)
+                          for k, category in enumerate(self.categories)]
+                         for member in members], dtype=np.int64).reshape(-1, len(self.categories))
+
+    def plan_index(self, members: list) -> "np.ndarray":
+        return self.tier_indexes(members) @ self.strides
+
+    def length_index(self, days) -> "np.ndarray":
+        return np.clip(np.asarray(days) - self.lengths[0], 0, len(self.lengths) - 1)
+
+    def describe(self, plan: int) -> dict:
+        return {category: self.tiers[category][self.plans[plan, k]] for k, category in enumerate(self.categories)}
+
+    def member_totals(self, members: list) -> tuple:
+        """(members x lengths totals, each member's total at their own trip length), in USD."""
+        plans = self.plan_index(members)
+        by_length = self.totals[plans]
+        days = self.length_index([member["days"] for member in members])
+        return by_length, by_length[np.arange(len(members)), days]
+
+    def group_summary(self, by_length: "np.ndarray") -> dict:
+        """Group totals and per-person spread for every trip length, in USD."""
+        if not len(by_length):
+            empty = [0.0] * len(self.lengths)
+            return {"total": empty, "mean": empty, "min": empty, "max": empty,
+                    **{f"p{p}": empty for p in PERCENTILES}}
+        spread = np.percentile(by_length, PERCENTILES, axis=0)
+        return {
+            "total": by_length.sum(axis=0),
+            "mean": by_length.mean(axis=0),
+            "min": by_length.min(axis=0),
+            "max": by_length.max(axis=0),
+            **{f"p{p}": spread[i] for i, p in enumerate(PERCENTILES)},
+        }
+
+    def best_within(self, budgets, days, current=None) -> "np.ndarray":
+        """
+        The best plan costing at most each budget (USD) for each trip length,
+        broadcast over budgets x people: the fewest tier steps from that
+        person's current plan, then the most expensive. current=None means
+        no preference. -1 where nothing fits.
+        """
+        budgets = np.asarray(budgets, dtype=np.float64)
+        totals = self.totals.T[self.length_index(days)]                 # (..., plans)
+        fits = totals <= budgets[..., None] + 1e-9
+        if current is None:
+            score = -totals
+        else:
+            score = self.distance[np.asarray(current)] * (self.totals.max() + 1.0) - totals
+        score = np.where(fits, score, np.inf)
+        best = score.argmin(axis=-1)
+        return np.where(fits.any(axis=-1), best, -1)
+
+
+# ========================================
+# ARTIFACT
+# ========================================
+
+def convert(amounts, currency: str, rates: dict = CURRENCY_RATES):
+    """USD amounts in another currency."""
+    return np.asarray(amounts) * rates[currency]
+
+
+def rounded(values) -> list:
+    return np.rint(values).astype(int).tolist()
+
+
+def build_artifact(scenarios: BudgetScenarios, members: list, rates: dict = CURRENCY_RATES) -> dict:
+    """The versioned document the budget page reads (amounts in USD)."""
+    by_length, own = scenarios.member_totals(members)
+    plans = scenarios.plan_index(members)
+    summary = scenarios.group_summary(by_length)
+    return {
+        "version": ARTIFACT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "currency": BASE_CURRENCY,
+        "rates": rates,
+        "lengths": scenarios.lengths.tolist(),
+        "categories": scenarios.categories,
+        "tiers": scenarios.tiers,
+        "plans": scenarios.plans.tolist(),
+        "totals": rounded(scenarios.totals),
+        "members": [{
+            "name": member["name"],
+            "saved": member["saved"],
+            "days": int(member["days"]),
+            "plan": int(plans[i]),
+            "total": int(round(own[i])),
+        } for i, member in enumerate(members) if not member.get("simulated")],
+        "group": {
+            "size": len(members),
+            "saved": sum(1 for member in members if member["saved"]),
+            "own_length_total": int(round(own.sum())),
+            **{key: rounded(value) for key, value in summary.items()},
+        },
+    }
+
+
+# ========================================
+# OUTPUT
+# ========================================
+
+def money(amount: float, currency: str) -> str:
+    return f"{amount:,.0f} {currency}"
+
+
+def short_plan(scenarios: BudgetScenarios, plan: int) -> str:
+    return "/".join(scenarios.describe(plan).values())
+
+
+def print_group(scenarios: BudgetScenarios, artifact: dict, currency: str, rates: dict):
+    group = artifact["group"]
+    print(f"  Group: {group['size']} people ({group['saved']} saved a budget) | "
+          f"{len(scenarios.plans)} plans x {len(scenarios.lengths)} trip lengths | amounts in {currency}")
+    print(f"\n  {'Days':>4}  {'Group total':>14}  " + "  ".join(f"{f'p{p}/person':>12}" for p in PERCENTILES))
+    for i, days in enumerate(artifact["lengths"]):
+        spread = "  ".join(f"{convert(group[f'p{p}'][i], currency, rates):>12,.0f}" for p in PERCENTILES)
+        print(f"  {days:>4}  {convert(group['total'][i], currency, rates):>14,.0f}  {spread}")
+    print(f"\n  Everyone at their own trip length: {money(convert(group['own_length_total'], currency, rates), currency)}")
+
+
+def print_members(scenarios: BudgetScenarios, members: list, currency: str, rates: dict, within: float = None):
+    if not members:
+        return
+    _, own = scenarios.member_totals(members)
+    plans = scenarios.plan_index(members)
+    best = None
+    if within is not None:
+        budget = within / rates[currency]
+        best = scenarios.best_within(np.full(len(members), budget), [m["days"] for m in members], plans)
+        print(f"\n  Best plan within {money(within, currency)}, fewest changes from each member's choices:")
+    print(f"\n  {'Member':<10} {'Days':>4}  {'Plan':<42} {'Total':>12}")
+    for i, member in enumerate(members):
+        name = member["name"] + ("" if member["saved"] else "*")
+        print(f"  {name:<10} {member['days']:>4}  {short_plan(scenarios, plans[i]):<42} "
+              f"{convert(own[i], currency, rates):>12,.0f}")
+        if best is None or best[i] == plans[i]:
+            continue
+        if best[i] < 0:
+            print(f"  {'':<10} {'':>4}  → nothing fits")
+            continue
+        total = scenarios.totals[best[i], scenarios.length_index(member["days"])]
+        print(f"  {'':<10} {'':>4}  → {short_plan(scenarios, best[i]):<40} "
+              f"{convert(total, currency, rates):>12,.0f}")
+    if not all(member["saved"] for member in members):
+        print("  * hasn't saved a budget yet (first tier in every category)")
+
+
+def benchmark(scenarios: BudgetScenarios, members: list, rates: dict, slider_steps: int = 100) -> dict:
+    """Milliseconds for a full rebuild and for a slider sweep over every member and currency."""
+    started = time.perf_counter()
+    rebuilt = BudgetScenarios(dict(BUDGET_PRICING), scenarios.lengths.tolist())
+    by_length, _ = rebuilt.member_totals(members)
+    rebuilt.group_summary(by_length)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    plans = scenarios.plan_index(members)
+    days = [member["days"] for member in members]
+    started = time.perf_counter()
+    for currency in rates:
+        # Slider positions in this currency, converted back to USD for the lookup
+        budgets = convert(np.linspace(scenarios.totals.min(), scenarios.totals.max(), slider_steps), currency, rates)
+        best = scenarios.best_within(budgets[:, None] / rates[currency], days, plans)     # steps x members
+        convert(scenarios.totals[np.maximum(best, 0), scenarios.length_index(days)], currency, rates)
+    sweep_ms = (time.perf_counter() - started) * 1000
+    return {"build_ms": build_ms, "sweep_ms": sweep_ms, "step_ms": sweep_ms / (slider_steps * len(rates)),
+            "lookups": slider_steps * len(members) * len(rates)}
+
+
+def parse_rate(value: str) -> tuple:
+    code, _, rate = value.partition("=")
+    try:
+        return code.upper(), float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected CODE=UNITS_PER_USD, got {value!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Price every budget plan for every trip length, per member and for the group")
+    parser.add_argument("--input", metavar="PATH",
+                        help="Read users, user_budgets and availability from a JSON file instead of Supabase")
+    parser.add_argument("--output", metavar="PATH", help="Also write the artifact JSON to a local file")
+    parser.add_argument("--dry-run", action="store_true", help="Print the results without publishing")
+    parser.add_argument("--currency", default=BASE_CURRENCY, type=str.upper,
+                        help=f"Currency for printed amounts and --within (default: {BASE_CURRENCY})")
+    parser.add_argument("--rate", action="append", type=parse_rate, default=[], metavar="CODE=RATE",
+                        help="Units of a currency per USD, adding or overriding CURRENCY_RATES (repeatable)")
+    parser.add_argument("--within", type=float, metavar="AMOUNT",
+                        help="Show each member's best plan costing at most AMOUNT at their trip length")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="Add N synthetic members with tiers drawn like the real ones (what-if on a larger group)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --simulate (default: 0)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Also time a rebuild and a slider sweep over every member and currency")
+    args = parser.parse_args(argv)
+    if args.simulate and not args.dry_run:
+        parser.error("--simulate is for what-ifs and needs --dry-run (simulated members are never published)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rates = {**CURRENCY_RATES, **dict(args.rate)}
+    if args.currency not in rates:
+        print(f"Error: no rate for {args.currency} (pass --rate {args.currency}=UNITS_PER_USD)")
+        sys.exit(1)
+
+    print("="*60)
+    print("  Group Budget Scenarios")
+    print("="*60)
+
+    supabase = None
+    if not args.input or not args.dry_run:
+        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+            print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
+            sys.exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    data = load_budget_file(args.input) if args.input else fetch_budget_data(supabase)
+    scenarios = BudgetScenarios()
+    members = group_members(data)
+    if args.simulate:
+        members += simulate_members(scenarios, members, args.simulate, args.seed)
+
+    started = time.perf_counter()
+    artifact = build_artifact(scenarios, members, rates)
+    build_ms = (time.perf_counter() - started) * 1000
+    body = json.dumps(artifact, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    print_group(scenarios, artifact, args.currency, rates)
+    print_members(scenarios, [m for m in members if not m.get("simulated")], args.currency, rates, args.within)
+    print(f"\n  Evaluated in {build_ms:.1f} ms | artifact {len(body) / 1024:.1f} KB")
+    if args.benchmark:
+        timing = benchmark(scenarios, members, rates)
+        print(f"  Rebuild: {timing['build_ms']:.2f} ms | slider sweep: {timing['lookups']:,} "
+              f"best-plan lookups in {timing['sweep_ms']:.1f} ms ({timing['step_ms']:.2f} ms per slider step "
+              f"for all {len(members)} members)")
+
+    if args.output:
+        Path(args.output).write_bytes(body)
+        print(f"\n  Written to {args.output}")
+
+    if args.dry_run:
+        return
+
+    try:
+        url = publish_artifact(supabase, ARTIFACT_KEY, body)
+        print(f"\n✓ Published {ARTIFACT_BUCKET}/{ARTIFACT_KEY}")
+        print(f"  {url}")
+    except Exception as e:
+        print(f"\n✗ Could not publish artifact: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
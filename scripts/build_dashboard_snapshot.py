@@ -0,0 +1,337 @@
+"""
+Dashboard Snapshot Builder for Japan Trip Planner
+=================================================
+Precomputes everything the dashboard shows and publishes it as one compact,
+versioned JSON document in Supabase Storage, so the dashboard can load with
+a single cacheable GET instead of pulling whole tables into the browser.
+
+The snapshot contains:
+- stats: ready travelers, destination and attraction counts
+- best_dates: the preferred-date overlap across travelers
+- timeline: one day-code string per user for the July-August window
+- top_destinations / top_attractions: the dashboard's top-5 lists
+- team: per-user progress (dates, destinations, votes)
+- budget_tiers: how many people picked each budget tier
+
+Tables are read in pages of PAGE_SIZE rows, so the cost of a build grows
+with the data but the cost of loading the dashboard does not.
+
+Setup:
+1. pip install supabase python-dotenv
+2. Create a public Storage bucket named "dashboard" (see database/storage_policies.sql)
+3. Run: python scripts/build_dashboard_snapshot.py
+
+Run it on a schedule (see the cron job in render.yaml) or on demand after
+bulk data changes. Live edits still reach open dashboards through realtime
+updates; the snapshot only needs to be fresh for the first page load.
+
+Usage:
+    python scripts/build_dashboard_snapshot.py              # build and publish
+    python scripts/build_dashboard_snapshot.py --dry-run    # build and print a summary only
+    python scripts/build_dashboard_snapshot.py --output snapshot.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    from supabase import create_client, Client
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install supabase python-dotenv")
+    sys.exit(1)
+
+from trip_config import TRIP_CONFIG
+
+# scripts/.env is loaded by trip_config
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+
+# Bump SNAPSHOT_VERSION whenever the document layout changes; js/dashboard.js
+# only reads the object named for the version it understands.
+SNAPSHOT_VERSION = 1
+SNAPSHOT_KEY = f"snapshot-v{SNAPSHOT_VERSION}.json"
+
+# Public bucket for the snapshot and the other dashboard artifacts
+ARTIFACT_BUCKET = "dashboard"
+ARTIFACT_CACHE_SECONDS = 60
+
+PAGE_SIZE = 1000
+TOP_N = 5
+
+# Timeline window (TRIP_CONFIG.minDate / maxDate in js/config.js)
+TIMELINE_START = date.fromisoformat(TRIP_CONFIG["minDate"])
+TIMELINE_END = date.fromisoformat(TRIP_CONFIG["maxDate"])
+
+# Timeline day codes
+DAY_PREFERRED = "p"
+DAY_AVAILABLE = "a"
+DAY_NONE = "."
+
+BUDGET_CATEGORIES = ["flight", "hotels", "food", "activities", "shopping"]
+
+
+# ========================================
+# READING
+# ========================================
+
+def fetch_table(supabase: Client, table: str, columns: str, order: str = "id") -> list:
+    """Read every row of a table in pages of PAGE_SIZE, in a stable order."""
+    rows = []
+    offset = 0
+    while True:
+        result = (
+            supabase.table(table)
+            .select(columns)
+            .order(order)
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def fetch_dashboard_data(supabase: Client) -> dict:
+    """Read only the columns the dashboard needs from each table."""
+    return {
+        "users": fetch_table(supabase, "users", "id, name", order="name"),
+        "availability": fetch_table(
+            supabase, "availability",
+            "id, user_id, available_start, available_end, preferred_start, preferred_end"
+        ),
+        "cities": fetch_table(supabase, "cities", "id, name, image_url", order="name"),
+        "user_city_days": fetch_table(supabase, "user_city_days", "id, user_id, city_id, days"),
+        "attractions": fetch_table(supabase, "attractions", "id, name, image_url", order="name"),
+        "votes": fetch_table(supabase, "attraction_votes", "id, user_id, attraction_id, vote"),
+        "budgets": fetch_table(
+            supabase, "user_budgets",
+            "id, user_id, flight_tier, hotels_tier, food_tier, activities_tier, shopping_tier"
+        ),
+    }
+
+
+# ========================================
+# AGGREGATION
+# ========================================
+
+def has_preferred(avail: dict) -> bool:
+    return bool(avail.get("preferred_start") and avail.get("preferred_end"))
+
+
+def compute_best_dates(availability: list) -> dict:
+    """Latest preferred start and earliest preferred end across travelers with preferred dates."""
+    preferred = [a for a in availability if has_preferred(a)]
+    best = {"count": len(preferred), "start": None, "end": None, "days": 0}
+    if len(preferred) < 2:
+        return best
+
+    start = max(a["preferred_start"] for a in preferred)
+    end = min(a["preferred_end"] for a in preferred)
+    if start <= end:
+        best.update({
+            "start": start,
+            "end": end,
+            "days": (date.fromisoformat(end) - date.fromisoformat(start)).days,
+        })
+    return best
+
+
+def compute_timeline(availability: list) -> dict:
+    """One string per user with a DAY_* code for each day of the timeline window."""
+    days = [
+        (TIMELINE_START + timedelta(days=i)).isoformat()
+        for i in range((TIMELINE_END - TIMELINE_START).days + 1)
+    ]
+    rows = {}
+    for avail in availability:
+        pref_start, pref_end = avail.get("preferred_start"), avail.get("preferred_end")
+        avail_start, avail_end = avail.get("available_start"), avail.get("available_end")
+        codes = []
+        for day in days:
+            if pref_start and pref_end and pref_start <= day <= pref_end:
+                codes.append(DAY_PREFERRED)
+            elif avail_start and avail_end and avail_start <= day <= avail_end:
+                codes.append(DAY_AVAILABLE)
+            else:
+                codes.append(DAY_NONE)
+        rows[avail["user_id"]] = "".join(codes)
+    return {"start": TIMELINE_START.isoformat(), "end": TIMELINE_END.isoformat(), "rows": rows}
+
+
+def compute_top_destinations(cities: list, user_city_days: list) -> list:
+    """Cities ranked by total planned days."""
+    stats = {
+        city["id"]: {"id": city["id"], "name": city["name"], "image_url": city.get("image_url"),
+                     "total_days": 0, "user_count": 0}
+        for city in cities
+    }
+    for ucd in user_city_days:
+        city = stats.get(ucd["city_id"])
+        if city:
+            city["total_days"] += ucd.get("days") or 0
+            city["user_count"] += 1
+
+    ranked = sorted((c for c in stats.values() if c["total_days"] > 0),
+                    key=lambda c: c["total_days"], reverse=True)
+    return ranked[:TOP_N]
+
+
+def compute_top_attractions(attractions: list, votes: list) -> list:
+    """Attractions ranked by vote score."""
+    stats = {
+        attr["id"]: {"id": attr["id"], "name": attr["name"], "image_url": attr.get("image_url"),
+                     "score": 0, "upvotes": 0, "downvotes": 0}
+        for attr in attractions
+    }
+    for vote in votes:
+        attr = stats.get(vote["attraction_id"])
+        if attr:
+            attr["score"] += vote["vote"]
+            if vote["vote"] > 0:
+                attr["upvotes"] += 1
+            else:
+                attr["downvotes"] += 1
+
+    ranked = sorted((a for a in stats.values() if a["score"] != 0 or a["upvotes"] or a["downvotes"]),
+                    key=lambda a: a["score"], reverse=True)
+    return ranked[:TOP_N]
+
+
+def compute_team(users: list, availability: list, user_city_days: list, votes: list) -> dict:
+    """Per-user progress, counted in one pass over each table."""
+    team = {
+        user["id"]: {"availability": False, "preferred": False, "cities": 0, "votes": 0}
+        for user in users
+    }
+    for avail in availability:
+        progress = team.get(avail["user_id"])
+        if progress:
+            progress["availability"] = True
+            progress["preferred"] = bool(avail.get("preferred_start"))
+    for ucd in user_city_days:
+        if ucd["user_id"] in team:
+            team[ucd["user_id"]]["cities"] += 1
+    for vote in votes:
+        if vote["user_id"] in team:
+            team[vote["user_id"]]["votes"] += 1
+    return team
+
+
+def compute_budget_tiers(budgets: list) -> dict:
+    """How many people picked each tier, per budget category."""
+    counts = {category: {} for category in BUDGET_CATEGORIES}
+    for budget in budgets:
+        for category in BUDGET_CATEGORIES:
+            tier = budget.get(f"{category}_tier")
+            if tier:
+                counts[category][tier] = counts[category].get(tier, 0) + 1
+    return {"responders": len(budgets), "counts": counts}
+
+
+def build_snapshot(data: dict) -> dict:
+    """Assemble the versioned snapshot document from raw table rows."""
+    availability = data["availability"]
+    return {
+        "version": SNAPSHOT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "stats": {
+            "travelers_ready": sum(1 for a in availability if has_preferred(a)),
+            "destinations": len(data["cities"]),
+            "attractions": len(data["attractions"]),
+        },
+        "best_dates": compute_best_dates(availability),
+        "timeline": compute_timeline(availability),
+        "top_destinations": compute_top_destinations(data["cities"], data["user_city_days"]),
+        "top_attractions": compute_top_attractions(data["attractions"], data["votes"]),
+        "team": compute_team(data["users"], availability, data["user_city_days"], data["votes"]),
+        "budget_tiers": compute_budget_tiers(data["budgets"]),
+        "source_rows": {table: len(rows) for table, rows in data.items()},
+    }
+
+
+# ========================================
+# PUBLISHING
+# ========================================
+
+def encode_snapshot(snapshot: dict) -> bytes:
+    return json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def publish_artifact(supabase: Client, key: str, body: bytes) -> str:
+    """Upload a JSON artifact over the previous one in the dashboard bucket and return its public URL."""
+    supabase.storage.from_(ARTIFACT_BUCKET).upload(
+        path=key,
+        file=body,
+        file_options={
+            "content-type": "application/json",
+            "cache-control": str(ARTIFACT_CACHE_SECONDS),
+            "upsert": "true",
+        }
+    )
+    return supabase.storage.from_(ARTIFACT_BUCKET).get_public_url(key)
+
+
+def print_snapshot_summary(snapshot: dict, size: int):
+    print(f"  Version:        {snapshot['version']} ({size / 1024:.1f} KB)")
+    print("  Source rows:    " + ", ".join(f"{t}={n}" for t, n in snapshot["source_rows"].items()))
+    print(f"  Ready:          {snapshot['stats']['travelers_ready']} travelers")
+    best = snapshot["best_dates"]
+    if best["start"]:
+        print(f"  Best overlap:   {best['start']} to {best['end']} ({best['count']} people)")
+    else:
+        print("  Best overlap:   none")
+    print("  Top cities:     " + ", ".join(c["name"] for c in snapshot["top_destinations"]))
+    print("  Top activities: " + ", ".join(a["name"] for a in snapshot["top_attractions"]))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build and publish the dashboard snapshot")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Build the snapshot and print a summary without uploading it")
+    parser.add_argument("--output", metavar="PATH", help="Also write the snapshot JSON to a local file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Dashboard Snapshot Builder")
+    print("="*60)
+
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
+        sys.exit(1)
+
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    snapshot = build_snapshot(fetch_dashboard_data(supabase))
+    body = encode_snapshot(snapshot)
+    print_snapshot_summary(snapshot, len(body))
+
+    if args.output:
+        Path(args.output).write_bytes(body)
+        print(f"\n  Written to {args.output}")
+
+    if args.dry_run:
+        return
+
+    try:
+        url = publish_artifact(supabase, SNAPSHOT_KEY, body)
+        print(f"\n✓ Published {ARTIFACT_BUCKET}/{SNAPSHOT_KEY}")
+        print(f"  {url}")
+    except Exception as e:
+        print(f"\n✗ Could not publish snapshot: {e}")
+        print(f"  Make sure the public '{ARTIFACT_BUCKET}' bucket exists (see database/storage_policies.sql)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Static Site Build for Japan Trip Planner
+========================================
+Builds the deployable site into dist/:
+
+- the local stylesheets and scripts in index.html are concatenated (in the
+  order index.html loads them) into one CSS and one JS bundle
+- the bundles are minified and named by content hash
+  (assets/app.<hash>.css, assets/app.<hash>.js), so they can be cached for
+  a year: any change produces a new file name
+- index.html is rewritten to load the bundles
+- every text file gets precompressed .gz and .br (brotli) variants
+- images/ is copied as-is
+
+render.yaml runs this as the static site's build command and serves
+assets/* as immutable and index.html with no-cache, so a repeat visit costs
+one small (usually 304) HTML request.
+
+The minifiers are deliberately conservative: comments and indentation go,
+line breaks stay (so JavaScript's automatic semicolon insertion is never
+affected), and strings, template literals and regexes are copied verbatim.
+
+Setup:
+    pip install brotli       # optional, for .br files
+
+Usage:
+    python scripts/build_site.py                 # build into dist/
+    python scripts/build_site.py --output /tmp/site
+    python scripts/build_site.py --no-minify     # bundle and hash only
+"""
+
+import re
+import sys
+import gzip
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+script_dir = Path(__file__).parent
+SITE_DIR = script_dir.parent
+DIST_DIR = SITE_DIR / "dist"
+ASSETS_DIR = "assets"
+
+# Copied into dist/ unchanged
+COPY_DIRS = ["images"]
+
+# Files worth precompressing
+COMPRESS_SUFFIXES = {".html", ".css", ".js", ".json", ".svg"}
+
+HASH_LENGTH = 10
+
+STYLESHEET_TAG = re.compile(r'[ \t]*<link rel="stylesheet" href="(?!https?:|//)([^"?]+)(?:\?[^"]*)?">[ \t]*\n?')
+SCRIPT_TAG = re.compile(r'[ \t]*<script src="(?!https?:|//)([^"?]+)(?:\?[^"]*)?"></script>[ \t]*\n?')
+
+
+# ========================================
+# MINIFIERS
+# ========================================
+
+# Spaces next to these never matter (":" does - ".a :hover" - so it is left alone)
+CSS_TIGHT = {"{", "}", ";", ","}
+
+
+def minify_css(source: str) -> str:
+    """Drop comments and collapse whitespace, leaving strings (e.g. data: URIs) untouched."""
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in "\"'":
+            end = i + 1
+            while end < n and source[end] != c:
+                end += 2 if source[end] == "\\" else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif c.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            if out and out[-1] not in CSS_TIGHT:
+                out.append(" ")
+        else:
+            if c in CSS_TIGHT and out and out[-1] == " ":
+                out.pop()
+            if c == "}" and out and out[-1] == ";":
+                out.pop()
+            out.append(c)
+            i += 1
+
+    return "".join(out).strip()
+
+
+# A "/" after one of these starts a regex literal rather than a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw",
+                  "instanceof", "yield", "await"}
+
+# Spaces on either side of these can go without joining two tokens
+JS_TIGHT = set("{}()[],;:=")
+
+
+def _js_string(source: str, i: int) -> int:
+    """Index just past the quoted string starting at i."""
+    quote = source[i]
+    i += 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == "\\" else 1
+    return i + 1
+
+
+def _js_regex(source: str, i: int) -> int:
+    """Index just past the regex literal (and flags) starting at i."""
+    i += 1
+    in_class = False
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            break
+        i += 1
+    i += 1
+    while i < len(source) and (source[i].isalnum() or source[i] == "_"):
+        i += 1
+    return i
+
+
+def _minify_js_code(source: str, i: int, out: list, in_template: bool = False) -> int:
+    """
+    Minify code from i, appending to out. Inside a template's ${...} it stops
+    at the matching "}" and returns its index.
+    """
+    n = len(source)
+    depth = 0
+    last = ""          # last significant character or word emitted, for regex detection
+
+    def emit_space(newline: bool):
+        prev = out[-1][-1:] if out else ""
+        if not out or prev == "\n":
+            return
+        if newline:
+            if out[-1] == " ":
+                out.pop()
+                if not out or out[-1][-1:] == "\n":
+                    return
+            out.append("\n")
+        elif prev not in JS_TIGHT and prev != " ":
+            out.append(" ")
+
+    while i < n:
+        c = source[i]
+
+        if c.isspace():
+            start = i
+            while i < n and source[i].isspace():
+                i += 1
+            emit_space("\n" in source[start:i])
+            continue
+
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            emit_space(False)
+            continue
+
+        # Drop a space we just emitted if this character doesn't need it
+        if c in JS_TIGHT and out and out[-1] == " ":
+            out.pop()
+
+        if c in "\"'":
+            end = _js_string(source, i)
+            out.append(source[i:end])
+            i, last = end, "a"
+        elif c == "`":
+            i = _minify_js_template(source, i, out)
+            last = "a"
+        elif c == "/" and (last == "" or last in REGEX_PRECEDERS or last in REGEX_KEYWORDS):
+            end = _js_regex(source, i)
+            out.append(source[i:end])
+            i, last = end, "a"
+        elif c.isalnum() or c in "_$":
+            end = i
+            while end < n and (source[end].isalnum() or source[end] in "_$."):
+                end += 1
+            word = source[i:end]
+            out.append(word)
+            i, last = end, word
+        else:
+            if in_template:
+                if c == "{":
+                    depth += 1
+                elif c == "}":
+                    if depth == 0:
+                        return i
+                    depth -= 1
+            out.append(c)
+            i, last = i + 1, c
+
+    return i
+
+
+def _minify_js_template(source: str, i: int, out: list) -> int:
+    """Copy a template literal verbatim, minifying only the code inside ${...}."""
+    out.append("`")
+    i += 1
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            out.append(source[i:i + 2])
+            i += 2
+        elif c == "`":
+            out.append("`")
+            return i + 1
+        elif source.startswith("${", i):
+            out.append("${")
+            i = _minify_js_code(source, i + 2, out, in_template=True)
+            out.append("}")
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    return i
+
+
+def minify_js(source: str) -> str:
+    """Drop comments and indentation; keep line breaks, strings, templates and regexes."""
+    out = []
+    _minify_js_code(source, 0, out)
+    return "".join(out).strip() + "\n"
+
+
+def minify_html(source: str) -> str:
+    """Drop comments and indentation."""
+    html = re.sub(r"<!--.*?-->", "", source, flags=re.S)
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip()) + "\n"
+
+
+# ========================================
+# BUILD
+# ========================================
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def bundle(paths: list, minify, separator: str) -> bytes:
+    parts = []
+    for path in paths:
+        text = (SITE_DIR / path).read_text(encoding="utf-8")
+        parts.append(minify(text) if minify else text)
+    return separator.join(parts).encode("utf-8")
+
+
+def write_asset(out_dir: Path, name: str, suffix: str, data: bytes) -> str:
+    """Write a content-hashed asset and return its path relative to the site root."""
+    rel = f"{ASSETS_DIR}/{name}.{content_hash(data)}{suffix}"
+    (out_dir / rel).write_bytes(data)
+    return rel
+
+
+def rewrite_html(html: str, css_href: str, js_src: str) -> str:
+    """Replace the local <link>/<script> tags with one tag per bundle, at the first one's position."""
+    def replace_first(pattern, tag):
+        state = {"first": True}
+
+        def sub(match):
+            if state["first"]:
+                state["first"] = False
+                indent = match.group(0)[:len(match.group(0)) - len(match.group(0).lstrip())]
+                return f"{indent}{tag}\n"
+            return ""
+        return pattern.sub(sub, html)
+
+    html = replace_first(STYLESHEET_TAG, f'<link rel="stylesheet" href="{css_href}">')
+    html = replace_first(SCRIPT_TAG, f'<script src="{js_src}"></script>')
+    return html
+
+
+def precompress(out_dir: Path) -> int:
+    """Write .gz (and .br, if brotli is installed) next to every text file. Returns bytes saved by brotli/gzip."""
+    saved = 0
+    for path in sorted(out_dir.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESS_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        path.with_name(path.name + ".gz").write_bytes(gz)
+        best = len(gz)
+        if brotli:
+            br = brotli.compress(data, quality=11)
+            path.with_name(path.name + ".br").write_bytes(br)
+            best = min(best, len(br))
+        saved += len(data) - best
+    return saved
+
+
+def build(out_dir: Path = DIST_DIR, minify: bool = True) -> dict:
+    """Build the site into out_dir. Returns the bundle paths and sizes."""
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    (out_dir / ASSETS_DIR).mkdir(parents=True)
+
+    html = (SITE_DIR / "index.html").read_text(encoding="utf-8")
+    stylesheets = STYLESHEET_TAG.findall(html)
+    scripts = SCRIPT_TAG.findall(html)
+
+    css = bundle(stylesheets, minify_css if minify else None, "\n")
+    # ";" guards against a file that ends without one
+    js = bundle(scripts, minify_js if minify else None, ";\n")
+    css_href = write_asset(out_dir, "app", ".css", css)
+    js_src = write_asset(out_dir, "app", ".js", js)
+
+    html = rewrite_html(html, css_href, js_src)
+    (out_dir / "index.html").write_text(minify_html(html) if minify else html, encoding="utf-8")
+
+    for name in COPY_DIRS:
+        if (SITE_DIR / name).exists():
+            shutil.copytree(SITE_DIR / name, out_dir / name)
+
+    source_bytes = sum((SITE_DIR / p).stat().st_size for p in stylesheets + scripts)
+    return {
+        "stylesheets": stylesheets,
+        "scripts": scripts,
+        "css": css_href,
+        "js": js_src,
+        "source_bytes": source_bytes,
+        "bundle_bytes": len(css) + len(js),
+        "compressed_saved": precompress(out_dir),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle, minify, fingerprint and precompress the static site")
+    parser.add_argument("--output", metavar="DIR", default=str(DIST_DIR), help="Output directory (default: dist/)")
+    parser.add_argument("--no-minify", action="store_true", help="Concatenate and hash without minifying")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Static Site Build")
+    print("="*60)
+
+    try:
+        result = build(args.output, minify=not args.no_minify)
+    except OSError as e:
+        print(f"✗ Build failed: {e}")
+        sys.exit(1)
+
+    print(f"  {len(result['stylesheets'])} stylesheets -> {result['css']}")
+    print(f"  {len(result['scripts'])} scripts     -> {result['js']}")
+    print(f"  {result['source_bytes'] / 1024:.1f} KB source -> {result['bundle_bytes'] / 1024:.1f} KB bundled")
+    if not brotli:
+        print("  ⚠ brotli not installed: wrote .gz only (pip install brotli)")
+    print(f"\n✓ Built {args.output}")
+
+
+if __name__ == "__main__":
+    main()
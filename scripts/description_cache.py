@@ -0,0 +1,82 @@
+"""
+Photo Description Cache
+=======================
+Persists analyze_photo() results on disk so unchanged source photos are not
+re-sent to the vision model on every run.
+
+Entries are keyed by the SHA-256 of the photo bytes, the vision model name
+and the prompt version, so editing a photo, switching models or bumping
+PROMPT_VERSION in generate_avatars.py all miss the cache automatically.
+Use --refresh-descriptions to invalidate entries explicitly.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+CACHE_PATH = Path(os.getenv("AVATAR_CACHE_DIR", Path(__file__).parent / ".cache")) / "descriptions.json"
+
+
+def photo_hash(image_path: str) -> str:
+    """SHA-256 of a source photo's bytes."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DescriptionCache:
+    """Thread-safe JSON-file cache of photo descriptions."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text()).get("entries", {})
+            except (OSError, ValueError):
+                print(f"  ⚠ Description cache unreadable, starting fresh: {self.path}")
+
+    @staticmethod
+    def key(content_hash: str, model: str, prompt_version: int) -> str:
+        return f"{content_hash}:{model}:v{prompt_version}"
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry["description"] if entry else None
+
+    def put(self, key: str, description: str, source: str):
+        with self.lock:
+            self.entries[key] = {"description": description, "source": source}
+            self._save()
+
+    def invalidate(self, sources: list = None) -> int:
+        """
+        Drop cached entries for the given source photo file names
+        (e.g. ["julian.jpg"]), or every entry when sources is empty.
+        Returns the number of entries removed.
+        """
+        with self.lock:
+            if not sources:
+                removed = len(self.entries)
+                self.entries = {}
+            else:
+                names = {name.lower() for name in sources}
+                stale = [k for k, v in self.entries.items() if Path(v.get("source", "")).name.lower() in names
+                         or Path(v.get("source", "")).stem.lower() in names]
+                for k in stale:
+                    del self.entries[k]
+                removed = len(stale)
+            self._save()
+            return removed
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"entries": self.entries}, indent=2, sort_keys=True))
+        tmp.replace(self.path)
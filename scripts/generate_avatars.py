@@ -6,40 +6,107 @@ Generates 6 unique profile pictures for each user based on their uploaded photo.
 Uses:
 - OpenAI GPT-4 Vision to analyze the source photo
 - OpenAI DALL-E 3 to generate stylized avatars
-- Supabase Storage to host the images
+- Supabase Storage to host the images (plus small WebP/AVIF derivatives)
 - Supabase Database to update user records
 
 Setup:
-1. pip install openai supabase python-dotenv requests
+1. pip install openai supabase python-dotenv requests Pillow
 2. Create a .env file with your credentials (see .env.example)
 3. Place source photos in scripts/source_photos/ named like: julian.jpg, dave.jpg, etc.
-4. Run: python scripts/generate_avatars.py
+   (frank2.jpg, or an alias from USER_ALIASES in image_index.py, also match;
+   with several photos per user the sharpest usable one is picked)
+4. Run: python scripts/generate_avatars.py [--concurrency N] [--rpm N]
+   (or python scripts/avatars.py generate ...; avatars.py plan shows what a run would do)
+
+The team roster is TRIP_CONFIG.teamMembers in js/config.js (see trip_config.py).
+
+Transfers:
+Generated images are returned inline (base64) by default and streamed in
+chunks straight into Supabase Storage over pooled keep-alive connections,
+so there is no second download of a temporary URL (use --fetch-url to opt
+back into URL mode).
+
+Description cache:
+Photo descriptions are cached in scripts/.cache/descriptions.json, keyed by
+photo content hash, vision model and PROMPT_VERSION, so re-runs skip the
+vision calls for unchanged photos. Photos are downscaled to 512px JPEG
+before being sent. Use --refresh-descriptions [PHOTO ...] to invalidate.
+
+Resuming:
+Progress for every (user, style) cell is recorded in a local SQLite journal
+(scripts/.cache/avatar_jobs.sqlite3) and objects use deterministic keys like
+julian_ukiyoe.png. After a failed or interrupted run, --resume redoes only the
+missing cells instead of regenerating all 42 avatars.
+
+Concurrency:
+With --concurrency N the photo analysis, generation, download and upload
+steps for all users and styles are overlapped across N worker threads.
+Image generation calls share a single token-bucket limiter sized to the
+image API's requests-per-minute quota (--rpm, or OPENAI_IMAGE_RPM), and
+429 responses are retried with exponential backoff.
+
+Tracing:
+Every photo analysis, generation, download, upload and database write is
+recorded as a span (duration, bytes in/out, retries, estimated API cost) in
+a JSON-lines trace under scripts/.cache/traces/ (or --trace PATH), and a
+p50/p95 per-stage and per-user table is printed at the end of the run.
 """
 
+from __future__ import annotations
+
+import io
 import os
 import sys
+import time
+import random
 import base64
-import requests
+import argparse
+import threading
 from pathlib import Path
-from datetime import datetime
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 try:
-    from openai import OpenAI
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
+    from PIL import Image, ImageOps
 except ImportError:
     print("Missing dependencies. Install with:")
-    print("pip install openai supabase python-dotenv requests")
+    print("pip install openai supabase python-dotenv requests Pillow")
     sys.exit(1)
 
-# Load environment variables
-load_dotenv()
-
-# Configuration
+# The SDKs take over a second to import, so they are only loaded by main()
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from supabase import Client
+
+from trip_config import TEAM_MEMBERS
+from avatar_variants import build_variants, upload_variants
+from http_transfer import iter_url, iter_base64, iter_file, upload_stream, close_sessions
+from description_cache import DescriptionCache, photo_hash
+from avatar_db import fetch_user_ids, avatar_row, bulk_save_avatars
+from avatar_jobs import JobJournal, GENERATED_DIR, object_key
+from image_index import select_source_photos, print_source_selection
+from telemetry import tracer, chat_cost, COST_DALLE3_STANDARD_1024
+
+# Configuration (scripts/.env is loaded by trip_config)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')  # Use service key for admin access
 
+# Photo analysis
+VISION_MODEL = "gpt-4o"
+VISION_DETAIL = "low"       # low-detail images are processed at 512x512
+VISION_MAX_SIDE = 512
+VISION_JPEG_QUALITY = 85
+PROMPT_VERSION = 1          # Bump when the analysis prompt changes to invalidate cached descriptions
+GENERIC_DESCRIPTION = "a friendly person with an approachable expression, suitable for a stylized avatar"
+
+# Rate limiting
+IMAGE_RPM = int(os.getenv('OPENAI_IMAGE_RPM', '15'))  # Images API requests-per-minute quota
+DEFAULT_CONCURRENCY = 1
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
 # ========================================
 # JAPANESE-THEMED AVATAR STYLES
 # ========================================
@@ -81,9 +148,11 @@ AVATAR_STYLES = [
 # ========================================
 # TEAM MEMBERS WITH JAPANESE-THEMED SETTINGS
 # ========================================
-# Each person gets a unique Japanese setting for their avatars
+# Each person gets a unique Japanese setting for their avatars. The roster
+# itself is TRIP_CONFIG.teamMembers in js/config.js; anyone added there
+# without a setting here gets DEFAULT_SETTING.
 
-TEAM_MEMBERS = {
+MEMBER_SETTINGS = {
     "Julian": {
         "setting": "standing beneath a magnificent weeping cherry blossom tree in full bloom, petals drifting in the breeze, soft spring sunlight filtering through pink canopy",
         "setting_short": "Cherry Blossom"
@@ -114,24 +183,103 @@ TEAM_MEMBERS = {
     }
 }
 
+DEFAULT_SETTING = {
+    "setting": "strolling along a quiet lantern-lit street in Kyoto's Higashiyama district at dusk, wooden machiya houses, a pagoda silhouetted against the evening sky",
+    "setting_short": "Kyoto Evening"
+}
 
-def encode_image_to_base64(image_path: str) -> str:
-    """Read an image file and return its base64 encoding."""
-    with open(image_path, "rb") as image_file:
-        return base64.standard_b64encode(image_file.read()).decode("utf-8")
 
+def member_setting(user_name: str) -> dict:
+    """The Japanese setting for a team member's avatars."""
+    return MEMBER_SETTINGS.get(user_name, DEFAULT_SETTING)
 
-def get_image_mime_type(image_path: str) -> str:
-    """Get the MIME type based on file extension."""
-    ext = Path(image_path).suffix.lower()
-    mime_types = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.webp': 'image/webp'
-    }
-    return mime_types.get(ext, 'image/jpeg')
+
+# ========================================
+# RATE LIMITING & RETRIES
+# ========================================
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every worker that calls the image API.
+    Tokens refill continuously at rate_per_minute / 60 per second, up to `burst`.
+    """
+
+    def __init__(self, rate_per_minute: int, burst: int = 1):
+        self.rate = max(rate_per_minute, 1) / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an exception represents an HTTP 429 from the API."""
+    status = getattr(error, 'status_code', None)
+    if status is None and getattr(error, 'response', None) is not None:
+        status = getattr(error.response, 'status_code', None)
+    return status == 429
+
+
+def retry_after_seconds(error: Exception, attempt: int) -> float:
+    """Honour a Retry-After header if present, otherwise use jittered exponential backoff."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+
+def call_with_retry(func, *args, limiter: RateLimiter = None, **kwargs):
+    """
+    Call func, acquiring a limiter token before each attempt and retrying
+    with backoff when the API answers 429.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == MAX_RETRIES:
+                raise
+            delay = retry_after_seconds(e, attempt)
+            tracer.event("retry", of=func.__name__, delay_s=round(delay, 2))
+            print(f"    ⚠ Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
+
+
+def encode_image_to_base64(image_bytes: bytes) -> str:
+    """Return the base64 encoding of image bytes."""
+    return base64.standard_b64encode(image_bytes).decode("utf-8")
+
+
+def prepare_photo_for_vision(image_path: str) -> tuple:
+    """
+    Downscale and re-encode a source photo before it is sent to the vision model.
+    With detail="low" the model only looks at a 512px image, so anything larger
+    is wasted upload. Returns (jpeg_bytes, mime_type).
+    """
+    with Image.open(image_path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((VISION_MAX_SIDE, VISION_MAX_SIDE), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue(), "image/jpeg"
 
 
 def analyze_photo(client: OpenAI, image_path: str) -> str:
@@ -141,11 +289,29 @@ def analyze_photo(client: OpenAI, image_path: str) -> str:
     """
     print(f"  Analyzing photo: {image_path}")
     
-    base64_image = encode_image_to_base64(image_path)
-    mime_type = get_image_mime_type(image_path)
+    with tracer.span("analyze_photo") as span:
+        image_bytes, mime_type = prepare_photo_for_vision(image_path)
+        base64_image = encode_image_to_base64(image_bytes)
+        span["bytes_out"] = len(base64_image)
+        response = _request_description(client, base64_image, mime_type)
+        span["cost_usd"] = chat_cost(response.usage)
+    
+    description = response.choices[0].message.content
+    
+    # If the model refuses, use a generic description
+    if "sorry" in description.lower() or "can't" in description.lower() or "cannot" in description.lower():
+        print(f"  ⚠ Model declined to analyze photo, using generic description")
+        description = GENERIC_DESCRIPTION
+    else:
+        print(f"  Description: {description[:100]}...")
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    return description
+
+
+def _request_description(client: OpenAI, base64_image: str, mime_type: str):
+    """Send the prepared photo to the vision model."""
+    return client.chat.completions.create(
+        model=VISION_MODEL,
         messages=[
             {
                 "role": "system",
@@ -171,7 +337,8 @@ Example: "Short dark wavy hair, round friendly face shape, wearing rectangular g
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:{mime_type};base64,{base64_image}"
+                            "url": f"data:{mime_type};base64,{base64_image}",
+                            "detail": VISION_DETAIL
                         }
                     }
                 ]
@@ -179,23 +346,36 @@ Example: "Short dark wavy hair, round friendly face shape, wearing rectangular g
         ],
         max_tokens=300
     )
-    
-    description = response.choices[0].message.content
-    
-    # If the model refuses, use a generic description
-    if "sorry" in description.lower() or "can't" in description.lower() or "cannot" in description.lower():
-        print(f"  ⚠ Model declined to analyze photo, using generic description")
-        description = "a friendly person with an approachable expression, suitable for a stylized avatar"
-    else:
-        print(f"  Description: {description[:100]}...")
-    
+
+
+def describe_photo(client: OpenAI, image_path: str, cache: DescriptionCache) -> str:
+    """
+    Return the cached description for a source photo, or analyze it and cache the result.
+    Generic fallbacks (model refusals) are not cached so the next run tries again.
+    """
+    key = DescriptionCache.key(photo_hash(image_path), VISION_MODEL, PROMPT_VERSION)
+    description = cache.get(key)
+    if description:
+        print(f"  Using cached description for {Path(image_path).name}")
+        tracer.event("description_cached")
+        return description
+
+    description = call_with_retry(analyze_photo, client, image_path)
+    if description != GENERIC_DESCRIPTION:
+        cache.put(key, description, Path(image_path).name)
     return description
 
 
-def generate_avatar(client: OpenAI, description: str, style: dict, setting: str) -> str:
+def traced_describe(client: OpenAI, image_path: str, cache: DescriptionCache, user_name: str) -> str:
+    """describe_photo() with its spans attributed to user_name."""
+    with tracer.context(user=user_name):
+        return describe_photo(client, image_path, cache)
+
+
+def generate_avatar(client: OpenAI, description: str, style: dict, setting: str, inline: bool = True) -> dict:
     """
     Use DALL-E 3 to generate an avatar based on the description, style, and setting.
-    Returns the URL of the generated image.
+    Returns the generated payload: {"b64_json": ...} when inline, otherwise {"url": ...}.
     """
     prompt = f"""Create a stunning profile picture portrait of a person with these features: {description}
 
@@ -207,43 +387,62 @@ The image should be a beautiful close-up portrait suitable for a profile picture
     
     print(f"    Generating {style['display_name']} style...")
     
-    response = client.images.generate(
-        model="dall-e-3",
-        prompt=prompt,
-        size="1024x1024",
-        quality="standard",
-        n=1
-    )
+    with tracer.span("generate_avatar", style=style["name"]) as span:
+        span["bytes_out"] = len(prompt)
+        response = client.images.generate(
+            model="dall-e-3",
+            prompt=prompt,
+            size="1024x1024",
+            quality="standard",
+            response_format="b64_json" if inline else "url",
+            n=1
+        )
+        span["cost_usd"] = COST_DALLE3_STANDARD_1024
     
-    return response.data[0].url
+        image = response.data[0]
+        span["bytes_in"] = len(image.b64_json or "") if inline else len(image.url or "")
+    return {"b64_json": image.b64_json} if inline else {"url": image.url}
+
+
+def download_image(url: str):
+    """
+    Stream an image from a URL in chunks over a pooled keep-alive connection.
+    The download span stays open until the caller has consumed every chunk.
+    """
+    with tracer.span("download_image") as span:
+        yield from tracer.counted(iter_url(url), span)
+
+
+def image_chunks(payload: dict):
+    """Chunk iterator for a generated image, whether it came back inline or as a temporary URL."""
+    if payload.get("b64_json"):
+        return iter_base64(payload["b64_json"])
+    return download_image(payload["url"])
 
 
-def download_image(url: str) -> bytes:
-    """Download an image from a URL and return the bytes."""
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.content
+def save_generated(chunks, image_path: Path):
+    """Write a generated image to the local cache atomically, one chunk at a time."""
+    image_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = image_path.with_suffix(".part")
+    with open(partial, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(partial, image_path)
 
 
-def upload_to_supabase(supabase: Client, image_bytes: bytes, user_name: str, style_name: str) -> str:
+def upload_to_supabase(supabase: Client, image_path: Path, filename: str) -> tuple:
     """
-    Upload an image to Supabase Storage and return the public URL.
+    Stream a generated image from disk into Supabase Storage and upload its
+    responsive derivatives.
+    Returns (public_url, variants) where variants is {fmt: {size: url}}.
     """
-    # Create a unique filename (flat structure, no subdirectories for simpler policies)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{user_name.lower()}_{style_name}_{timestamp}.png"
-    
     try:
-        # Upload to storage bucket
-        result = supabase.storage.from_("profile-pictures").upload(
-            path=filename,
-            file=image_bytes,
-            file_options={"content-type": "image/png", "upsert": "true"}
-        )
-        
-        # Check for errors in result
-        if hasattr(result, 'error') and result.error:
-            raise Exception(f"Upload failed: {result.error}")
+        # Upload to storage bucket (deterministic key, so retries overwrite in place)
+        with tracer.span("upload_to_supabase") as span:
+            upload_stream(
+                SUPABASE_URL, SUPABASE_SERVICE_KEY, "profile-pictures", filename,
+                tracer.counted(iter_file(image_path), span, "bytes_out"), "image/png"
+            )
             
     except Exception as e:
         error_msg = str(e)
@@ -256,77 +455,175 @@ def upload_to_supabase(supabase: Client, image_bytes: bytes, user_name: str, sty
     
     # Get public URL
     public_url = supabase.storage.from_("profile-pictures").get_public_url(filename)
+
+    # Small WebP/AVIF versions for the avatar picker's srcset
+    with tracer.span("upload_variants") as span:
+        derivatives = build_variants(image_path)
+        span["bytes_out"] = sum(len(data) for data in derivatives.values())
+        variants = upload_variants(supabase, "profile-pictures", filename, derivatives)
     
-    return public_url
+    return public_url, variants
 
 
-def get_user_id(supabase: Client, user_name: str) -> str:
-    """Get the user ID from the database by name."""
-    result = supabase.table("users").select("id").eq("name", user_name).single().execute()
-    return result.data["id"] if result.data else None
+def is_generated(journal: JobJournal, user_name: str, style_name: str) -> bool:
+    """True if the image for this cell is already saved locally and needs no API call."""
+    local_path = GENERATED_DIR / object_key(user_name, style_name)
+    return journal.reached(user_name, style_name, "generated") and local_path.exists()
 
 
-def save_avatar_to_db(supabase: Client, user_id: str, avatar_urls: list):
+def generate_style(openai_client: OpenAI, supabase: Client, limiter: RateLimiter, journal: JobJournal,
+                   user_name: str, user_config: dict, description: str, style: dict,
+                   inline: bool = True) -> tuple:
     """
-    Save the generated avatar URLs to the user's record.
-    Stores the first avatar as the main avatar_url and all options in avatar_options.
+    Generate a single style for a user (unless the journal says it already was)
+    and stream it into storage.
+    Returns (permanent public URL, derivative URLs).
     """
-    supabase.table("users").update({
-        "avatar_url": avatar_urls[0],  # Set first as default
-        "avatar_options": avatar_urls   # Store all options
-    }).eq("id", user_id).execute()
+    filename = object_key(user_name, style["name"])
+    local_path = GENERATED_DIR / filename
+
+    with tracer.context(user=user_name):
+        if not is_generated(journal, user_name, style["name"]):
+            payload = call_with_retry(
+                generate_avatar,
+                openai_client,
+                description,
+                style,
+                user_config['setting'],
+                inline=inline,
+                limiter=limiter
+            )
+            save_generated(image_chunks(payload), local_path)
+            del payload  # don't hold the inline base64 image through the upload
+            journal.mark(user_name, style["name"], "generated")
+
+        permanent_url, variants = upload_to_supabase(supabase, local_path, filename)
+    journal.mark(user_name, style["name"], "uploaded", url=permanent_url, variants=variants)
+    print(f"    ✓ {user_name} / {style['display_name']}: Uploaded successfully")
+    return permanent_url, variants
 
 
-def process_user(openai_client: OpenAI, supabase: Client, user_name: str, user_config: dict, source_photo_path: str):
+def run_pipeline(openai_client: OpenAI, supabase: Client, jobs: list, concurrency: int, limiter: RateLimiter,
+                 cache: DescriptionCache, journal: JobJournal, inline: bool = True) -> dict:
     """
-    Process a single user: analyze their photo, generate avatars, upload, and save to DB.
+    Process all users with up to `concurrency` calls in flight.
+
+    jobs is a list of (user_name, user_config, source_photo_path). Only cells
+    the journal hasn't seen uploaded are run. Each user's photo analysis is
+    scheduled first (skipped if every missing cell is already generated); as
+    soon as a description is ready that user's style tasks are queued, so work
+    overlaps across users and styles. Nothing is written to the database here:
+    main() saves every user's uploaded avatars in one bulk write.
     """
-    print(f"\n{'='*60}")
-    print(f"Processing: {user_name}")
-    print(f"Setting: {user_config['setting_short']}")
-    print(f"{'='*60}")
-    
-    # Step 1: Analyze the source photo
-    description = analyze_photo(openai_client, source_photo_path)
-    
-    # Step 2: Generate avatars for each style
-    avatar_urls = []
-    for style in AVATAR_STYLES:
-        try:
-            # Generate the avatar with user's personalized Japanese setting
-            temp_url = generate_avatar(
-                openai_client, 
-                description, 
-                style, 
-                user_config['setting']
-            )
-            
-            # Download the image
-            image_bytes = download_image(temp_url)
-            
-            # Upload to Supabase
-            permanent_url = upload_to_supabase(supabase, image_bytes, user_name, style["name"])
-            avatar_urls.append(permanent_url)
-            
-            print(f"    ✓ {style['display_name']}: Uploaded successfully")
-            
-        except Exception as e:
-            print(f"    ✗ {style['display_name']}: Failed - {str(e)}")
-    
-    # Step 3: Save to database
-    if avatar_urls:
-        user_id = get_user_id(supabase, user_name)
-        if user_id:
-            save_avatar_to_db(supabase, user_id, avatar_urls)
-            print(f"  ✓ Saved {len(avatar_urls)} avatars to database for {user_name}")
-        else:
-            print(f"  ✗ User '{user_name}' not found in database")
-    
-    return avatar_urls
+    results = {}
+    pending = {}        # future -> (kind, user_name, style indexes or index)
+    configs = {user_name: user_config for user_name, user_config, _ in jobs}
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+
+        def queue_styles(user_name, description, indexes):
+            for i in indexes:
+                style_future = executor.submit(
+                    generate_style, openai_client, supabase, limiter, journal,
+                    user_name, configs[user_name], description, AVATAR_STYLES[i], inline
+                )
+                pending[style_future] = ("style", user_name, i)
+
+        for user_name, user_config, photo_path in jobs:
+            todo = [
+                i for i, style in enumerate(AVATAR_STYLES)
+                if not journal.reached(user_name, style["name"], "uploaded")
+            ]
+            if not todo:
+                print(f"\nUp to date: {user_name}")
+                continue
+
+            print(f"\nQueued: {user_name} ({user_config['setting_short']}, {len(todo)} styles)")
+            if all(is_generated(journal, user_name, AVATAR_STYLES[i]["name"]) for i in todo):
+                queue_styles(user_name, None, todo)
+            else:
+                future = executor.submit(traced_describe, openai_client, photo_path, cache, user_name)
+                pending[future] = ("analyze", user_name, todo)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, user_name, index = pending.pop(future)
+
+                if kind == "analyze":
+                    try:
+                        description = future.result()
+                    except Exception as e:
+                        print(f"  ✗ Error processing {user_name}: {str(e)}")
+                        results[user_name] = {"success": False, "error": str(e)}
+                        continue
+
+                    for i in index:
+                        style_name = AVATAR_STYLES[i]["name"]
+                        if not journal.reached(user_name, style_name, "described"):
+                            journal.mark(user_name, style_name, "described")
+                    queue_styles(user_name, description, index)
+                    continue
+
+                style = AVATAR_STYLES[index]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"    ✗ {user_name} / {style['display_name']}: Failed - {str(e)}")
+                    journal.fail(user_name, style["name"], str(e))
+
+    # Build each user's avatar list from the journal, including cells finished by earlier runs
+    for user_name, _, _ in jobs:
+        if user_name in results:
+            continue
+        cells = [journal.get(user_name, style["name"]) for style in AVATAR_STYLES]
+        uploaded = [cell for cell in cells if cell["state"] in ("uploaded", "committed")]
+        results[user_name] = {
+            "success": bool(uploaded),
+            "count": len(uploaded),
+            "urls": [cell["url"] for cell in uploaded],
+            "variants": [cell["variants"] for cell in uploaded],
+            "needs_commit": any(cell["state"] == "uploaded" for cell in cells),
+        }
+        if not uploaded:
+            results[user_name]["error"] = "No avatars generated"
+
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Japanese-themed avatars for the team")
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="Number of API calls to run in parallel across users and styles (default: 1)"
+    )
+    parser.add_argument(
+        "--rpm", type=int, default=IMAGE_RPM,
+        help="Image API requests-per-minute quota shared by all workers (default: OPENAI_IMAGE_RPM or 15)"
+    )
+    parser.add_argument(
+        "--fetch-url", action="store_true",
+        help="Ask the image API for a temporary URL and stream it, instead of receiving the image inline"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue the previous run: only redo (user, style) cells the job journal hasn't finished"
+    )
+    parser.add_argument(
+        "--refresh-descriptions", nargs="*", metavar="PHOTO",
+        help="Invalidate cached photo descriptions (all of them, or only the named photos, e.g. julian.jpg)"
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH",
+        help="Write the JSON-lines span trace here (default: scripts/.cache/traces/generate-<time>.jsonl)"
+    )
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv=None):
     """Main entry point."""
+    args = parse_args(argv)
+
     print("="*60)
     print("  Japan Trip Planner - Avatar Generator")
     print("="*60)
@@ -340,9 +637,27 @@ def main():
         print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set")
         sys.exit(1)
     
-    # Initialize clients
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    try:
+        from openai import OpenAI
+        from supabase import create_client
+    except ImportError:
+        print("Missing dependencies. Install with:")
+        print("pip install openai supabase")
+        sys.exit(1)
+
+    # Initialize clients (retries are handled by call_with_retry so they share the limiter)
+    openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    limiter = RateLimiter(args.rpm, burst=min(args.concurrency, args.rpm))
+    tracer.start("generate", args.trace)
+    cache = DescriptionCache()
+    journal = JobJournal()
+    if not args.resume:
+        journal.reset()
+    if args.refresh_descriptions is not None:
+        removed = cache.invalidate(args.refresh_descriptions)
+        print(f"Invalidated {removed} cached photo descriptions")
+    print(f"Concurrency: {args.concurrency} | Image API limit: {args.rpm} requests/min")
     
     # Source photos directory
     source_dir = Path(__file__).parent / "source_photos"
@@ -354,41 +669,77 @@ def main():
         print("Name them like: julian.jpg, dave.jpg, jason.jpg, etc.")
         sys.exit(0)
     
-    # Process each team member
+    # Resolve every user id up front so missing users aren't paid for
+    user_ids = fetch_user_ids(supabase, TEAM_MEMBERS)
+
+    # One source photo per user: the best of their candidates by resolution and sharpness
+    print("\nSource photos:")
+    sources = select_source_photos(TEAM_MEMBERS, source_dir)
+    print_source_selection(sources)
+
+    # Collect a job for each team member with a source photo
     results = {}
-    for name, config in TEAM_MEMBERS.items():
-        # Find the source photo (try common extensions)
-        source_photo = None
-        for ext in ['.jpg', '.jpeg', '.png', '.webp']:
-            potential_path = source_dir / f"{name.lower()}{ext}"
-            if potential_path.exists():
-                source_photo = potential_path
-                break
-        
+    jobs = []
+    for name in TEAM_MEMBERS:
+        if name not in user_ids:
+            print(f"\n✗ User '{name}' not found in database, skipping")
+            results[name] = {"success": False, "error": "User not found in database"}
+            continue
+
+        source_photo = sources[name]["best"]
         if source_photo:
-            try:
-                avatar_urls = process_user(openai_client, supabase, name, config, str(source_photo))
-                results[name] = {"success": True, "count": len(avatar_urls)}
-            except Exception as e:
-                print(f"  ✗ Error processing {name}: {str(e)}")
-                results[name] = {"success": False, "error": str(e)}
+            jobs.append((name, member_setting(name), str(source_photo)))
         else:
             print(f"\n⚠ No source photo found for {name}")
             print(f"  Expected: {source_dir}/{name.lower()}.jpg (or .png, .jpeg, .webp)")
             results[name] = {"success": False, "error": "No source photo"}
+
+    started = time.monotonic()
+    try:
+        results.update(run_pipeline(openai_client, supabase, jobs, args.concurrency, limiter,
+                                    cache, journal, inline=not args.fetch_url))
+    finally:
+        close_sessions()
+
+    # Save every user's avatars in one atomic write
+    rows = [
+        avatar_row(user_ids[name], name, result["urls"], result["variants"])
+        for name, result in results.items() if result.get("urls") and result.get("needs_commit")
+    ]
+    if rows:
+        try:
+            saved = bulk_save_avatars(supabase, rows)
+            print(f"\n✓ Saved avatars to database for {len(saved)} users")
+            for name in saved:
+                for style in AVATAR_STYLES:
+                    if journal.get(name, style["name"])["state"] == "uploaded":
+                        journal.mark(name, style["name"], "committed")
+                        (GENERATED_DIR / object_key(name, style["name"])).unlink(missing_ok=True)
+        except Exception as e:
+            print(f"\n✗ Database update failed, no users were changed: {str(e)}")
+            print("  Re-run with --resume to retry without regenerating")
+            for row in rows:
+                results[row["name"]] = {"success": False, "error": f"Database update failed: {str(e)}"}
+    print(f"Job journal: {journal.summary()}")
+    journal.close()
+    elapsed = time.monotonic() - started
     
     # Summary
     print("\n" + "="*60)
     print("  SUMMARY")
     print("="*60)
-    for name, result in results.items():
+    for name in TEAM_MEMBERS:
+        result = results.get(name, {"success": False, "error": "Not processed"})
         if result["success"]:
             print(f"  ✓ {name}: Generated {result['count']} avatars")
         else:
             print(f"  ✗ {name}: {result.get('error', 'Failed')}")
     
     total_success = sum(1 for r in results.values() if r["success"])
-    print(f"\nTotal: {total_success}/{len(TEAM_MEMBERS)} users processed successfully")
+    print(f"\nTotal: {total_success}/{len(TEAM_MEMBERS)} users processed successfully in {elapsed:.1f}s")
+
+    tracer.print_summary()
+    tracer.close()
 
 
 if __name__ == "__main__":
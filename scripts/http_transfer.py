@@ -0,0 +1,178 @@
+"""
+Streaming HTTP Transfers
+========================
+Pooled, streaming helpers for moving images between the image API and
+Supabase Storage without holding whole files in memory.
+
+- One keep-alive requests.Session per host, shared by all worker threads,
+  so repeated calls reuse the TCP/TLS connection.
+- Sources (a temporary URL, an inline base64 payload or a local file) are
+  exposed as chunk iterators.
+- Uploads go straight to the Storage REST endpoint with a chunked request
+  body, so chunks are piped through as they arrive.
+- Large files can use Storage's resumable (TUS) endpoint instead: the file
+  is sent in fixed-size chunks and an interrupted upload continues from the
+  offset the server already has.
+"""
+
+import base64
+import mimetypes
+import threading
+from urllib.parse import urlsplit, urljoin, quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 256 * 1024
+POOL_SIZE = 16
+
+TUS_VERSION = "1.0.0"
+# Supabase's resumable endpoint requires every chunk but the last to be exactly 6 MB
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+
+# Leading bytes of the image formats the scripts handle
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the shared keep-alive session for the URL's host, creating it on first use."""
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def close_sessions():
+    """Close every pooled session (call once at the end of a run)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def iter_url(url: str, chunk_size: int = CHUNK_SIZE):
+    """Stream a URL's body in chunks over the host's pooled session."""
+    with get_session(url).get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+
+
+def iter_base64(payload: str, chunk_size: int = CHUNK_SIZE):
+    """Decode an inline base64 payload in chunks instead of materialising the whole image."""
+    # Decode in multiples of 4 characters so every slice is independently valid base64
+    step = (chunk_size // 3) * 4
+    for start in range(0, len(payload), step):
+        yield base64.b64decode(payload[start:start + step])
+
+
+def iter_file(path, chunk_size: int = CHUNK_SIZE):
+    """Stream a local file in chunks."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+def detect_content_type(path) -> str:
+    """A file's real MIME type from its first bytes, falling back to its extension."""
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def storage_object_url(supabase_url: str, bucket: str, key: str) -> str:
+    return f"{supabase_url.rstrip('/')}/storage/v1/object/{bucket}/{quote(key)}"
+
+
+def upload_stream(supabase_url: str, service_key: str, bucket: str, key: str,
+                  chunks, content_type: str, upsert: bool = True) -> requests.Response:
+    """
+    Upload an object to Supabase Storage from a chunk iterator.
+    requests sends an iterator body with chunked transfer encoding, so only
+    one chunk is held in memory at a time.
+    """
+    url = storage_object_url(supabase_url, bucket, key)
+    headers = {
+        "Authorization": f"Bearer {service_key}",
+        "apikey": service_key,
+        "Content-Type": content_type,
+        "x-upsert": "true" if upsert else "false",
+    }
+    response = get_session(url).post(url, data=chunks, headers=headers, timeout=120)
+    if response.status_code >= 400:
+        raise requests.HTTPError(f"Upload failed ({response.status_code}): {response.text}", response=response)
+    return response
+
+
+# ========================================
+# RESUMABLE (TUS) UPLOADS
+# ========================================
+
+def tus_endpoint(supabase_url: str) -> str:
+    return f"{supabase_url.rstrip('/')}/storage/v1/upload/resumable"
+
+
+def _tus_headers(service_key: str, **extra) -> dict:
+    return {
+        "Authorization": f"Bearer {service_key}",
+        "apikey": service_key,
+        "Tus-Resumable": TUS_VERSION,
+        **extra,
+    }
+
+
+def tus_create(supabase_url: str, service_key: str, bucket: str, key: str, size: int,
+               content_type: str, upsert: bool = True) -> str:
+    """Start a resumable upload of `size` bytes and return its upload URL."""
+    metadata = {"bucketName": bucket, "objectName": key, "contentType": content_type}
+    encoded = ",".join(f"{name} {base64.b64encode(value.encode()).decode()}" for name, value in metadata.items())
+    url = tus_endpoint(supabase_url)
+    response = get_session(url).post(url, headers=_tus_headers(
+        service_key,
+        **{"Upload-Length": str(size), "Upload-Metadata": encoded, "x-upsert": "true" if upsert else "false"}
+    ), timeout=30)
+    if response.status_code != 201 or "Location" not in response.headers:
+        raise requests.HTTPError(f"Resumable upload could not start ({response.status_code}): {response.text}",
+                                 response=response)
+    return urljoin(url + "/", response.headers["Location"])
+
+
+def tus_offset(upload_url: str, service_key: str):
+    """Bytes the server already has for an upload, or None if it no longer exists."""
+    response = get_session(upload_url).head(upload_url, headers=_tus_headers(service_key), timeout=30)
+    if response.status_code in (404, 410):
+        return None
+    response.raise_for_status()
+    return int(response.headers["Upload-Offset"])
+
+
+def tus_patch(upload_url: str, service_key: str, offset: int, data: bytes) -> int:
+    """Send one chunk at `offset` and return the server's new offset."""
+    response = get_session(upload_url).patch(upload_url, data=data, headers=_tus_headers(
+        service_key,
+        **{"Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"}
+    ), timeout=120)
+    response.raise_for_status()
+    return int(response.headers["Upload-Offset"])
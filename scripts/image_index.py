@@ -0,0 +1,272 @@
+"""
+Image Index for Avatar Inputs and Outputs
+=========================================
+Computes a perceptual hash and a few quality metrics for every source photo
+(scripts/source_photos/) and generated avatar (images/avatars/<User>/), so
+the scripts can:
+
+- pick the best source photo per user: files are matched to users through
+  USER_ALIASES and a trailing number ("frank2.jpg" is Frank, "david.jpg" is
+  Dave), and the one with the most usable resolution, then the sharpest,
+  wins (generate_avatars.py)
+- drop near-duplicate avatars before they are uploaded (upload_avatars.py)
+
+The hash is a 64-bit DCT hash of the image at 32x32 grayscale: two images
+whose hashes differ in at most NEAR_DUPLICATE_BITS bits look the same to a
+person, whatever their size, format or compression. Sharpness is the
+variance of the Laplacian at the size the vision model sees.
+
+Metrics are computed in a process pool and cached in
+scripts/.cache/image_index.json by path, size and mtime.
+
+Usage:
+    python scripts/image_index.py                 # report sources and avatars
+    python scripts/image_index.py --threshold 10  # looser duplicate matching
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image, ImageOps
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install numpy Pillow")
+    sys.exit(1)
+
+script_dir = Path(__file__).parent
+SOURCE_DIR = script_dir / "source_photos"
+AVATARS_DIR = script_dir.parent / "images" / "avatars"
+INDEX_PATH = Path(os.getenv("AVATAR_CACHE_DIR", script_dir / ".cache")) / "image_index.json"
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Source photo names that belong to a user but don't start with their name
+USER_ALIASES = {
+    "Dave": ["david"],
+}
+
+HASH_SAMPLE = 32            # grayscale size the DCT is taken over
+HASH_SIZE = 8               # low-frequency block kept: 8x8 = 64 bits
+NEAR_DUPLICATE_BITS = 6
+# generate_avatars.py sends photos to the vision model at most 512px on a side,
+# so resolution beyond that buys nothing
+VISION_SIDE = 512
+
+_k = np.arange(HASH_SAMPLE)
+_DCT = np.cos(np.pi * (2 * _k[None, :] + 1) * _k[:, None] / (2 * HASH_SAMPLE))
+
+
+# ========================================
+# METRICS
+# ========================================
+
+def perceptual_hash(image: Image.Image) -> str:
+    """64-bit DCT hash as 16 hex digits."""
+    pixels = np.asarray(image.convert("L").resize((HASH_SAMPLE, HASH_SAMPLE), Image.LANCZOS), dtype=np.float64)
+    block = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    # The DC term only encodes overall brightness, so it is left out of the median
+    bits = block > np.median(block[1:])
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def sharpness(image: Image.Image) -> float:
+    """Variance of the Laplacian, measured at VISION_SIDE so sizes compare fairly."""
+    gray = image.convert("L")
+    gray.thumbnail((VISION_SIDE, VISION_SIDE), Image.LANCZOS)
+    a = np.asarray(gray, dtype=np.float64)
+    if a.shape[0] < 3 or a.shape[1] < 3:
+        return 0.0
+    laplacian = a[:-2, 1:-1] + a[2:, 1:-1] + a[1:-1, :-2] + a[1:-1, 2:] - 4 * a[1:-1, 1:-1]
+    return float(laplacian.var())
+
+
+def image_metrics(path) -> dict:
+    """Hash and quality metrics for one image file."""
+    with Image.open(path) as image:
+        fmt = image.format
+        image = ImageOps.exif_transpose(image)
+        return {
+            "phash": perceptual_hash(image),
+            "width": image.width,
+            "height": image.height,
+            "format": fmt,
+            "bytes": Path(path).stat().st_size,
+            "sharpness": round(sharpness(image), 1),
+        }
+
+
+def _metrics_job(path: str) -> tuple:
+    try:
+        return path, image_metrics(path)
+    except (OSError, ValueError) as e:
+        return path, {"error": str(e)}
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def quality_key(metrics: dict) -> tuple:
+    """Sort key, best first when reversed: usable resolution, then sharpness, then file size."""
+    usable = min(metrics["width"], metrics["height"], VISION_SIDE)
+    return usable, metrics["sharpness"], metrics["bytes"]
+
+
+# ========================================
+# INDEX
+# ========================================
+
+class ImageIndex:
+    """Metrics for image files, cached on disk by path, size and mtime."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                print("  Warning: image index unreadable, rebuilding it")
+
+    def metrics(self, paths: list, max_workers: int = None) -> dict:
+        """{path: metrics} for every path, computing uncached ones in a process pool."""
+        stats = {str(p): Path(p).stat() for p in paths}
+        stale = [p for p, st in stats.items()
+                 if self.entries.get(p, {}).get("stamp") != [st.st_size, st.st_mtime]]
+        if stale:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                computed = dict(pool.map(_metrics_job, stale))
+            with self.lock:
+                for p, metrics in computed.items():
+                    self.entries[p] = {"stamp": [stats[p].st_size, stats[p].st_mtime], **metrics}
+                self._save()
+        return {Path(p): self.entries[p] for p in stats}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_suffix(".part")
+        partial.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(partial, self.path)
+
+
+def list_images(folder: Path) -> list:
+    if not folder.exists():
+        return []
+    return sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def photo_owner(path: Path, users: list):
+    """The user a source photo belongs to: its stem minus a trailing number, matched against names and aliases."""
+    stem = re.sub(r"[\s_-]*\d+$", "", path.stem.lower())
+    for user in users:
+        if stem == user.lower() or stem in USER_ALIASES.get(user, []):
+            return user
+    return None
+
+
+def near_duplicates(metrics: dict, threshold: int = NEAR_DUPLICATE_BITS) -> list:
+    """
+    Group near-identical images, keeping the best of each group.
+    Returns [(kept_path, dropped_path, distance)].
+    """
+    ranked = sorted((p for p, m in metrics.items() if "phash" in m),
+                    key=lambda p: quality_key(metrics[p]), reverse=True)
+    kept, dropped = [], []
+    for path in ranked:
+        closest = min(((hamming(metrics[k]["phash"], metrics[path]["phash"]), k) for k in kept), default=None)
+        if closest and closest[0] <= threshold:
+            dropped.append((closest[1], path, closest[0]))
+        else:
+            kept.append(path)
+    return dropped
+
+
+def select_source_photos(users: list, source_dir: Path = SOURCE_DIR, index: ImageIndex = None,
+                         threshold: int = NEAR_DUPLICATE_BITS) -> dict:
+    """
+    Choose each user's best source photo.
+    Returns {user: {"best": path or None, "candidates": [(path, metrics)] best first,
+    "shared_with": [other users whose chosen photo is a near-duplicate]}}.
+    """
+    index = index or ImageIndex()
+    photos = list_images(source_dir)
+    metrics = index.metrics(photos)
+
+    selection = {user: {"best": None, "candidates": [], "shared_with": []} for user in users}
+    for path in photos:
+        user = photo_owner(path, users)
+        if user and "phash" in metrics[path]:
+            selection[user]["candidates"].append((path, metrics[path]))
+    for entry in selection.values():
+        entry["candidates"].sort(key=lambda c: quality_key(c[1]), reverse=True)
+        if entry["candidates"]:
+            entry["best"] = entry["candidates"][0][0]
+
+    # The same face saved under two users' names would generate two near-identical avatar sets
+    chosen = {user: metrics[e["best"]]["phash"] for user, e in selection.items() if e["best"]}
+    for user, phash in chosen.items():
+        selection[user]["shared_with"] = [other for other, h in chosen.items()
+                                          if other != user and hamming(phash, h) <= threshold]
+    return selection
+
+
+def describe(path: Path, metrics: dict) -> str:
+    return (f"{path.name}: {metrics['width']}x{metrics['height']} {metrics['format']}, "
+            f"{metrics['bytes'] / 1024:.0f} KB, sharpness {metrics['sharpness']:.0f}")
+
+
+def print_source_selection(selection: dict):
+    for user, entry in selection.items():
+        if not entry["best"]:
+            print(f"  ⚠ {user}: no source photo")
+            continue
+        for rank, (path, metrics) in enumerate(entry["candidates"]):
+            print(f"  {'✓' if rank == 0 else ' '} {user:<8} {describe(path, metrics)}")
+        if entry["shared_with"]:
+            print(f"    ⚠ looks the same as the photo chosen for {', '.join(entry['shared_with'])}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Index source photos and avatars by perceptual hash")
+    parser.add_argument("--threshold", type=int, default=NEAR_DUPLICATE_BITS,
+                        help=f"Max differing hash bits for a near-duplicate (default: {NEAR_DUPLICATE_BITS} of 64)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from trip_config import TEAM_MEMBERS
+
+    print("="*60)
+    print("  Image Index")
+    print("="*60)
+
+    index = ImageIndex()
+    print(f"\n  Source photos ({SOURCE_DIR})")
+    selection = select_source_photos(TEAM_MEMBERS, index=index, threshold=args.threshold)
+    print_source_selection(selection)
+    unmatched = [p.name for p in list_images(SOURCE_DIR) if not photo_owner(p, TEAM_MEMBERS)]
+    if unmatched:
+        print(f"  ⚠ Not matched to any user: {', '.join(unmatched)} (add an alias to USER_ALIASES)")
+
+    print(f"\n  Avatars ({AVATARS_DIR})")
+    total = 0
+    for user in TEAM_MEMBERS:
+        duplicates = near_duplicates(index.metrics(list_images(AVATARS_DIR / user)), args.threshold)
+        total += len(duplicates)
+        for kept, dropped, distance in duplicates:
+            print(f"  ⚠ {user}: {dropped.name} is a near-duplicate of {kept.name} ({distance} bits apart)")
+    print(f"  {total} near-duplicate avatar(s)" if total else "  ✓ No near-duplicate avatars")
+
+
+if __name__ == "__main__":
+    main()
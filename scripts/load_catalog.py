@@ -0,0 +1,312 @@
+"""
+Catalog Loader for Japan Trip Planner
+=====================================
+Loads the destination catalog (cities and their attractions) from a JSON file
+in database/catalog/ and brings the live tables in line with it by applying
+only the differences, instead of the DELETE-everything seed scripts.
+
+Rows are matched by natural key - cities by name, attractions by name + city -
+so existing rows keep their ids and every vote and city-day allocation that
+points at them survives a catalog refresh. The whole refresh (batched inserts,
+updates and deletes) runs in one transaction: it either lands completely or
+not at all.
+
+Images are compared against image_source_url when scripts/mirror_images.py
+has mirrored them, so a refresh keeps the mirrored copies unless the
+catalog's image URL actually changed.
+
+Deletes only touch catalog rows. Attractions that users added in the app
+(created_by is set) are never removed, and neither is a city that still has
+one. Removing a catalog attraction or city does remove its votes / city days,
+so the plan printed before applying lists how many.
+
+Catalog format:
+    {"cities": [{"name": "Tokyo", "japanese_name": "東京", "description": "...",
+                 "image_url": "...", "highlights": ["..."],
+                 "attractions": [{"name": "...", "description": "...",
+                                  "time_estimate": "2–4 hrs", "image_url": "..."}]}]}
+
+Setup:
+1. pip install "psycopg[binary]" python-dotenv
+2. Add DATABASE_URL to scripts/.env (see migrate.py)
+3. Apply pending migrations (python scripts/migrate.py); the loader reads
+   the image_source_url column from database/add_image_mirrors.sql
+
+Usage:
+    python scripts/load_catalog.py                                   # load database/catalog/activities.json
+    python scripts/load_catalog.py database/catalog/original.json    # restore the original 8 cities
+    python scripts/load_catalog.py --dry-run                         # print the plan only
+    python scripts/load_catalog.py --keep-missing                    # inserts and updates only
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+try:
+    import psycopg
+    from psycopg.rows import dict_row
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print('pip install "psycopg[binary]" python-dotenv')
+    sys.exit(1)
+
+from trip_config import project_root
+
+# scripts/.env is loaded by trip_config
+DATABASE_URL = os.getenv('DATABASE_URL')
+DEFAULT_CATALOG = project_root / "database" / "catalog" / "activities.json"
+
+# Columns the catalog owns; anything else (ids, created_by, created_at) is left alone
+CITY_FIELDS = ("japanese_name", "description", "image_url", "highlights")
+ATTRACTION_FIELDS = ("description", "time_estimate", "image_url")
+
+# The catalog's image_url is the original (source) URL of a possibly mirrored image
+LIVE_IMAGE_URL = "COALESCE({t}.image_source_url, {t}.image_url) AS image_url"
+
+
+def set_columns(table: str, fields: tuple, value: str) -> str:
+    """
+    SET clause for the catalog columns. value formats a field into its new
+    value. A changed image_url also drops the mirrored copy, so the next
+    mirror run picks up the new source; an unchanged one leaves it in place.
+    """
+    image_changed = f"COALESCE({table}.image_source_url, {table}.image_url) IS DISTINCT FROM {value.format('image_url')}"
+    clauses = [f"{f} = {value.format(f)}" for f in fields if f != "image_url"]
+    clauses += [
+        f"image_url = CASE WHEN {image_changed} THEN {value.format('image_url')} ELSE {table}.image_url END",
+        f"image_source_url = CASE WHEN {image_changed} THEN NULL ELSE {table}.image_source_url END",
+        f"image_variants = CASE WHEN {image_changed} THEN NULL ELSE {table}.image_variants END",
+    ]
+    return ",\n                    ".join(clauses)
+
+
+# ========================================
+# CATALOG
+# ========================================
+
+def load_catalog(path: Path) -> tuple:
+    """
+    Read a catalog file into ({city name: row}, {(attraction name, city name): row}).
+    Fields missing from the file are loaded as NULL.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    cities, attractions = {}, {}
+
+    for city in data["cities"]:
+        name = city["name"].strip()
+        if name in cities:
+            raise ValueError(f"Duplicate city in catalog: {name}")
+        cities[name] = {"name": name, **{f: city.get(f) for f in CITY_FIELDS}}
+
+        for attraction in city.get("attractions", []):
+            key = (attraction["name"].strip(), name)
+            if key in attractions:
+                raise ValueError(f"Duplicate attraction in catalog: {key[0]} ({name})")
+            attractions[key] = {"name": key[0], "city": name,
+                                **{f: attraction.get(f) for f in ATTRACTION_FIELDS}}
+
+    return cities, attractions
+
+
+# ========================================
+# DIFF
+# ========================================
+
+def fetch_live(conn) -> tuple:
+    """Current cities and attractions, keyed like load_catalog()."""
+    with conn.cursor(row_factory=dict_row) as cur:
+        columns = [LIVE_IMAGE_URL.format(t="cities") if f == "image_url" else f for f in CITY_FIELDS]
+        cities = {row["name"]: row for row in cur.execute(
+            f"SELECT id, name, {', '.join(columns)} FROM cities"
+        )}
+        # Oldest first, so if the table holds duplicates the original row is the one kept
+        attractions, duplicates = {}, []
+        columns = [LIVE_IMAGE_URL.format(t="a") if f == "image_url" else "a." + f for f in ATTRACTION_FIELDS]
+        for row in cur.execute(f"""
+            SELECT a.id, a.name, c.name AS city, a.created_by, {', '.join(columns)}
+            FROM attractions a LEFT JOIN cities c ON c.id = a.city_id
+            ORDER BY a.created_at, a.id
+        """):
+            key = (row["name"], row["city"])
+            if key in attractions:
+                duplicates.append(row)
+            else:
+                attractions[key] = row
+    return cities, attractions, duplicates
+
+
+def diff_rows(wanted: dict, live: dict, fields: tuple) -> dict:
+    """Split wanted rows into inserts, updates and unchanged; live rows not wanted are deletes."""
+    plan = {"insert": [], "update": [], "delete": [], "unchanged": 0}
+    for key, row in wanted.items():
+        current = live.get(key)
+        if current is None:
+            plan["insert"].append(row)
+        elif any(current[f] != row[f] for f in fields):
+            plan["update"].append({**row, "id": current["id"]})
+        else:
+            plan["unchanged"] += 1
+    plan["delete"] = [row for key, row in live.items() if key not in wanted]
+    return plan
+
+
+def build_plan(catalog: tuple, live: tuple, keep_missing: bool = False) -> dict:
+    """Work out every change needed to make the live tables match the catalog."""
+    catalog_cities, catalog_attractions = catalog
+    live_cities, live_attractions, duplicates = live
+
+    cities = diff_rows(catalog_cities, live_cities, CITY_FIELDS)
+    attractions = diff_rows(catalog_attractions, live_attractions, ATTRACTION_FIELDS)
+    attractions["delete"] += duplicates
+
+    # User-added attractions are user data, not catalog rows
+    user_added = [a for a in attractions["delete"] if a["created_by"] is not None]
+    attractions["delete"] = [a for a in attractions["delete"] if a["created_by"] is None]
+    keep_cities = {a["city"] for a in user_added}
+    cities["delete"] = [c for c in cities["delete"] if c["name"] not in keep_cities]
+
+    if keep_missing:
+        cities["delete"], attractions["delete"] = [], []
+
+    return {"cities": cities, "attractions": attractions, "user_added": user_added}
+
+
+def count_dependents(conn, plan: dict) -> dict:
+    """How many votes and city-day rows the planned deletes would take with them."""
+    attraction_ids = [a["id"] for a in plan["attractions"]["delete"]]
+    city_ids = [c["id"] for c in plan["cities"]["delete"]]
+    votes = conn.execute("SELECT COUNT(*) FROM attraction_votes WHERE attraction_id = ANY(%s)",
+                         (attraction_ids,)).fetchone()[0]
+    city_days = conn.execute("SELECT COUNT(*) FROM user_city_days WHERE city_id = ANY(%s)",
+                             (city_ids,)).fetchone()[0]
+    return {"votes": votes, "city_days": city_days}
+
+
+# ========================================
+# APPLY
+# ========================================
+
+def apply_plan(conn, plan: dict):
+    """Apply the plan with one batched statement per kind of change."""
+    cities = plan["cities"]
+    attractions = plan["attractions"]
+
+    with conn.cursor() as cur:
+        upserts = cities["insert"] + cities["update"]
+        if upserts:
+            cur.executemany(
+                f"""
+                INSERT INTO cities (name, {', '.join(CITY_FIELDS)})
+                VALUES (%(name)s, {', '.join(f'%({f})s' for f in CITY_FIELDS)})
+                ON CONFLICT (name) DO UPDATE SET
+                    {set_columns('cities', CITY_FIELDS, 'EXCLUDED.{}')}
+                """,
+                upserts
+            )
+
+        if attractions["delete"]:
+            cur.execute("DELETE FROM attractions WHERE id = ANY(%s)",
+                        ([a["id"] for a in attractions["delete"]],))
+
+        if attractions["update"]:
+            cur.executemany(
+                f"""
+                UPDATE attractions SET
+                    {set_columns('attractions', ATTRACTION_FIELDS, '%({})s')}
+                WHERE id = %(id)s
+                """,
+                attractions["update"]
+            )
+
+        if attractions["insert"]:
+            cur.executemany(
+                f"""
+                INSERT INTO attractions (name, city_id, {', '.join(ATTRACTION_FIELDS)})
+                SELECT %(name)s, id, {', '.join(f'%({f})s' for f in ATTRACTION_FIELDS)}
+                FROM cities WHERE name = %(city)s
+                """,
+                attractions["insert"]
+            )
+
+        if cities["delete"]:
+            cur.execute("DELETE FROM cities WHERE id = ANY(%s)",
+                        ([c["id"] for c in cities["delete"]],))
+
+
+def load(conn, catalog: tuple, keep_missing: bool = False, dry_run: bool = False) -> dict:
+    """Diff and apply inside one transaction. With dry_run the transaction is rolled back."""
+    with conn.transaction() as tx:
+        # Hold off concurrent catalog edits between reading the tables and writing the diff
+        conn.execute("LOCK TABLE cities, attractions IN SHARE ROW EXCLUSIVE MODE")
+        plan = build_plan(catalog, fetch_live(conn), keep_missing)
+        plan["dependents"] = count_dependents(conn, plan)
+        print_plan(plan)
+
+        if dry_run:
+            raise psycopg.Rollback(tx)
+        apply_plan(conn, plan)
+    return plan
+
+
+def print_plan(plan: dict):
+    for table in ("cities", "attractions"):
+        p = plan[table]
+        print(f"  {table:<12} +{len(p['insert']):<4} ~{len(p['update']):<4} "
+              f"-{len(p['delete']):<4} ={p['unchanged']}")
+        for row in p["insert"]:
+            print(f"      + {row['name']}")
+        for row in p["update"]:
+            print(f"      ~ {row['name']}")
+        for row in p["delete"]:
+            print(f"      - {row['name']}")
+
+    if plan["user_added"]:
+        print(f"  Keeping {len(plan['user_added'])} user-added attraction(s) not in the catalog")
+    deps = plan["dependents"]
+    if deps["votes"] or deps["city_days"]:
+        print(f"  ⚠ Deletes also remove {deps['votes']} vote(s) and {deps['city_days']} city-day row(s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load the city/attraction catalog by applying only the differences")
+    parser.add_argument("catalog", nargs="?", default=str(DEFAULT_CATALOG),
+                        help=f"Catalog JSON file (default: {DEFAULT_CATALOG.relative_to(project_root)})")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without changing anything")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="Don't delete cities or attractions that are missing from the catalog")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Catalog Loader")
+    print("="*60)
+
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL must be set in scripts/.env")
+        sys.exit(1)
+
+    try:
+        catalog = load_catalog(args.catalog)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"✗ Invalid catalog {args.catalog}: {e}")
+        sys.exit(1)
+    print(f"  Catalog: {args.catalog} ({len(catalog[0])} cities, {len(catalog[1])} attractions)\n")
+
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        try:
+            load(conn, catalog, keep_missing=args.keep_missing, dry_run=args.dry_run)
+        except psycopg.Error as e:
+            print(f"\n✗ Catalog load failed and was rolled back: {e}")
+            sys.exit(1)
+
+    print("\n✓ Dry run - nothing changed" if args.dry_run else "\n✓ Catalog loaded")
+
+
+if __name__ == "__main__":
+    main()
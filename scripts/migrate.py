@@ -0,0 +1,175 @@
+"""
+Database Migration Runner for Japan Trip Planner
+================================================
+Applies the SQL files in database/ that are listed in MIGRATIONS, in order,
+each in its own transaction, and records them in a schema_migrations table
+so every file runs once per database. The files themselves are written to be
+re-runnable too (IF NOT EXISTS / CREATE OR REPLACE), so applying one that was
+already run by hand in the SQL Editor is harmless.
+
+--explain prints the query plans for the dashboard's aggregate queries, to
+check they use the composite indexes rather than scanning whole tables.
+
+Setup:
+1. pip install "psycopg[binary]" python-dotenv
+2. Add DATABASE_URL to scripts/.env (Supabase Dashboard > Project Settings >
+   Database > Connection string, URI format)
+
+Usage:
+    python scripts/migrate.py                  # apply pending migrations
+    python scripts/migrate.py --status         # list applied/pending migrations
+    python scripts/migrate.py --explain        # print plans for the dashboard queries
+    python scripts/migrate.py --explain --analyze
+"""
+
+import os
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+
+try:
+    import psycopg
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print('pip install "psycopg[binary]" python-dotenv')
+    sys.exit(1)
+
+from trip_config import project_root
+
+# scripts/.env is loaded by trip_config
+DATABASE_URL = os.getenv('DATABASE_URL')
+DATABASE_DIR = project_root / "database"
+
+# Applied in this order. Earlier setup files (schema.sql, add_budget_table.sql, ...)
+# predate the runner and are applied by hand in the SQL Editor.
+MIGRATIONS = [
+    "add_avatar_options.sql",
+    "add_avatar_variants.sql",
+    "add_aggregate_views.sql",
+    "add_updated_at.sql",
+    "add_image_mirrors.sql",
+    "add_avatar_sprites.sql",
+    "add_budget_realtime.sql",
+]
+
+# Queries the dashboard runs against the aggregate views
+EXPLAIN_QUERIES = {
+    "attraction_vote_totals": "SELECT * FROM attraction_vote_totals",
+    "city_day_totals": "SELECT * FROM city_day_totals",
+    "user_progress": "SELECT * FROM user_progress",
+}
+
+
+def file_checksum(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def ensure_migrations_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            filename TEXT PRIMARY KEY,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+
+
+def applied_migrations(conn) -> dict:
+    """Return {filename: checksum} of migrations already recorded."""
+    rows = conn.execute("SELECT filename, checksum FROM schema_migrations").fetchall()
+    return dict(rows)
+
+
+def apply_migration(conn, filename: str):
+    """Run one migration file and record it, atomically."""
+    path = DATABASE_DIR / filename
+    with conn.transaction():
+        conn.execute(path.read_text())
+        conn.execute(
+            """
+            INSERT INTO schema_migrations (filename, checksum) VALUES (%s, %s)
+            ON CONFLICT (filename) DO UPDATE SET checksum = EXCLUDED.checksum, applied_at = NOW()
+            """,
+            (filename, file_checksum(path))
+        )
+
+
+def run_migrations(conn) -> int:
+    """Apply every pending migration. Returns the number applied."""
+    applied = applied_migrations(conn)
+    pending = [name for name in MIGRATIONS if name not in applied]
+
+    for name in MIGRATIONS:
+        if name in applied and applied[name] != file_checksum(DATABASE_DIR / name):
+            print(f"  ⚠ {name} changed since it was applied (not re-run)")
+
+    if not pending:
+        print("  Database is up to date")
+        return 0
+
+    for name in pending:
+        print(f"  Applying {name}...")
+        apply_migration(conn, name)
+        print(f"  ✓ {name}")
+    return len(pending)
+
+
+def print_status(conn):
+    applied = applied_migrations(conn)
+    for name in MIGRATIONS:
+        print(f"  {'✓ applied' if name in applied else '· pending'}  {name}")
+
+
+def explain_queries(conn, analyze: bool = False):
+    """Print the plan of each dashboard aggregate query."""
+    options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+    for name, query in EXPLAIN_QUERIES.items():
+        print("\n" + "-"*60)
+        print(f"  {name}: {query}")
+        print("-"*60)
+        for (line,) in conn.execute(f"EXPLAIN ({options}) {query}").fetchall():
+            print(f"  {line}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--explain", action="store_true",
+                        help="Print query plans for the dashboard aggregate views (after migrating)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="With --explain, run the queries (EXPLAIN ANALYZE) to show real timings")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Database Migrations")
+    print("="*60)
+
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL must be set in scripts/.env")
+        sys.exit(1)
+
+    # Autocommit, so each migration's transaction() block is a real, independent transaction
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        ensure_migrations_table(conn)
+
+        if args.status:
+            print_status(conn)
+            return
+
+        try:
+            run_migrations(conn)
+        except psycopg.Error as e:
+            print(f"\n✗ Migration failed and was rolled back: {e}")
+            sys.exit(1)
+
+        if args.explain:
+            explain_queries(conn, analyze=args.analyze)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Catalog Image Mirror for Japan Trip Planner
+===========================================
+Copies every city and attraction image from its third-party host
+(Unsplash, TripAdvisor, Contentstack, ...) into Supabase Storage, resized to
+the sizes the site actually shows and re-encoded as WebP:
+
+- card:     720 px wide (destination / attraction cards, dashboard lists)
+- expanded: 1600 px wide (the expanded destination view)
+
+Files are stored under content-addressed names (mirror/<sha256>.webp) in the
+public "images" bucket, so they can be cached forever. image_url is pointed
+at the card copy, image_variants records every size and image_source_url
+keeps the original URL (see database/add_image_mirrors.sql).
+
+Each source URL is fetched once per run, however many rows use it. Its
+ETag / Last-Modified are kept in scripts/.cache/image_mirror.json, so re-runs
+send conditional requests and only re-process images that changed. A source
+that fails (404, timeout, not an image) is reported and its rows are left
+as they are.
+
+Setup:
+1. pip install supabase python-dotenv Pillow requests
+2. Create a public "images" bucket (see database/storage_policies.sql)
+3. Apply database/add_image_mirrors.sql (python scripts/migrate.py)
+
+Usage:
+    python scripts/mirror_images.py                  # mirror new/changed images, rewrite URLs
+    python scripts/mirror_images.py --dry-run        # fetch and resize, but don't upload or write
+    python scripts/mirror_images.py --force          # ignore saved ETags and re-fetch everything
+    python scripts/mirror_images.py --table cities
+"""
+
+import io
+import os
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+    from PIL import Image, ImageOps
+    from supabase import create_client, Client
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install supabase python-dotenv Pillow requests")
+    sys.exit(1)
+
+from http_transfer import get_session, close_sessions
+from trip_config import script_dir
+
+# scripts/.env is loaded by trip_config
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+
+MIRROR_BUCKET = "images"
+MIRROR_PREFIX = "mirror"
+MANIFEST_PATH = Path(os.getenv("AVATAR_CACHE_DIR", script_dir / ".cache")) / "image_mirror.json"
+
+TABLES = ["cities", "attractions"]
+
+# Maximum width per size name: about twice the CSS box, for high-DPI screens
+MIRROR_SIZES = {"card": 720, "expanded": 1600}
+WEBP_QUALITY = 78
+# Content-addressed files never change, so they can be cached for a year
+MIRROR_CACHE_SECONDS = 31536000
+
+FETCH_TIMEOUT = (5, 30)                 # connect, read (seconds)
+MAX_SOURCE_BYTES = 30 * 1024 * 1024
+DEFAULT_CONCURRENCY = 6
+
+
+# ========================================
+# MANIFEST
+# ========================================
+
+def load_manifest() -> dict:
+    """{source_url: {"etag", "last_modified", "variants", "bytes", "checked_at"}}"""
+    if MANIFEST_PATH.exists():
+        try:
+            return json.loads(MANIFEST_PATH.read_text())
+        except (OSError, ValueError):
+            print("  Warning: manifest unreadable, re-fetching every image")
+    return {}
+
+
+def save_manifest(manifest: dict):
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+# ========================================
+# SOURCES
+# ========================================
+
+def fetch_rows(supabase: Client, table: str) -> list:
+    result = supabase.table(table).select("id, name, image_url, image_source_url, image_variants").execute()
+    return result.data or []
+
+
+def mirror_url_prefix() -> str:
+    return f"{SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{MIRROR_BUCKET}/"
+
+
+def source_url(row: dict) -> str:
+    """The third-party URL a row's image comes from, or None if there is nothing to mirror."""
+    url = row.get("image_source_url") or row.get("image_url")
+    if not url or not url.startswith(("http://", "https://")) or url.startswith(mirror_url_prefix()):
+        return None
+    return url
+
+
+def fetch_source(url: str, cached: dict = None) -> tuple:
+    """
+    GET a source image, conditionally when we have validators for it.
+    Returns (None, headers) for 304 Not Modified, else (body, headers).
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with get_session(url).get(url, headers=headers, stream=True, timeout=FETCH_TIMEOUT) as response:
+        if response.status_code == 304:
+            return None, response.headers
+        response.raise_for_status()
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            body += chunk
+            if len(body) > MAX_SOURCE_BYTES:
+                raise ValueError(f"image larger than {MAX_SOURCE_BYTES // (1024 * 1024)} MB")
+        return bytes(body), response.headers
+
+
+# ========================================
+# RESIZE AND STORE
+# ========================================
+
+def render_variants(data: bytes) -> dict:
+    """Resize a source image to every MIRROR_SIZES width (never upscaling). Returns {size: webp bytes}."""
+    source = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    source = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for name, width in MIRROR_SIZES.items():
+        image = source
+        if source.width > width:
+            image = source.resize((width, round(source.height * width / source.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+        variants[name] = buffer.getvalue()
+    return variants
+
+
+def mirror_key(data: bytes) -> str:
+    return f"{MIRROR_PREFIX}/{hashlib.sha256(data).hexdigest()[:32]}.webp"
+
+
+def upload_variant(supabase: Client, data: bytes) -> str:
+    """Store one WebP under its content-addressed key and return its public URL."""
+    key = mirror_key(data)
+    supabase.storage.from_(MIRROR_BUCKET).upload(
+        path=key,
+        file=data,
+        file_options={
+            "content-type": "image/webp",
+            "cache-control": str(MIRROR_CACHE_SECONDS),
+            "upsert": "true",
+        }
+    )
+    return supabase.storage.from_(MIRROR_BUCKET).get_public_url(key)
+
+
+def mirror_source(supabase: Client, url: str, cached: dict = None, dry_run: bool = False) -> dict:
+    """
+    Mirror one source URL. Returns its new manifest entry, with "status" set to
+    "mirrored" or "not_modified".
+    """
+    data, headers = fetch_source(url, cached)
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    if data is None:
+        return {**cached, "checked_at": now, "status": "not_modified"}
+
+    variants = render_variants(data)
+    if dry_run:
+        urls = {name: None for name in variants}
+    else:
+        urls = {name: upload_variant(supabase, body) for name, body in variants.items()}
+
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "variants": urls,
+        "bytes": {"source": len(data), **{name: len(body) for name, body in variants.items()}},
+        "checked_at": now,
+        "status": "mirrored",
+    }
+
+
+def mirror_all(supabase: Client, sources: list, manifest: dict, force: bool = False,
+               dry_run: bool = False, concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """Mirror every source URL in parallel. Returns {url: entry or Exception}."""
+    def work(url):
+        cached = None if force else manifest.get(url)
+        # Without stored URLs a 304 would be useless, so only revalidate complete entries
+        if cached and not all((cached.get("variants") or {}).get(name) for name in MIRROR_SIZES):
+            cached = None
+        try:
+            return url, mirror_source(supabase, url, cached, dry_run)
+        except (requests.RequestException, OSError, ValueError) as e:
+            return url, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(pool.map(work, sources))
+
+
+# ========================================
+# DATABASE
+# ========================================
+
+def plan_row_updates(rows: list, results: dict) -> list:
+    """Rows whose image columns need to point at (new) mirrored copies."""
+    updates = []
+    for row in rows:
+        url = source_url(row)
+        entry = results.get(url)
+        if url is None or not isinstance(entry, dict) or not entry["variants"].get("card"):
+            continue
+        variants = entry["variants"]
+        if (row["image_url"] != variants["card"] or row.get("image_variants") != variants
+                or row.get("image_source_url") != url):
+            updates.append({
+                "id": row["id"],
+                "name": row["name"],
+                "image_url": variants["card"],
+                "image_source_url": url,
+                "image_variants": variants,
+            })
+    return updates
+
+
+def save_row_updates(supabase: Client, table: str, updates: list) -> int:
+    """Write all of a table's image changes in one upsert keyed on id."""
+    if not updates:
+        return 0
+    result = supabase.table(table).upsert(updates, on_conflict="id").execute()
+    return len(result.data or [])
+
+
+def print_results(results: dict):
+    for url, entry in results.items():
+        short = url if len(url) <= 70 else url[:67] + "..."
+        if isinstance(entry, Exception):
+            print(f"  ✗ {short}\n      {type(entry).__name__}: {str(entry)[:120]}")
+        elif entry["status"] == "not_modified":
+            print(f"  = {short}")
+        else:
+            sizes = entry["bytes"]
+            print(f"  ✓ {short}\n      {sizes['source'] / 1024:.0f} KB -> "
+                  + ", ".join(f"{name} {sizes[name] / 1024:.0f} KB" for name in MIRROR_SIZES))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror and resize city/attraction images into Supabase Storage")
+    parser.add_argument("--table", choices=TABLES + ["all"], default="all")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Fetch and resize, but don't upload, write the tables or update the manifest")
+    parser.add_argument("--force", action="store_true", help="Ignore saved ETag/Last-Modified and re-fetch")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Parallel downloads (default: {DEFAULT_CONCURRENCY})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Catalog Image Mirror")
+    print("="*60)
+
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
+        sys.exit(1)
+
+    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    tables = TABLES if args.table == "all" else [args.table]
+    rows = {table: fetch_rows(supabase, table) for table in tables}
+
+    # Each distinct source once, however many rows share it
+    sources = list(dict.fromkeys(
+        url for table_rows in rows.values() for url in map(source_url, table_rows) if url
+    ))
+    print(f"  {sum(len(r) for r in rows.values())} rows, {len(sources)} distinct source images\n")
+
+    manifest = load_manifest()
+    try:
+        results = mirror_all(supabase, sources, manifest, force=args.force,
+                             dry_run=args.dry_run, concurrency=args.concurrency)
+    finally:
+        close_sessions()
+    print_results(results)
+
+    failed = [url for url, entry in results.items() if isinstance(entry, Exception)]
+    mirrored = sum(1 for e in results.values() if isinstance(e, dict) and e["status"] == "mirrored")
+    print(f"\n  Mirrored: {mirrored} | Not modified: {len(results) - mirrored - len(failed)} | Failed: {len(failed)}")
+
+    if args.dry_run:
+        return
+
+    for url, entry in results.items():
+        if isinstance(entry, dict):
+            manifest[url] = {k: v for k, v in entry.items() if k != "status"}
+    save_manifest(manifest)
+
+    for table in tables:
+        updates = plan_row_updates(rows[table], results)
+        written = save_row_updates(supabase, table, updates)
+        print(f"  ✓ {table}: {written} row(s) now use mirrored images")
+
+    if failed:
+        print(f"\n⚠ {len(failed)} source image(s) could not be fetched; those rows keep their current URL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""
+Itinerary Route Planner for Japan Trip Planner
+==============================================
+Turns the group's plans into an ordered route and a day-by-day schedule:
+
+- which cities to visit and in what order, starting from the arrival city
+  and ending at the departure city
+- how many days to spend in each, within the chosen trip length
+- which attractions to see on which day
+
+Inputs are the group's user_city_days rows (how many days each person wants
+in each city), the attraction vote scores and attractions.time_estimate.
+Travel times and fares come from a city-to-city matrix built from
+TRAVEL_LEGS (direct rail/bus/ferry/air links) by an all-pairs shortest-path
+pass, cached in scripts/.cache/travel_matrix.json until the legs change.
+
+Solving:
+- Each city is worth the person-days the group asked for there, plus
+  VOTE_DAY_WEIGHT per net upvote of its attractions, and needs the group's
+  average requested days. Travel costs every traveler its share of a day.
+- The fastest visiting order for every subset of candidate cities comes
+  from one exact Held-Karp DP, memoized per candidate set, so it only
+  reruns when the set of requested cities changes. Choosing the best subset
+  that fits the trip is then one vectorized pass over those subsets.
+- Stays at the arrival and departure cities are capped to the trip length,
+  and stays that still run over lose days from the least value per day
+  first. Spare days go to the cities with the most value per day;
+  attractions are packed into each stay's days, highest score first.
+  Stays are memoized by their inputs, so after a single vote only that
+  city is re-packed and a re-solve takes milliseconds.
+
+The result is published as a small JSON artifact next to the dashboard
+snapshot (dashboard/route-v1.json) for the dashboard's Suggested Route card.
+
+Usage:
+    python scripts/route_planner.py                          # load from Supabase, publish
+    python scripts/route_planner.py --dry-run                # print the plan only
+    python scripts/route_planner.py --days 10 --end Osaka    # open-jaw 10-day trip
+    python scripts/route_planner.py --input plan.json --output route.json --dry-run
+    python scripts/route_planner.py --dry-run --benchmark    # time a re-solve after one vote
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from functools import lru_cache
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+    from supabase import create_client, Client
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install numpy supabase python-dotenv")
+    sys.exit(1)
+
+from build_dashboard_snapshot import fetch_table, publish_artifact, ARTIFACT_BUCKET
+from trip_config import TRIP_CONFIG, script_dir
+
+# scripts/.env is loaded by trip_config
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+
+MATRIX_PATH = Path(os.getenv("AVATAR_CACHE_DIR", script_dir / ".cache")) / "travel_matrix.json"
+
+DEFAULT_TRIP_LENGTH = TRIP_CONFIG["defaultTripLength"]
+MIN_TRIP_LENGTH = TRIP_CONFIG["minTripLength"]
+MAX_TRIP_LENGTH = TRIP_CONFIG["maxTripLength"]
+ARRIVAL_CITY = "Tokyo"
+DEPARTURE_CITY = "Tokyo"
+
+# Direct links: (city, city, minutes, yen one way per person). Times are
+# door to door between central stations, including transfers and ferries;
+# anything not listed is reached through the other cities.
+TRAVEL_LEGS = [
+    ("Tokyo", "Kyoto", 140, 14170),
+    ("Tokyo", "Osaka", 160, 14720),
+    ("Tokyo", "Hakone", 90, 2470),
+    ("Tokyo", "Nikko", 120, 2900),
+    ("Tokyo", "Kanazawa", 160, 14380),
+    ("Tokyo", "Okinawa", 270, 25000),
+    ("Kyoto", "Osaka", 30, 580),
+    ("Kyoto", "Nara", 50, 720),
+    ("Kyoto", "Hakone", 170, 12900),
+    ("Kyoto", "Kanazawa", 140, 7790),
+    ("Kyoto", "Hiroshima", 115, 11620),
+    ("Osaka", "Nara", 50, 820),
+    ("Osaka", "Hiroshima", 100, 10620),
+    ("Osaka", "Koyasan", 110, 1390),
+    ("Osaka", "Naoshima", 150, 7000),
+    ("Osaka", "Okinawa", 240, 20000),
+    ("Hiroshima", "Miyajima", 55, 620),
+    ("Hiroshima", "Naoshima", 130, 7500),
+    ("Kanazawa", "Shirakawa-go", 80, 2600),
+]
+
+DAY_MINUTES = 600                   # sightseeing time in a day
+DEFAULT_ATTRACTION_MINUTES = 120    # attractions without a time estimate
+VOTE_DAY_WEIGHT = 0.25              # person-days a net upvote is worth
+
+ARTIFACT_VERSION = 1
+ARTIFACT_KEY = f"route-v{ARTIFACT_VERSION}.json"
+
+
+# ========================================
+# TRAVEL MATRIX
+# ========================================
+
+def legs_fingerprint(legs: list) -> str:
+    return hashlib.md5(json.dumps(sorted(legs)).encode()).hexdigest()
+
+
+def build_travel_matrix(legs: list) -> dict:
+    """
+    All-pairs fastest travel times (and the fares along them) from the direct
+    legs, by Floyd-Warshall over NumPy arrays. Unreachable pairs are -1.
+    """
+    cities = sorted({c for leg in legs for c in leg[:2]})
+    index = {c: i for i, c in enumerate(cities)}
+    n = len(cities)
+    minutes = np.full((n, n), np.inf)
+    yen = np.zeros((n, n))
+    np.fill_diagonal(minutes, 0)
+    for a, b, mins, fare in legs:
+        for i, j in ((index[a], index[b]), (index[b], index[a])):
+            if mins < minutes[i, j]:
+                minutes[i, j], yen[i, j] = mins, fare
+
+    for k in range(n):
+        via = minutes[:, k, None] + minutes[None, k, :]
+        better = via < minutes
+        minutes = np.where(better, via, minutes)
+        yen = np.where(better, yen[:, k, None] + yen[None, k, :], yen)
+
+    reachable = np.isfinite(minutes)
+    return {
+        "fingerprint": legs_fingerprint(legs),
+        "cities": cities,
+        "minutes": np.where(reachable, minutes, -1).astype(int).tolist(),
+        "yen": np.where(reachable, yen, -1).astype(int).tolist(),
+    }
+
+
+def load_travel_matrix(legs: list = TRAVEL_LEGS, path: Path = MATRIX_PATH) -> dict:
+    """The cached matrix, rebuilt when TRAVEL_LEGS has changed since it was written."""
+    if path.exists():
+        try:
+            matrix = json.loads(path.read_text())
+            if matrix.get("fingerprint") == legs_fingerprint(legs):
+                return matrix
+        except (OSError, ValueError):
+            pass
+    matrix = build_travel_matrix(legs)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".part")
+    partial.write_text(json.dumps(matrix))
+    os.replace(partial, path)
+    return matrix
+
+
+# ========================================
+# LOADING
+# ========================================
+
+def fetch_plan_data(supabase: Client) -> dict:
+    """Read only the columns the planner needs."""
+    return {
+        "cities": fetch_table(supabase, "cities", "id, name", order="name"),
+        "user_city_days": fetch_table(supabase, "user_city_days", "id, user_id, city_id, days"),
+        "attractions": fetch_table(supabase, "attractions", "id, name, city_id, time_estimate", order="name"),
+        "votes": fetch_table(supabase, "attraction_votes", "id, attraction_id, vote"),
+    }
+
+
+def load_plan_file(path: Path) -> dict:
+    """Planner input from a JSON file with the same keys as fetch_plan_data()."""
+    return json.loads(Path(path).read_text())
+
+
+@lru_cache(maxsize=None)
+def estimate_minutes(time_estimate: str) -> int:
+    """Midpoint of a time_estimate like "2–4 hrs" or "1.5 hrs"; "Overnight" fills a day."""
+    if not time_estimate:
+        return DEFAULT_ATTRACTION_MINUTES
+    text = time_estimate.lower()
+    if "half day" in text:
+        return DAY_MINUTES // 2
+    if "overnight" in text or "day" in text:
+        return DAY_MINUTES
+    hours = [float(h) for h in re.findall(r"\d+(?:\.\d+)?", time_estimate)]
+    if not hours:
+        return DEFAULT_ATTRACTION_MINUTES
+    return min(DAY_MINUTES, round(sum(hours) / len(hours) * 60))
+
+
+def summarize_plan(data: dict) -> dict:
+    """
+    Per-city demand and attractions from the raw rows:
+    {"travelers", "cities": {name: {"id", "total_days", "user_count", "attractions": [...]}}}
+    """
+    names = {c["id"]: c["name"] for c in data["cities"]}
+    scores = {}
+    for v in data["votes"]:
+        scores[v["attraction_id"]] = scores.get(v["attraction_id"], 0) + v["vote"]
+
+    cities = {c["name"]: {"id": c["id"], "total_days": 0, "user_count": 0, "attractions": []}
+              for c in data["cities"]}
+    travelers = set()
+    for row in data["user_city_days"]:
+        if row["days"] > 0 and row["city_id"] in names:
+            city = cities[names[row["city_id"]]]
+            city["total_days"] += row["days"]
+            city["user_count"] += 1
+            travelers.add(row["user_id"])
+    for a in data["attractions"]:
+        if a.get("city_id") in names:
+            cities[names[a["city_id"]]]["attractions"].append({
+                "id": a["id"], "name": a["name"],
+                "minutes": estimate_minutes(a.get("time_estimate")),
+                "score": scores.get(a["id"], 0),
+            })
+    return {"travelers": max(1, len(travelers)), "cities": cities}
+
+
+# ========================================
+# SOLVER
+# ========================================
+
+def held_karp(minutes: list, start: int, end: int, middle: tuple) -> list:
+    """
+    Fastest path start -> every city of a subset of `middle` -> end, for
+    every subset at once. Returns [(minutes, order)] indexed by subset bitmask.
+    """
+    n = len(middle)
+    inf = float("inf")
+    best = [[inf] * n for _ in range(1 << n)]
+    parent = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        best[1 << j][j] = minutes[start][middle[j]]
+    for mask in range(1, 1 << n):
+        row = best[mask]
+        for j in range(n):
+            if row[j] == inf:
+                continue
+            from_j = minutes[middle[j]]
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                nxt = mask | (1 << k)
+                candidate = row[j] + from_j[middle[k]]
+                if candidate < best[nxt][k]:
+                    best[nxt][k] = candidate
+                    parent[nxt][k] = j
+
+    paths = [(minutes[start][end], ())]
+    for mask in range(1, 1 << n):
+        total, last = min((best[mask][j] + minutes[middle[j]][end], j) for j in range(n) if mask & (1 << j))
+        order, m, j = [], mask, last
+        while j != -1:
+            order.append(middle[j])
+            m, j = m & ~(1 << j), parent[m][j]
+        paths.append((total, tuple(reversed(order))))
+    return paths
+
+
+@lru_cache(maxsize=None)
+def _pack_stay(day_minutes: tuple, attractions: tuple) -> tuple:
+    """
+    First-fit the attractions (already best first) into the stay's days.
+    Returns (per-day tuples of attraction indexes, unscheduled indexes).
+    """
+    free = list(day_minutes)
+    days = [[] for _ in free]
+    unscheduled = []
+    for i, (_, _, mins, _) in enumerate(attractions):
+        day = next((d for d, left in enumerate(free) if left >= mins), None)
+        if day is None:
+            unscheduled.append(i)
+            continue
+        free[day] -= mins
+        days[day].append(i)
+    return tuple(tuple(d) for d in days), tuple(unscheduled)
+
+
+def trim_stays(stay: dict, demand: dict, trip_length: int) -> dict:
+    """
+    Take days from the stays with the least value per day until they total
+    at most trip_length, keeping every city at least one day.
+    """
+    stay = dict(stay)
+    while sum(stay.values()) > trip_length:
+        pick = min((c for c in stay if stay[c] > 1), key=lambda c: demand[c]["value"] / stay[c], default=None)
+        if pick is None:
+            break
+        stay[pick] -= 1
+    return stay
+
+
+class RoutePlanner:
+    """Solves routes over one travel matrix, memoizing the DP per candidate set."""
+
+    def __init__(self, matrix: dict):
+        self.cities = matrix["cities"]
+        self.index = {c: i for i, c in enumerate(self.cities)}
+        self.minutes = matrix["minutes"]
+        self.yen = matrix["yen"]
+        self._routes = lru_cache(maxsize=64)(self._route_table)
+
+    def _route_table(self, start: int, end: int, middle: tuple) -> tuple:
+        """Held-Karp paths plus a subsets x cities membership matrix for vectorized scoring."""
+        paths = held_karp(self.minutes, start, end, middle)
+        masks = np.arange(1 << len(middle))[:, None]
+        members = ((masks >> np.arange(len(middle))[None, :]) & 1).astype(bool)
+        travel = np.array([p[0] for p in paths], dtype=float)
+        return paths, members, travel
+
+    def solve(self, summary: dict, trip_length: int = DEFAULT_TRIP_LENGTH,
+              start: str = ARRIVAL_CITY, end: str = DEPARTURE_CITY) -> dict:
+        travelers = summary["travelers"]
+        skipped = []
+        demand = {}
+        for name, city in summary["cities"].items():
+            if city["total_days"] <= 0:
+                continue
+            if name not in self.index or self.minutes[self.index[start]][self.index[name]] < 0:
+                skipped.append({"city": name, "reason": "no travel data"})
+                continue
+            upvotes = sum(max(0, a["score"]) for a in city["attractions"])
+            demand[name] = {
+                "days": max(1, round(city["total_days"] / travelers)),
+                "value": city["total_days"] + VOTE_DAY_WEIGHT * upvotes,
+            }
+
+        s, e = self.index[start], self.index[end]
+        middle = tuple(sorted(self.index[c] for c in demand if c not in (start, end)))
+        paths, members, travel = self._routes(s, e, middle)
+        names = [self.cities[i] for i in middle]
+        # The arrival and departure cities are in every route, so their stays are capped to the trip
+        fixed = trim_stays({c: demand[c]["days"] for c in dict.fromkeys((start, end)) if c in demand},
+                           demand, trip_length)
+
+        # Score every subset at once: requested value minus every traveler's share of the travel time
+        days = members @ np.array([demand[c]["days"] for c in names], dtype=float) + sum(fixed.values())
+        value = members @ np.array([demand[c]["value"] for c in names], dtype=float) \
+            + sum(demand[c]["value"] for c in fixed)
+        score = np.where(days <= trip_length, value - travelers * travel / DAY_MINUTES, -np.inf)
+        best = int(score.argmax())
+        if score[best] == -np.inf:
+            raise ValueError(f"the stays in {' and '.join(fixed)} alone take {sum(fixed.values())} days, "
+                             f"more than the {trip_length}-day trip")
+        order = paths[best][1]
+
+        route = list(dict.fromkeys([start, *(self.cities[i] for i in order), *fixed]))
+        for name in names:
+            if name not in route:
+                skipped.append({"city": name, "reason": "doesn't fit the trip"})
+
+        stay = {c: fixed.get(c, demand[c]["days"]) if c in demand else 0 for c in route}
+        if not any(stay.values()):
+            stay[route[0]] = 1
+        # Spare days go to the city with the most value per day already allotted (D'Hondt)
+        for _ in range(trip_length - sum(stay.values())):
+            pick = max((c for c in route if c in demand),
+                       key=lambda c: demand[c]["value"] / (stay[c] + 1), default=route[0])
+            stay[pick] += 1
+        stay = trim_stays(stay, demand, trip_length)
+        return self._schedule(summary, route, stay, end, trip_length, travelers, skipped)
+
+    def _leg(self, a: str, b: str) -> dict:
+        i, j = self.index[a], self.index[b]
+        return {"from": a, "to": b, "minutes": self.minutes[i][j], "yen": self.yen[i][j]}
+
+    def _schedule(self, summary, route, stay, end, trip_length, travelers, skipped) -> dict:
+        stops, schedule, unscheduled = [], [], []
+        day_number = 1
+        previous = route[0]
+        visits = [c for c in route if stay[c] > 0]
+        for n, city in enumerate(visits):
+            arrival = self._leg(previous, city) if previous != city else None
+            departure = self._leg(city, end) if n == len(visits) - 1 and city != end else None
+            day_minutes = [DAY_MINUTES] * stay[city]
+            day_minutes[0] -= arrival["minutes"] if arrival else 0
+            day_minutes[-1] -= departure["minutes"] if departure else 0
+            day_minutes = tuple(max(0, m) for m in day_minutes)
+
+            attractions = tuple(sorted(
+                ((a["id"], a["name"], a["minutes"], a["score"]) for a in summary["cities"][city]["attractions"]
+                 if a["score"] >= 0),
+                key=lambda a: (-a[3], a[2], a[1])))
+            packed, left = _pack_stay(day_minutes, attractions)
+
+            stops.append({"city": city, "city_id": summary["cities"][city]["id"], "days": stay[city],
+                          "first_day": day_number, "last_day": day_number + stay[city] - 1, "arrive": arrival})
+            for d, indexes in enumerate(packed):
+                schedule.append({
+                    "day": day_number + d,
+                    "city": city,
+                    "travel": arrival if d == 0 else (departure if d == stay[city] - 1 else None),
+                    "free_minutes": day_minutes[d] - sum(attractions[i][2] for i in indexes),
+                    "attractions": [{"id": attractions[i][0], "name": attractions[i][1],
+                                     "minutes": attractions[i][2], "score": attractions[i][3]} for i in indexes],
+                })
+            unscheduled += [attractions[i][1] for i in left if attractions[i][3] > 0]
+            day_number += stay[city]
+            previous = city
+
+        departure = self._leg(previous, end) if previous != end else None
+        legs = [stop["arrive"] for stop in stops if stop["arrive"]] + ([departure] if departure else [])
+        return {
+            "trip_length": trip_length,
+            "travelers": travelers,
+            "start": route[0],
+            "end": end,
+            "travel_minutes": int(sum(leg["minutes"] for leg in legs)),
+            "travel_yen": int(sum(leg["yen"] for leg in legs)),
+            "stops": stops,
+            "departure": departure,
+            "days": schedule,
+            "skipped_cities": skipped,
+            "unscheduled": unscheduled,
+        }
+
+
+def build_artifact(plan: dict) -> dict:
+    """The versioned document the front end reads."""
+    return {
+        "version": ARTIFACT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **plan,
+    }
+
+
+# ========================================
+# OUTPUT
+# ========================================
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60}h{minutes % 60:02d}"
+
+
+def print_plan(plan: dict):
+    print(f"  {plan['trip_length']} days, {plan['travelers']} travelers, "
+          f"{plan['start']} -> {plan['end']}, {format_minutes(plan['travel_minutes'])} travel, "
+          f"¥{plan['travel_yen']:,} per person")
+    print(f"\n  {'Days':<7} {'City':<14} {'Arrive':>7}")
+    for stop in plan["stops"]:
+        days = f"{stop['first_day']}-{stop['last_day']}" if stop["days"] > 1 else str(stop["first_day"])
+        arrive = format_minutes(stop["arrive"]["minutes"]) if stop["arrive"] else ""
+        print(f"  {days:<7} {stop['city']:<14} {arrive:>7}")
+    if plan["departure"]:
+        print(f"  {'':<7} {plan['end']:<14} {format_minutes(plan['departure']['minutes']):>7}  (departure)")
+
+    print()
+    for day in plan["days"]:
+        names = ", ".join(a["name"] for a in day["attractions"]) or "free"
+        print(f"  Day {day['day']:>2}  {day['city']:<12} {names}")
+    for skipped in plan["skipped_cities"]:
+        print(f"  ⚠ Skipped {skipped['city']}: {skipped['reason']}")
+    if plan["unscheduled"]:
+        print(f"  ⚠ No time for: {', '.join(plan['unscheduled'])}")
+
+
+def benchmark_vote_change(planner: RoutePlanner, summary: dict, args) -> float:
+    """Milliseconds to re-solve after one upvote on the first attraction, with warm caches."""
+    for city in summary["cities"].values():
+        if city["attractions"]:
+            city["attractions"][0]["score"] += 1
+            break
+    started = time.perf_counter()
+    planner.solve(summary, args.days, args.start, args.end)
+    return (time.perf_counter() - started) * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plan the group's city route and daily schedule")
+    parser.add_argument("--days", type=int, default=DEFAULT_TRIP_LENGTH,
+                        help=f"Trip length ({MIN_TRIP_LENGTH}-{MAX_TRIP_LENGTH}, default: {DEFAULT_TRIP_LENGTH})")
+    parser.add_argument("--start", default=ARRIVAL_CITY, help=f"Arrival city (default: {ARRIVAL_CITY})")
+    parser.add_argument("--end", default=DEPARTURE_CITY, help=f"Departure city (default: {DEPARTURE_CITY})")
+    parser.add_argument("--input", metavar="PATH",
+                        help="Read cities, user_city_days, attractions and votes from a JSON file instead of Supabase")
+    parser.add_argument("--output", metavar="PATH", help="Also write the artifact JSON to a local file")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without publishing")
+    parser.add_argument("--benchmark", action="store_true", help="Also time a re-solve after one vote change")
+    args = parser.parse_args(argv)
+    if not MIN_TRIP_LENGTH <= args.days <= MAX_TRIP_LENGTH:
+        parser.error(f"--days must be between {MIN_TRIP_LENGTH} and {MAX_TRIP_LENGTH}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("  Itinerary Route Planner")
+    print("="*60)
+
+    matrix = load_travel_matrix()
+    for city in (args.start, args.end):
+        if city not in matrix["cities"]:
+            print(f"Error: no travel data for {city} (add it to TRAVEL_LEGS)")
+            sys.exit(1)
+
+    supabase = None
+    if not args.input or not args.dry_run:
+        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+            print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
+            sys.exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    data = load_plan_file(args.input) if args.input else fetch_plan_data(supabase)
+    summary = summarize_plan(data)
+    planner = RoutePlanner(matrix)
+    started = time.perf_counter()
+    try:
+        plan = planner.solve(summary, args.days, args.start, args.end)
+    except ValueError as e:
+        print(f"Error: nothing fits the trip: {e}")
+        sys.exit(1)
+    solve_ms = (time.perf_counter() - started) * 1000
+
+    artifact = build_artifact(plan)
+    body = json.dumps(artifact, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    print_plan(plan)
+    print(f"\n  Solved in {solve_ms:.1f} ms")
+    if args.benchmark:
+        print(f"  Re-solved after one vote change in {benchmark_vote_change(planner, summary, args):.2f} ms")
+
+    if args.output:
+        Path(args.output).write_bytes(body)
+        print(f"\n  Written to {args.output}")
+
+    if args.dry_run:
+        return
+
+    try:
+        url = publish_artifact(supabase, ARTIFACT_KEY, body)
+        print(f"\n✓ Published {ARTIFACT_BUCKET}/{ARTIFACT_KEY}")
+        print(f"  {url}")
+    except Exception as e:
+        print(f"\n✗ Could not publish artifact: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
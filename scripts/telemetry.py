@@ -0,0 +1,189 @@
+"""
+Pipeline Telemetry
+==================
+Lightweight span tracing for the avatar scripts.
+
+Every instrumented call (analyze_photo, generate_avatar, download_image,
+upload_to_supabase, clear_bucket, database reads/writes, ...) records one
+span with its duration, bytes in/out, outcome and estimated API cost.
+Spans are appended to a JSON-lines trace file as they finish, and
+print_summary() renders p50/p95 per stage plus totals per user at the end
+of a run.
+
+Usage:
+    from telemetry import tracer
+
+    tracer.start("generate", trace_path)
+    with tracer.context(user="Julian"):
+        with tracer.span("generate_avatar") as span:
+            ...
+            span["bytes_in"] = len(payload)
+            span["cost_usd"] = 0.04
+    tracer.print_summary()
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+TRACE_DIR = Path(os.getenv("AVATAR_CACHE_DIR", Path(__file__).parent / ".cache")) / "traces"
+
+# Estimated list prices (USD) used for per-call cost estimates
+COST_DALLE3_STANDARD_1024 = 0.04
+COST_GPT4O_INPUT_PER_TOKEN = 2.50 / 1_000_000
+COST_GPT4O_OUTPUT_PER_TOKEN = 10.00 / 1_000_000
+
+
+def chat_cost(usage) -> float:
+    """Estimated cost of a chat completion from its usage block."""
+    if not usage:
+        return 0.0
+    return (usage.prompt_tokens * COST_GPT4O_INPUT_PER_TOKEN
+            + usage.completion_tokens * COST_GPT4O_OUTPUT_PER_TOKEN)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """Collects spans in memory and streams them to a JSONL file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = []
+        self.file = None
+        self.run = None
+        self.path = None
+
+    def start(self, run: str, path: Path = None):
+        """Begin a traced run. Spans are written to `path` (default: .cache/traces/<run>-<time>.jsonl)."""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = Path(path) if path else TRACE_DIR / f"{run}-{stamp}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.run = run
+        self.spans = []
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    @contextmanager
+    def context(self, **attrs):
+        """Attach attributes (e.g. user=...) to every span opened on this thread inside the block."""
+        previous = getattr(self.local, "attrs", {})
+        self.local.attrs = {**previous, **attrs}
+        try:
+            yield
+        finally:
+            self.local.attrs = previous
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """
+        Time a block. The yielded dict can be filled in with bytes_in, bytes_out,
+        cost_usd or any other attribute before the block ends.
+        """
+        record = {
+            "stage": stage,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "cost_usd": 0.0,
+            **getattr(self.local, "attrs", {}),
+            **attrs,
+        }
+        started = time.perf_counter()
+        try:
+            yield record
+            record.setdefault("ok", True)
+        except BaseException as e:
+            record["ok"] = False
+            record["error"] = str(e)[:200]
+            raise
+        finally:
+            record["duration_s"] = round(time.perf_counter() - started, 4)
+            self._emit(record)
+
+    def event(self, stage: str, **attrs):
+        """Record an instantaneous event, such as a retry."""
+        self._emit({"stage": stage, "duration_s": 0.0, "bytes_in": 0, "bytes_out": 0, "cost_usd": 0.0,
+                    "ok": True, **getattr(self.local, "attrs", {}), **attrs})
+
+    def counted(self, chunks, record: dict, field: str = "bytes_in"):
+        """Pass chunks through while adding their sizes to record[field]."""
+        for chunk in chunks:
+            record[field] += len(chunk)
+            yield chunk
+
+    def _emit(self, record: dict):
+        record["ts"] = datetime.now(timezone.utc).isoformat()
+        record["run"] = self.run
+        with self.lock:
+            self.spans.append(record)
+            if self.file:
+                self.file.write(json.dumps(record, default=str) + "\n")
+                self.file.flush()
+
+    def print_summary(self):
+        """Print p50/p95 per stage and totals per user."""
+        with self.lock:
+            spans = list(self.spans)
+        if not spans:
+            return
+
+        print("\n" + "="*60)
+        print("  TIMING SUMMARY")
+        print("="*60)
+        print(f"  {'Stage':<22}{'Calls':>6}{'Fail':>6}{'Retry':>6}{'p50 s':>8}{'p95 s':>8}{'MB in':>8}{'MB out':>8}{'$':>7}")
+
+        stages = {}
+        for s in spans:
+            stages.setdefault(s["stage"], []).append(s)
+        retries = {}
+        for s in stages.pop("retry", []):
+            retries[s.get("of", "?")] = retries.get(s.get("of", "?"), 0) + 1
+
+        for stage, items in stages.items():
+            durations = [s["duration_s"] for s in items]
+            print(f"  {stage:<22}{len(items):>6}{sum(1 for s in items if not s.get('ok')):>6}"
+                  f"{retries.get(stage, 0):>6}"
+                  f"{percentile(durations, 50):>8.2f}{percentile(durations, 95):>8.2f}"
+                  f"{sum(s['bytes_in'] for s in items) / 1e6:>8.2f}"
+                  f"{sum(s['bytes_out'] for s in items) / 1e6:>8.2f}"
+                  f"{sum(s['cost_usd'] for s in items):>7.2f}")
+
+        users = {}
+        for s in spans:
+            if s.get("user") and s["stage"] != "retry":
+                totals = users.setdefault(s["user"], {"seconds": 0.0, "bytes": 0, "cost": 0.0, "calls": 0})
+                totals["seconds"] += s["duration_s"]
+                totals["bytes"] += s["bytes_in"] + s["bytes_out"]
+                totals["cost"] += s["cost_usd"]
+                totals["calls"] += 1
+        if users:
+            print(f"\n  {'User':<14}{'Calls':>6}{'Busy s':>9}{'MB':>8}{'$':>7}")
+            for user, t in users.items():
+                print(f"  {user:<14}{t['calls']:>6}{t['seconds']:>9.1f}{t['bytes'] / 1e6:>8.2f}{t['cost']:>7.2f}")
+
+        total_cost = sum(s["cost_usd"] for s in spans)
+        print(f"\n  Estimated API cost: ${total_cost:.2f}")
+        if self.path:
+            print(f"  Trace: {self.path}")
+
+
+# Shared tracer used by all avatar scripts
+tracer = Tracer()
@@ -0,0 +1,111 @@
+"""
+Shared Trip Configuration for the Scripts
+=========================================
+One place for the settings the scripts share with the website:
+
+- scripts/.env is loaded once, on first import, so every script reads the
+  same credentials whichever directory it is run from
+- TEAM_ROSTER / TEAM_MEMBERS come from TRIP_CONFIG.teamMembers in
+  js/config.js, the roster the site itself uses, instead of a copy per script
+
+js_constant() reads a `const NAME = {...};` object or array literal out of
+a front-end file (comments, single-quoted strings, unquoted keys and
+trailing commas are fine), so other front-end tables can be shared the same
+way. Only plain literals are supported: no expressions or references.
+
+This module is deliberately cheap to import (standard library and dotenv),
+so inspection commands don't pay for the API SDKs.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("pip install python-dotenv")
+    sys.exit(1)
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+CONFIG_JS = project_root / "js" / "config.js"
+
+load_dotenv(script_dir / ".env")
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,])
+""", re.VERBOSE | re.DOTALL)
+_KEYWORDS = {"true": True, "false": False, "null": None, "undefined": None}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+
+def _unquote(token: str) -> str:
+    def escape(match):
+        char = match.group(1)
+        if char[0] == "u":
+            return chr(int(char[1:], 16))
+        return _ESCAPES.get(char, char)
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)", escape, token[1:-1], flags=re.DOTALL)
+
+
+def _tokens(source: str, start: int):
+    pos = start
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if not match:
+            raise ValueError(f"Unsupported JavaScript at offset {pos}: {source[pos:pos + 30]!r}")
+        pos = match.end()
+        if match.lastgroup != "space":
+            yield match.lastgroup, match.group()
+
+
+def _parse(tokens, kind: str, text: str):
+    if kind == "string":
+        return _unquote(text)
+    if kind == "number":
+        return int(text) if re.fullmatch(r"-?\d+", text) else float(text)
+    if kind == "name" and text in _KEYWORDS:
+        return _KEYWORDS[text]
+    if text == "[":
+        items = []
+        for kind, text in tokens:
+            if text == "]":
+                return items
+            if text == ",":
+                continue
+            items.append(_parse(tokens, kind, text))
+    if text == "{":
+        result = {}
+        for kind, text in tokens:
+            if text == "}":
+                return result
+            if text == ",":
+                continue
+            key = _unquote(text) if kind == "string" else text
+            if next(tokens)[1] != ":":
+                raise ValueError(f"Expected ':' after key {key!r}")
+            result[key] = _parse(tokens, *next(tokens))
+    raise ValueError(f"Unsupported JavaScript value: {text!r}")
+
+
+def js_constant(path: Path, name: str):
+    """The value of `const <name> = <literal>;` in a JavaScript file, as Python data."""
+    source = Path(path).read_text(encoding="utf-8")
+    match = re.search(rf"^\s*(?:const|let|var)\s+{re.escape(name)}\s*=\s*", source, re.MULTILINE)
+    if not match:
+        raise ValueError(f"{name} is not defined in {path}")
+    tokens = _tokens(source, match.end())
+    return _parse(tokens, *next(tokens))
+
+
+TRIP_CONFIG = js_constant(CONFIG_JS, "TRIP_CONFIG")
+
+# [{"name", "initials", "color", "avatar_url"}] in the site's order
+TEAM_ROSTER = TRIP_CONFIG["teamMembers"]
+TEAM_MEMBERS = [member["name"] for member in TEAM_ROSTER]
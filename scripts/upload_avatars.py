@@ -1,137 +1,527 @@
 """
 Upload Pre-Generated Avatars to Supabase
 =========================================
-Clears existing profile pictures and uploads new ones from images/avatars folder.
+Syncs the images/avatars folder into the profile-pictures bucket.
+
+By default only new or changed files are uploaded and orphaned objects are
+deleted afterwards, rsync-style. A local manifest (scripts/.avatar_manifest.json)
+caches content hashes so unchanged files are not re-read on every run.
+
+Each avatar also gets 96/192/384 px WebP (and AVIF, when supported) derivatives,
+built in a process pool and recorded in users.avatar_variants for srcset.
+
+Every user's avatar_options are then packed into one sprite sheet for the
+avatar picker, and everyone's selected avatar_url into one team atlas for the
+roster (users.avatar_sprite / users.avatar_atlas). A sheet is rebuilt only
+when one of its inputs changed, so re-run the sync after someone picks a new
+avatar in the app to refresh the team atlas.
+
+Avatars that are perceptual near-duplicates of a better one in the same
+user's folder are left out (and removed from the bucket), unless
+--keep-duplicates is given (see image_index.py).
+
+Uploads run on a pool of --workers threads (default 4) and stream each file
+from disk with its detected MIME type. Files over 6 MB use resumable chunked
+uploads, so an interrupted run continues where it stopped; transient errors
+are retried with backoff (see upload_engine.py).
+
+Bucket listing, uploads, derivatives, deletes and database writes are traced
+to scripts/.cache/traces/ (or --trace PATH) with a timing summary at the end.
+
+Usage:
+    python scripts/upload_avatars.py            # incremental sync
+    python scripts/upload_avatars.py --dry-run  # show what would change
+    python scripts/upload_avatars.py --clear    # old behaviour: wipe bucket and re-upload everything
+    python scripts/upload_avatars.py --workers 8
+    python scripts/upload_avatars.py --keep-duplicates
+    python scripts/upload_avatars.py --trace run.jsonl
+
+The same commands are available as `python scripts/avatars.py sync|upload`,
+and `python scripts/avatars.py plan` estimates a sync without any network.
 """
 
+from __future__ import annotations
+
 import os
 import sys
+import json
+import hashlib
+import argparse
 from pathlib import Path
-
-try:
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
-except ImportError:
-    print("Missing dependencies. Install with:")
-    print("pip install supabase python-dotenv")
-    sys.exit(1)
-
-# Load environment variables from scripts/.env
+from typing import TYPE_CHECKING
+
+# The SDK takes about a second to import, so it is only loaded by main()
+if TYPE_CHECKING:
+    from supabase import Client
+
+from trip_config import TEAM_MEMBERS
+
+from avatar_db import fetch_user_ids, avatar_row, bulk_save_avatars, fetch_avatar_users, bulk_save_sprites
+from avatar_variants import (
+    VARIANT_PREFIX, VARIANT_SIZES, CONTENT_TYPES, build_variants_parallel, upload_variants,
+    variant_formats, variant_key, variant_urls
+)
+from avatar_sprites import (
+    SPRITE_PREFIX, USER_SPRITE_TILE, USER_SPRITE_COLUMNS, TEAM_ATLAS_TILE,
+    atlas_columns, sprite_fingerprint, pack_sprites_parallel, upload_sprite
+)
+from upload_engine import UploadEngine, DEFAULT_WORKERS
+from image_index import ImageIndex, near_duplicates
+from telemetry import tracer
+
+# scripts/.env is loaded by trip_config
 script_dir = Path(__file__).parent
-load_dotenv(script_dir / ".env")
 
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 
 BUCKET_NAME = "profile-pictures"
+MANIFEST_PATH = Path(os.getenv("AVATAR_MANIFEST_PATH", script_dir / ".avatar_manifest.json"))
+LIST_PAGE_SIZE = 100
 
-# Team members to process
-TEAM_MEMBERS = ["Julian", "Dave", "Jason", "Frank", "Cathy", "Matylda", "Patryk"]
 
+def object_key(user_name: str, image_path: Path) -> str:
+    """Storage object name for a local avatar file (flat bucket structure)."""
+    return f"{user_name.lower()}_{image_path.name}"
 
-def clear_bucket(supabase: Client):
-    """Delete all files from the profile-pictures bucket."""
-    print("\n" + "="*60)
-    print("  STEP 1: Clearing existing profile pictures")
-    print("="*60)
 
-    try:
-        # List all files in the bucket
-        files = supabase.storage.from_(BUCKET_NAME).list()
+def find_user_images(avatars_dir: Path, user_name: str) -> list:
+    """All avatar images for a user, in upload order."""
+    user_folder = avatars_dir / user_name
+    if not user_folder.exists():
+        return []
+    return sorted(list(user_folder.glob("*.png")) + list(user_folder.glob("*.jpg")))
 
-        if not files:
-            print("  No existing files found in bucket")
-            return
 
-        # Get file names (excluding folders)
-        file_names = [f["name"] for f in files if f.get("name")]
+def file_md5(path: Path) -> str:
+    """MD5 of a file, read in chunks. Matches the storage eTag for single-part uploads."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-        if not file_names:
-            print("  No files to delete")
-            return
 
-        print(f"  Found {len(file_names)} files to delete:")
-        for name in file_names:
-            print(f"    - {name}")
+def load_manifest() -> dict:
+    """Load the local manifest of previously synced files."""
+    if MANIFEST_PATH.exists():
+        try:
+            return json.loads(MANIFEST_PATH.read_text())
+        except (OSError, ValueError):
+            print("  Warning: manifest unreadable, rebuilding it")
+    return {"files": {}}
 
-        # Delete all files
-        result = supabase.storage.from_(BUCKET_NAME).remove(file_names)
-        print(f"  Deleted {len(file_names)} files")
 
-    except Exception as e:
-        print(f"  Warning: Could not clear bucket: {e}")
-        print("  Continuing with upload...")
+def save_manifest(manifest: dict):
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True))
 
 
-def upload_user_avatars(supabase: Client, user_name: str, avatars_dir: Path) -> list:
-    """Upload all avatar images for a user and return the URLs."""
-    user_folder = avatars_dir / user_name
+def scan_local_avatars(avatars_dir: Path, manifest: dict) -> dict:
+    """
+    Build {object_key: entry} for every local avatar.
+    Hashes are reused from the manifest when size and mtime are unchanged.
+    """
+    cached = manifest.get("files", {})
+    local = {}
+    for user_name in TEAM_MEMBERS:
+        for image_path in find_user_images(avatars_dir, user_name):
+            key = object_key(user_name, image_path)
+            stat = image_path.stat()
+            previous = cached.get(key)
+            if previous and previous.get("size") == stat.st_size and previous.get("mtime") == stat.st_mtime:
+                md5 = previous["md5"]
+            else:
+                md5 = file_md5(image_path)
+            local[key] = {
+                "user": user_name,
+                "path": str(image_path.relative_to(avatars_dir)),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "md5": md5,
+            }
+    return local
+
+
+def drop_near_duplicates(avatars_dir: Path, local: dict) -> dict:
+    """Leave out avatars that look the same as a better one of the same user's."""
+    metrics = ImageIndex().metrics([avatars_dir / entry["path"] for entry in local.values()])
+    key_for_path = {avatars_dir / entry["path"]: key for key, entry in local.items()}
+    dropped = set()
+    for user_name in TEAM_MEMBERS:
+        user_metrics = {path: m for path, m in metrics.items() if local[key_for_path[path]]["user"] == user_name}
+        for kept, path, distance in near_duplicates(user_metrics):
+            print(f"  ⚠ Skipping {key_for_path[path]}: near-duplicate of {key_for_path[kept]} ({distance} bits apart)")
+            dropped.add(key_for_path[path])
+    return {key: entry for key, entry in local.items() if key not in dropped}
+
+
+def list_bucket(supabase: Client, prefix: str = "") -> dict:
+    """
+    List every object in the bucket (or one folder of it), following pagination.
+    Returns {name: etag}; etag may be None if the API omits metadata.
+    """
+    remote = {}
+    offset = 0
+    while True:
+        with tracer.span("list_bucket", offset=offset):
+            page = supabase.storage.from_(BUCKET_NAME).list(prefix, {
+                "limit": LIST_PAGE_SIZE,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            })
+        for f in page or []:
+            if not f.get("name") or f.get("id") is None:
+                continue  # folders have no id
+            etag = (f.get("metadata") or {}).get("eTag")
+            remote[f["name"]] = etag.strip('"') if etag else None
+        if not page or len(page) < LIST_PAGE_SIZE:
+            break
+        offset += LIST_PAGE_SIZE
+    return remote
+
+
+def plan_sync(local: dict, remote: dict, manifest: dict) -> tuple:
+    """
+    Compare local files against the bucket.
+    Returns (keys_to_upload, keys_to_delete).
+    """
+    synced = manifest.get("files", {})
+    uploads = []
+    for key, entry in local.items():
+        if key not in remote:
+            uploads.append(key)
+        elif remote[key] is not None and "-" not in remote[key]:
+            # Chunked (resumable) uploads get a multipart "<hash>-<parts>" eTag, which
+            # is not the file's MD5, so those fall through to the manifest check below
+            if remote[key] != entry["md5"]:
+                uploads.append(key)
+        elif synced.get(key, {}).get("md5") != entry["md5"]:
+            uploads.append(key)
+    deletes = sorted(key for key in remote if key not in local)
+    return sorted(uploads), deletes
+
+
+def with_derivatives(keys: list) -> list:
+    """
+    The given avatar keys plus every responsive derivative they may have.
+    list_bucket() only sees the bucket root, so derivatives under variants/
+    are named from the keys, in every format (not just the ones this machine
+    encodes); removing objects that don't exist is a no-op.
+    """
+    return keys + [variant_key(key, size, fmt) for key in keys for fmt in CONTENT_TYPES for size in VARIANT_SIZES]
+
+
+def upload_jobs(avatars_dir: Path, local: dict, keys: list) -> list:
+    """UploadEngine jobs for the given object keys."""
+    return [{**local[key], "key": key, "path": avatars_dir / local[key]["path"]} for key in keys]
+
+
+def sync_bucket(supabase: Client, avatars_dir: Path, dry_run: bool = False, workers: int = DEFAULT_WORKERS,
+                keep_duplicates: bool = False) -> dict:
+    """
+    Incrementally sync local avatars to the bucket.
+
+    Changed files are overwritten in place (upsert) so their public URLs keep
+    working throughout, the database is updated only for users whose set of
+    avatars changed, and orphans are deleted last so no live URL 404s mid-run.
+    """
+    print("\n" + "="*60)
+    print("  Syncing avatars" + (" (dry run)" if dry_run else ""))
+    print("="*60)
 
-    if not user_folder.exists():
-        print(f"    Folder not found: {user_folder}")
-        return []
+    manifest = load_manifest()
+    local = scan_local_avatars(avatars_dir, manifest)
+    if not keep_duplicates:
+        local = drop_near_duplicates(avatars_dir, local)
+    remote = list_bucket(supabase)
+    uploads, deletes = plan_sync(local, remote, manifest)
+
+    print(f"  Local files: {len(local)} | Bucket objects: {len(remote)}")
+    print(f"  To upload: {len(uploads)} | To delete: {len(deletes)} | Unchanged: {len(local) - len(uploads)}")
+
+    if dry_run:
+        for key in uploads:
+            print(f"    + {key}")
+        for key in deletes:
+            print(f"    - {key}")
+        return {}
+
+    # Step 1: upload new and changed files
+    engine = UploadEngine(SUPABASE_URL, SUPABASE_SERVICE_KEY, BUCKET_NAME, workers=workers)
+    failures = engine.upload(upload_jobs(avatars_dir, local, uploads))
+    synced_files = {key: entry for key, entry in local.items() if failures.get(key) is None}
+
+    # Step 2: build and upload responsive derivatives for new/changed files
+    formats = variant_formats()
+    previous = manifest.get("files", {})
+    stale = {
+        key: avatars_dir / entry["path"]
+        for key, entry in synced_files.items()
+        if key in uploads
+        or previous.get(key, {}).get("variants_md5") != entry["md5"]
+        or previous.get(key, {}).get("variant_formats") != formats
+    }
+    rebuilt = upload_derivatives(supabase, stale)
+    for key, entry in synced_files.items():
+        if key in rebuilt:
+            entry["variants_md5"] = entry["md5"]
+            entry["variant_formats"] = formats
+        elif key in previous and key not in stale:
+            entry["variants_md5"] = previous[key].get("variants_md5")
+            entry["variant_formats"] = previous[key].get("variant_formats")
+
+    # Step 3: update users whose avatar list or derivatives changed
+    results = {}
+    updates = {}
+    for user_name in TEAM_MEMBERS:
+        user_prefix = f"{user_name.lower()}_"
+        user_keys = [key for key, entry in local.items() if entry["user"] == user_name]
+        remote_keys = [key for key in remote if key.startswith(user_prefix)]
+        if set(user_keys) == set(remote_keys) and not any(key in rebuilt for key in user_keys):
+            results[user_name] = {"success": True, "count": len(user_keys), "unchanged": True}
+            continue
+        live_keys = [key for key in user_keys if key in synced_files]
+        avatar_urls = [supabase.storage.from_(BUCKET_NAME).get_public_url(key) for key in live_keys]
+        avatar_variants = [
+            variant_urls(supabase, BUCKET_NAME, key, synced_files[key].get("variant_formats"))
+            if synced_files[key].get("variants_md5") else None
+            for key in live_keys
+        ]
+        print(f"  Updating: {user_name} ({len(avatar_urls)} avatars)")
+        updates[user_name] = (avatar_urls, avatar_variants)
+        results[user_name] = {"success": False, "count": len(avatar_urls)}
+
+    for user_name, success in update_user_database(supabase, updates).items():
+        results[user_name]["success"] = success
+
+    # Step 4: rebuild sprite sheets whose avatars changed
+    sync_sprites(supabase, avatars_dir, synced_files, manifest)
+
+    # Step 5: delete orphans only after the database points at the new set
+    if deletes and not all(results[name]["success"] for name in updates):
+        print("\n  Skipping orphan deletion because the database update failed")
+        deletes = []
+    if deletes:
+        try:
+            with tracer.span("delete_orphans", files=len(deletes)):
+                supabase.storage.from_(BUCKET_NAME).remove(with_derivatives(deletes))
+            print(f"\n  Deleted {len(deletes)} orphaned files and their derivatives")
+        except Exception as e:
+            print(f"\n  Warning: Could not delete orphans: {e}")
+
+    manifest["files"] = synced_files
+    save_manifest(manifest)
+    return results
+
+
+def sync_sprites(supabase: Client, avatars_dir: Path, files: dict, manifest: dict, force: bool = False):
+    """
+    Pack each user's avatar_options into a sprite sheet and everyone's selected
+    avatar into the team atlas, rebuilding only sheets whose inputs changed.
+    files is {object_key: entry} for the avatars now in the bucket; the sheets
+    are recorded in manifest["sprites"]. Sheets the users table no longer
+    points at are deleted once it has been updated.
+    """
+    print("\n  Checking sprite sheets...")
+    try:
+        users = fetch_avatar_users(supabase, TEAM_MEMBERS)
+    except Exception as e:
+        print(f"    Warning: Could not read users, skipping sprites: {e}")
+        return
+
+    storage = supabase.storage.from_(BUCKET_NAME)
+    key_for_url = {storage.get_public_url(key): key for key in files}
+    previous = {} if force else manifest.get("sprites", {})
+    sheets = {}
+    jobs = {}
+
+    def plan(name: str, keys: list, labels: list, tile: int, columns: int):
+        inputs = sprite_fingerprint([f"{label}={files[key]['md5']}" for label, key in zip(labels, keys)],
+                                    tile, columns)
+        if previous.get(name, {}).get("inputs") == inputs:
+            sheets[name] = previous[name]
+        else:
+            sheets[name] = {"inputs": inputs}
+            jobs[name] = ([avatars_dir / files[key]["path"] for key in keys], tile, columns)
+
+    # One sheet per user, tiles in avatar_options order
+    for user_name, row in users.items():
+        keys = [key_for_url.get(url) for url in row.get("avatar_options") or []]
+        if keys and None not in keys:
+            plan(user_name.lower(), keys, range(len(keys)), USER_SPRITE_TILE, USER_SPRITE_COLUMNS)
+
+    # One team atlas of the avatars people picked
+    selected = {name: key_for_url.get(users[name].get("avatar_url")) for name in TEAM_MEMBERS if name in users}
+    selected = {name: key for name, key in selected.items() if key}
+    if selected:
+        plan("team", list(selected.values()), list(selected), TEAM_ATLAS_TILE, atlas_columns(len(selected)))
+
+    if jobs:
+        print(f"    Packing {len(jobs)} sprite sheet(s)...")
+        try:
+            with tracer.span("pack_sprites", sheets=len(jobs)):
+                packed = pack_sprites_parallel(jobs)
+        except Exception as e:
+            print(f"    Warning: Could not pack sprite sheets: {e}")
+            packed = {}
+        for name, result in packed.items():
+            try:
+                with tracer.span("upload_sprite", bytes_out=len(result[0])):
+                    key, sheet = upload_sprite(supabase, BUCKET_NAME, name, result)
+                sheets[name].update(key=key, sheet=sheet)
+                print(f"    Sprite: {key} ({len(sheet['frames'])} tiles, {len(result[0]) / 1024:.0f} KB)")
+            except Exception as e:
+                print(f"    Failed to upload sprite {name}: {e}")
+    sheets = {name: entry for name, entry in sheets.items() if entry.get("sheet")}
+
+    # Point the users rows at the current sheets (None falls back to plain images)
+    team = sheets.get("team", {}).get("sheet")
+    rows = []
+    for user_name, row in users.items():
+        sprite = sheets.get(user_name.lower(), {}).get("sheet")
+        atlas = None
+        if team and user_name in selected:
+            frame = team["frames"][list(selected).index(user_name)]
+            atlas = {"url": team["url"], "width": team["width"], "height": team["height"],
+                     "tile": team["tile"], **frame, "source": row["avatar_url"]}
+        if row.get("avatar_sprite") != sprite or row.get("avatar_atlas") != atlas:
+            rows.append({"id": row["id"], "name": user_name, "avatar_sprite": sprite, "avatar_atlas": atlas})
 
-    # Find all image files in the user's folder
-    image_files = sorted(list(user_folder.glob("*.png")) + list(user_folder.glob("*.jpg")))
+    try:
+        saved = bulk_save_sprites(supabase, rows)
+    except Exception as e:
+        print(f"    Warning: Could not save sprite sheets, keeping the old ones: {e}")
+        return
+    manifest["sprites"] = sheets
+    print(f"    {len(sheets)} sheet(s) current, {len(jobs)} rebuilt, {len(saved)} user(s) updated")
+
+    # Old sheets are deleted only once no row points at them
+    live = {entry["key"].split("/", 1)[1] for entry in sheets.values()}
+    stale = [f"{SPRITE_PREFIX}/{name}" for name in list_bucket(supabase, SPRITE_PREFIX) if name not in live]
+    if stale:
+        try:
+            with tracer.span("delete_sprites", files=len(stale)):
+                storage.remove(stale)
+            print(f"    Deleted {len(stale)} replaced sprite sheet(s)")
+        except Exception as e:
+            print(f"    Warning: Could not delete replaced sprite sheets: {e}")
 
-    if not image_files:
-        print(f"    No images found in folder")
-        return []
 
-    avatar_urls = []
+def upload_derivatives(supabase: Client, sources: dict) -> dict:
+    """
+    Build derivatives for {object_key: local_path} in a process pool and upload them.
+    Returns {object_key: {fmt: {size: url}}} for the files that succeeded.
+    """
+    if not sources:
+        return {}
 
-    for image_path in image_files:
+    print(f"\n  Building derivatives for {len(sources)} files...")
+    try:
+        with tracer.span("build_variants", files=len(sources)):
+            built = build_variants_parallel(sources)
+    except Exception as e:
+        print(f"    Warning: Could not build derivatives: {e}")
+        return {}
+
+    uploaded = {}
+    for key, variants in built.items():
         try:
-            # Create filename for Supabase
-            filename = f"{user_name.lower()}_{image_path.name}"
+            with tracer.span("upload_variants", bytes_out=sum(len(data) for data in variants.values())):
+                uploaded[key] = upload_variants(supabase, BUCKET_NAME, key, variants)
+            total_kb = sum(len(data) for data in variants.values()) / 1024
+            print(f"    Derivatives: {key} ({len(variants)} files, {total_kb:.0f} KB)")
+        except Exception as e:
+            print(f"    Failed to upload derivatives for {key}: {e}")
+    return uploaded
 
-            # Read the image
-            with open(image_path, "rb") as f:
-                image_bytes = f.read()
 
-            # Upload to Supabase
-            result = supabase.storage.from_(BUCKET_NAME).upload(
-                path=filename,
-                file=image_bytes,
-                file_options={"content-type": "image/png", "upsert": "true"}
-            )
+def clear_bucket(supabase: Client):
+    """Delete all files from the profile-pictures bucket."""
+    print("\n" + "="*60)
+    print("  STEP 1: Clearing existing profile pictures")
+    print("="*60)
+
+    with tracer.span("clear_bucket") as span:
+        try:
+            # List all files in the bucket
+            files = supabase.storage.from_(BUCKET_NAME).list()
 
-            # Get public URL
-            public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(filename)
-            avatar_urls.append(public_url)
+            if not files:
+                print("  No existing files found in bucket")
+                return
 
-            print(f"    Uploaded: {image_path.name}")
+            # Get file names (excluding folders), plus derivatives and sprite sheets in their folders
+            file_names = [f["name"] for f in files if f.get("name") and f.get("id") is not None]
+            for prefix in (VARIANT_PREFIX, SPRITE_PREFIX):
+                folder_files = supabase.storage.from_(BUCKET_NAME).list(prefix) or []
+                file_names += [f"{prefix}/{f['name']}" for f in folder_files if f.get("name")]
 
-        except Exception as e:
-            print(f"    Failed to upload {image_path.name}: {e}")
+            if not file_names:
+                print("  No files to delete")
+                return
 
-    return avatar_urls
+            print(f"  Found {len(file_names)} files to delete:")
+            for name in file_names:
+                print(f"    - {name}")
 
+            # Delete all files
+            span["files"] = len(file_names)
+            result = supabase.storage.from_(BUCKET_NAME).remove(file_names)
+            print(f"  Deleted {len(file_names)} files")
 
-def update_user_database(supabase: Client, user_name: str, avatar_urls: list):
-    """Update the user's avatar_url and avatar_options in the database."""
-    if not avatar_urls:
-        return False
+        except Exception as e:
+            span.update(ok=False, error=str(e)[:200])
+            print(f"  Warning: Could not clear bucket: {e}")
+            print("  Continuing with upload...")
+
+
+def update_user_database(supabase: Client, updates: dict) -> dict:
+    """
+    Write avatar_url, avatar_options and avatar_variants for many users at once.
+    updates is {user_name: (avatar_urls, avatar_variants)}. Ids are resolved in
+    one query and all rows are written in one atomic upsert.
+    Returns {user_name: success}.
+    """
+    updates = {name: value for name, value in updates.items() if value[0]}
+    if not updates:
+        return {}
 
     try:
-        result = supabase.table("users").update({
-            "avatar_url": avatar_urls[0],
-            "avatar_options": avatar_urls
-        }).eq("name", user_name).execute()
-
-        if result.data:
-            print(f"    Database updated with {len(avatar_urls)} avatar options")
-            return True
-        else:
-            print(f"    User '{user_name}' not found in database")
-            return False
+        user_ids = fetch_user_ids(supabase, list(updates))
+        rows = []
+        for user_name, (avatar_urls, avatar_variants) in updates.items():
+            if user_name not in user_ids:
+                print(f"    User '{user_name}' not found in database")
+                continue
+            rows.append(avatar_row(user_ids[user_name], user_name, avatar_urls, avatar_variants))
+
+        saved = set(bulk_save_avatars(supabase, rows))
+        print(f"\n  Database updated for {len(saved)} users in one write")
+        return {name: name in saved for name in updates}
 
     except Exception as e:
-        print(f"    Database update failed: {e}")
-        return False
+        print(f"\n  Database update failed, no users were changed: {e}")
+        return {name: False for name in updates}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Upload pre-generated avatars to Supabase")
+    parser.add_argument("--clear", action="store_true",
+                        help="Delete every object in the bucket and re-upload all avatars")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show what a sync would upload and delete without changing anything")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent uploads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Upload avatars even if they are near-duplicates of another of the same user's")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write the JSON-lines span trace here (default: scripts/.cache/traces/upload-<time>.jsonl)")
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+
     print("="*60)
     print("  Upload Avatars to Supabase")
     print("="*60)
@@ -141,6 +531,13 @@ def main():
         print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in scripts/.env")
         sys.exit(1)
 
+    try:
+        from supabase import create_client
+    except ImportError:
+        print("Missing dependencies. Install with:")
+        print("pip install supabase python-dotenv Pillow")
+        sys.exit(1)
+
     # Initialize Supabase client
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
     print(f"Connected to: {SUPABASE_URL}")
@@ -154,38 +551,76 @@ def main():
         sys.exit(1)
 
     print(f"Avatars directory: {avatars_dir}")
+    tracer.start("upload", args.trace)
+
+    try:
+        if not args.clear:
+            results = sync_bucket(supabase, avatars_dir, dry_run=args.dry_run, workers=args.workers,
+                                  keep_duplicates=args.keep_duplicates)
+            if not args.dry_run:
+                print_summary(results)
+        else:
+            print_summary(clear_and_upload(supabase, avatars_dir, workers=args.workers,
+                                           keep_duplicates=args.keep_duplicates))
+        tracer.print_summary()
+    finally:
+        tracer.close()
+
+
+def clear_and_upload(supabase: Client, avatars_dir: Path, workers: int = DEFAULT_WORKERS,
+                     keep_duplicates: bool = False) -> dict:
+    """The --clear path: wipe the bucket, then upload every user's avatars."""
 
     # Step 1: Clear existing files
     clear_bucket(supabase)
 
-    # Step 2: Upload new avatars
+    # Step 2: Upload new avatars (every user's files share one worker pool)
     print("\n" + "="*60)
     print("  STEP 2: Uploading new avatars")
     print("="*60)
 
+    manifest = load_manifest()
+    local = scan_local_avatars(avatars_dir, manifest)
+    if not keep_duplicates:
+        local = drop_near_duplicates(avatars_dir, local)
+    engine = UploadEngine(SUPABASE_URL, SUPABASE_SERVICE_KEY, BUCKET_NAME, workers=workers)
+    failures = engine.upload(upload_jobs(avatars_dir, local, sorted(local)))
+    uploaded = {key: entry for key, entry in local.items() if failures.get(key) is None}
+    derivatives = upload_derivatives(supabase, {key: avatars_dir / entry["path"] for key, entry in uploaded.items()})
+
     results = {}
+    updates = {}
 
     for user_name in TEAM_MEMBERS:
-        print(f"\n  Processing: {user_name}")
-
-        # Upload images
-        avatar_urls = upload_user_avatars(supabase, user_name, avatars_dir)
-
-        if avatar_urls:
-            # Update database
-            success = update_user_database(supabase, user_name, avatar_urls)
-            results[user_name] = {"success": success, "count": len(avatar_urls)}
+        keys = [key for key, entry in uploaded.items() if entry["user"] == user_name]
+        if keys:
+            avatar_urls = [supabase.storage.from_(BUCKET_NAME).get_public_url(key) for key in keys]
+            updates[user_name] = (avatar_urls, [derivatives.get(key) for key in keys])
+            results[user_name] = {"success": False, "count": len(avatar_urls)}
         else:
-            print(f"    No avatars to upload")
+            print(f"  {user_name}: No avatars to upload")
             results[user_name] = {"success": False, "count": 0, "reason": "No images found"}
 
-    # Summary
+    # Step 3: Update the database for every user in one write
+    for user_name, success in update_user_database(supabase, updates).items():
+        results[user_name]["success"] = success
+
+    # Step 4: Pack fresh sprite sheets for the new avatars
+    sync_sprites(supabase, avatars_dir, uploaded, manifest, force=True)
+    save_manifest(manifest)
+
+    return results
+
+
+def print_summary(results: dict):
     print("\n" + "="*60)
     print("  SUMMARY")
     print("="*60)
 
     for name, result in results.items():
-        if result["success"]:
+        if result.get("unchanged"):
+            print(f"  {name}: {result['count']} avatars up to date")
+        elif result["success"]:
             print(f"  {name}: {result['count']} avatars uploaded")
         elif result["count"] == 0:
             print(f"  {name}: No images in folder (skipped)")
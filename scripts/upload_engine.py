@@ -0,0 +1,268 @@
+"""
+Storage Upload Engine
+=====================
+Uploads a batch of local files into a Supabase Storage bucket from a
+bounded pool of worker threads, so a full avatar push keeps several
+transfers in flight and is limited by bandwidth rather than round trips.
+
+- Files are streamed from disk in chunks, never read whole into memory.
+- The Content-Type comes from each file's leading bytes (PNG, JPEG, WebP,
+  ...), not from its extension.
+- Files up to the resumable threshold go in one streamed request. Larger
+  ones use the resumable (TUS) endpoint in 6 MB chunks, and the upload URL
+  is kept in scripts/.cache/resumable_uploads.json, so after an interrupted
+  run the next one asks the server how much it already has and sends only
+  the rest.
+- Connection errors, timeouts and 408/429/5xx answers are retried with
+  jittered exponential backoff. A failed chunk resumes from the server's
+  offset instead of restarting the file.
+- Each finished file prints a progress line with the running MB/s.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from http_transfer import (
+    TUS_CHUNK_SIZE, iter_file, detect_content_type, upload_stream, tus_create, tus_offset, tus_patch
+)
+from telemetry import tracer
+
+script_dir = Path(__file__).parent
+RESUME_PATH = Path(os.getenv("AVATAR_CACHE_DIR", script_dir / ".cache")) / "resumable_uploads.json"
+
+DEFAULT_WORKERS = 4
+# Files larger than one TUS chunk are uploaded resumably
+RESUMABLE_THRESHOLD = TUS_CHUNK_SIZE
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+MB = 1024 * 1024
+
+
+# ========================================
+# RETRIES
+# ========================================
+
+def status_of(error: Exception):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Dropped connections, timeouts and transient server answers are worth another try."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return status_of(error) in RETRYABLE_STATUS
+
+
+def backoff_seconds(attempt: int) -> float:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def wait_before_retry(label: str, error: Exception, attempt: int):
+    delay = backoff_seconds(attempt)
+    tracer.event("retry", of=label, delay_s=round(delay, 2))
+    print(f"    ⚠ {label}: {str(error)[:80]}, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+    time.sleep(delay)
+
+
+def with_retry(label: str, func, *args, **kwargs):
+    """Call func, retrying transient failures with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt == MAX_RETRIES:
+                raise
+            wait_before_retry(label, e, attempt)
+
+
+# ========================================
+# RESUME STATE AND PROGRESS
+# ========================================
+
+class ResumeStore:
+    """
+    Upload URLs of unfinished resumable uploads, keyed by bucket/key. An
+    entry only applies to the exact file content it was started for.
+    """
+
+    def __init__(self, path: Path = RESUME_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                print("  Warning: resumable upload state unreadable, starting uploads from scratch")
+
+    def get(self, name: str, fingerprint: str):
+        entry = self.entries.get(name)
+        return entry["url"] if entry and entry.get("fingerprint") == fingerprint else None
+
+    def put(self, name: str, fingerprint: str, url: str):
+        with self.lock:
+            self.entries[name] = {"url": url, "fingerprint": fingerprint}
+            self._save()
+
+    def drop(self, name: str):
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_suffix(".part")
+        partial.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(partial, self.path)
+
+
+class TransferProgress:
+    """Thread-safe file and byte counters with a running throughput figure."""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.sent_bytes = 0      # bytes on the wire, including resent chunks
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def advance(self, nbytes: int):
+        with self.lock:
+            self.sent_bytes += nbytes
+
+    def rate(self) -> float:
+        return self.sent_bytes / max(time.perf_counter() - self.started, 1e-6)
+
+    def finish(self, key: str, size: int, error: Exception = None):
+        with self.lock:
+            self.done_files += 1
+            if error is None:
+                self.done_bytes += size
+            counts = (f"[{self.done_files}/{self.total_files}, "
+                      f"{self.done_bytes / MB:.1f}/{self.total_bytes / MB:.1f} MB, {self.rate() / MB:.1f} MB/s]")
+            if error is None:
+                print(f"    Uploaded: {key} {counts}")
+            else:
+                print(f"    Failed to upload {key}: {error} {counts}")
+
+    def print_summary(self, workers: int):
+        elapsed = time.perf_counter() - self.started
+        print(f"  Sent {self.sent_bytes / MB:.1f} MB in {elapsed:.1f}s "
+              f"({self.rate() / MB:.1f} MB/s, {workers} workers)")
+
+
+# ========================================
+# ENGINE
+# ========================================
+
+class UploadEngine:
+    """Uploads files to one bucket with `workers` concurrent transfers."""
+
+    def __init__(self, supabase_url: str, service_key: str, bucket: str, workers: int = DEFAULT_WORKERS,
+                 resumable_threshold: int = RESUMABLE_THRESHOLD, chunk_size: int = TUS_CHUNK_SIZE,
+                 resume_store: ResumeStore = None):
+        self.supabase_url = supabase_url
+        self.service_key = service_key
+        self.bucket = bucket
+        self.workers = max(1, workers)
+        self.resumable_threshold = resumable_threshold
+        self.chunk_size = chunk_size
+        self.resume = resume_store or ResumeStore()
+
+    def upload(self, jobs: list) -> dict:
+        """
+        Upload every job concurrently. A job is {"key", "path", "size", "md5"?,
+        "user"?}. Returns {key: None on success, or the Exception}.
+        """
+        if not jobs:
+            return {}
+        progress = TransferProgress(len(jobs), sum(job["size"] for job in jobs))
+
+        def work(job):
+            try:
+                with tracer.span("upload_file", user=job.get("user")) as span:
+                    self.upload_one(job, progress, span)
+                progress.finish(job["key"], job["size"])
+                return job["key"], None
+            except Exception as e:
+                progress.finish(job["key"], job["size"], e)
+                return job["key"], e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(pool.map(work, jobs))
+        progress.print_summary(self.workers)
+        return results
+
+    def upload_one(self, job: dict, progress: TransferProgress, span: dict):
+        path = Path(job["path"])
+        content_type = detect_content_type(path)
+        span["content_type"] = content_type
+
+        def sent(nbytes):
+            span["bytes_out"] += nbytes
+            progress.advance(nbytes)
+
+        if job["size"] > self.resumable_threshold:
+            fingerprint = job.get("md5") or f"{job['size']}:{path.stat().st_mtime}"
+            self._upload_resumable(job["key"], path, job["size"], content_type, fingerprint, sent, span)
+        else:
+            with_retry(f"upload {job['key']}", self._upload_streamed, job["key"], path, content_type, sent)
+
+    def _upload_streamed(self, key: str, path: Path, content_type: str, sent):
+        def counted(chunks):
+            for chunk in chunks:
+                sent(len(chunk))
+                yield chunk
+        upload_stream(self.supabase_url, self.service_key, self.bucket, key, counted(iter_file(path)), content_type)
+
+    def _upload_resumable(self, key: str, path: Path, size: int, content_type: str, fingerprint: str, sent,
+                          span: dict):
+        name = f"{self.bucket}/{key}"
+        label = f"upload {key}"
+
+        upload_url = self.resume.get(name, fingerprint)
+        offset = with_retry(label, tus_offset, upload_url, self.service_key) if upload_url else None
+        if offset is None:
+            upload_url = with_retry(label, tus_create, self.supabase_url, self.service_key,
+                                    self.bucket, key, size, content_type)
+            self.resume.put(name, fingerprint, upload_url)
+            offset = 0
+        else:
+            span["resumed_from"] = offset
+            print(f"    Resuming: {key} at {offset / MB:.1f}/{size / MB:.1f} MB")
+
+        attempt = 0
+        with open(path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                try:
+                    offset = tus_patch(upload_url, self.service_key, offset, chunk)
+                    sent(len(chunk))
+                    attempt = 0
+                except Exception as e:
+                    # 409 means our offset disagrees with the server's; re-reading it fixes that
+                    if not (is_retryable(e) or status_of(e) == 409) or attempt == MAX_RETRIES:
+                        raise
+                    wait_before_retry(label, e, attempt)
+                    attempt += 1
+                    offset = with_retry(label, tus_offset, upload_url, self.service_key)
+                    if offset is None:
+                        self.resume.drop(name)
+                        raise Exception("resumable upload expired on the server; it will restart next run")
+        self.resume.drop(name)